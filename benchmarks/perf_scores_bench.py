@@ -0,0 +1,95 @@
+"""
+Row-wise df.apply scoring against the array kernels in data_scripts._perf_scores
+on players_teams scaled up 10x-1000x.
+
+    python benchmarks/perf_scores_bench.py --scales 10 100 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from data_scripts import _store_data as sd
+from data_scripts import _perf_scores as ps
+from data_scripts import players_teams_data as ptd
+
+
+def scaled_players_teams(base: pd.DataFrame, scale: int, seed: int = 0) -> pd.DataFrame:
+    """Tiles players_teams `scale` times with fresh player ids and jittered box-score counts."""
+    rng = np.random.default_rng(seed)
+    df = pd.concat([base] * scale, ignore_index=True)
+    copy_no = np.repeat(np.arange(scale), len(base))
+    df["playerID"] = df["playerID"].astype(str) + "_" + copy_no.astype(str)
+
+    stat_cols = [col for col in ps.SCORE_COLUMNS.values()] + ["minutes"]
+    noise = rng.integers(-2, 3, size=(len(df), len(stat_cols)))
+    df[stat_cols] = np.clip(df[stat_cols].to_numpy() + noise, 0, None)
+    return df
+
+
+def apply_scores(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Performance": df.apply(
+            lambda row: ptd.overall_performance_per_game(
+                row['points'], row['rebounds'], row['assists'], row['steals'],
+                row['blocks'], row['turnovers'], row['fgMade'], row['fgAttempted'], row['GP']
+            ), axis=1
+        ),
+        "OffPerformance": df.apply(
+            lambda row: ptd.offense_score_per_game(
+                row['points'], row['assists'], row['fgMade'], row['fgAttempted'], row['turnovers'], row['GP']
+            ), axis=1
+        ),
+        "DefPerformance": df.apply(
+            lambda row: ptd.defense_score_per_game(
+                row['rebounds'], row['steals'], row['blocks'], row['PF'], row['GP']
+            ), axis=1
+        ),
+    }, index=df.index).astype(float)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", type=Path, default=Path(__file__).resolve().parent.parent / "data")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--max-apply-rows", type=int, default=200_000,
+                        help="skip the df.apply baseline above this many rows")
+    args = parser.parse_args()
+
+    base = sd.load_table("players_teams", args.data_dir)
+    rows = []
+    for scale in args.scales:
+        df = scaled_players_teams(base, scale)
+        kernel, kernel_s = timed(ps.performance_scores, df)
+
+        apply_s = np.nan
+        if len(df) <= args.max_apply_rows:
+            expected, apply_s = timed(apply_scores, df)
+            pd.testing.assert_frame_equal(kernel, expected)
+
+        rows.append({
+            "scale": scale,
+            "rows": len(df),
+            "apply_s": apply_s,
+            "kernel_s": kernel_s,
+            "speedup": apply_s / kernel_s,
+            "kernel_rows_per_s": len(df) / kernel_s,
+        })
+        print(f"scale {scale}: {len(df)} rows done", flush=True)
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Benchmark suite over the data_scripts hot paths and the feature builders, at several data scales.
+
+Every scale but "real" (basketballPlayoffs) is synthetic data from data_scripts._synthetic,
+generated once into benchmarks/.data. Each benchmark reports the median wall time of --repeat
+runs, the peak traced memory of one extra run and rows per second. Results are appended to
+benchmarks/results/history.json and compared against benchmarks/results/baseline.json: a
+benchmark regresses when its time or peak memory grows by more than --tolerance.
+Figures are switched off for the whole run.
+
+    python benchmarks/run_benchmarks.py --scales real small medium
+    python benchmarks/run_benchmarks.py --scales large --only lag ingest --repeat 1
+    python benchmarks/run_benchmarks.py --save-baseline          # accept the current numbers
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from data_scripts import _career_index as ci
+from data_scripts import _figures as fg
+from data_scripts import _ingest as ig
+from data_scripts import _lag_features as lf
+from data_scripts import _perf_scores as ps
+from data_scripts import _playoffs as po
+from data_scripts import _season as ss
+from data_scripts import _sql_store as sq
+from data_scripts import _store_data as sd
+from data_scripts import _synthetic as sy
+from data_scripts import _topk as tk
+from data_scripts import awards_players_data as apd
+from data_scripts import coaches_data as cd
+from data_scripts import players_teams_data as ptd
+from data_scripts import teams_data as td
+
+ROOT = Path(__file__).resolve().parent
+DATA_DIR = ROOT / ".data"
+RESULTS_DIR = ROOT / "results"
+REAL_DATA = ROOT.parent / "basketballPlayoffs"
+
+# Arguments of _synthetic.generate for every synthetic scale.
+SCALES = {
+    "small": {"seasons": 20, "leagues": 2, "teams": 14, "roster": 13},
+    "medium": {"seasons": 50, "leagues": 5, "teams": 20, "roster": 13},
+    "large": {"seasons": 100, "leagues": 10, "teams": 40, "roster": 13},
+}
+# Differences below this many seconds are never flagged, whatever the relative change.
+MIN_SECONDS = 0.005
+# Score columns (backtest configurations) of the top-K metrics benchmark.
+TOPK_CONFIGS = 100
+# Brackets played by the playoff simulation benchmark.
+PLAYOFF_SIMS = 1_000_000
+# Seasons drawn by the regular-season simulation benchmark.
+SEASON_SIMS = 100_000
+# Players or coaches every query of the SQLite / pandas join benchmarks is restricted to.
+QUERY_IDS = 10
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, table: str):
+    """
+    Registers a benchmark. The decorated function gets the source tables, prepares the state the
+    code under test reads and returns the callable to time; `table` is the table counted for rows/s.
+    """
+    def register(setup):
+        BENCHMARKS[name] = {"setup": setup, "table": table}
+        return setup
+    return register
+
+
+def _use_tables(tables: dict):
+    """Points the module level frames of _store_data at fresh copies of `tables`."""
+    for name, df in tables.items():
+        setattr(sd, f"{name}_df", df.copy())
+
+
+@benchmark("store_data.load_data", "players_teams")
+def _load_data(tables, parquet_dir):
+    return lambda: sd.load_data(parquet_dir)
+
+
+@benchmark("teams_data.fix_missing_values", "teams")
+def _fix_missing_values(tables, parquet_dir):
+    def run():
+        sd.teams_df = tables["teams"].copy()
+        td.fix_missing_values()
+    _use_tables(tables)
+    return run
+
+
+@benchmark("perf_scores.performance_scores", "players_teams")
+def _performance_scores(tables, parquet_dir):
+    return lambda: ps.performance_scores(tables["players_teams"])
+
+
+@benchmark("players_teams_data.player_teammates_corr", "players_teams")
+def _player_teammates_corr(tables, parquet_dir):
+    _use_tables(tables)
+    return lambda: ptd.player_teammates_corr(plot=False)
+
+
+@benchmark("awards_players_data.award_correlation_tables", "players_teams")
+def _award_correlation_tables(tables, parquet_dir):
+    _use_tables(tables)
+
+    def run():
+        apd.load_dataset()
+        apd.award_correlation_tables()
+    return run
+
+
+@benchmark("coaches_data.turnover_years_table", "coaches")
+def _turnover_years_table(tables, parquet_dir):
+    _use_tables(tables)
+    return cd.turnover_years_table
+
+
+@benchmark("career_index.CareerIndex", "players_teams")
+def _career_index(tables, parquet_dir):
+    return lambda: ci.CareerIndex(tables["players_teams"])
+
+
+@benchmark("lag_features.lag_features", "players_teams")
+def _lag_features(tables, parquet_dir):
+    df = tables["players_teams"].assign(**ps.performance_scores(tables["players_teams"]))
+    return lambda: lf.lag_features(df, ["Performance", "OffPerformance", "DefPerformance"])
+
+
+@benchmark("lag_features.weighted_history", "players_teams")
+def _weighted_history(tables, parquet_dir):
+    df = tables["players_teams"].assign(**ps.performance_scores(tables["players_teams"]))
+    return lambda: lf.weighted_history(df, ["Performance", "OffPerformance", "DefPerformance"],
+                                       (0.5, 0.25, 0.15, 0.10), entity="playerID")
+
+
+@benchmark("ingest.teams_ranking_features", "players_teams")
+def _teams_ranking_features(tables, parquet_dir):
+    def run():
+        with tempfile.TemporaryDirectory() as store:
+            ig.ingest_tables({name: tables[name] for name in ig.TABLE_KEYS}, store)
+    return run
+
+
+@benchmark("topk.topk_metrics", "players_teams")
+def _topk_metrics(tables, parquet_dir):
+    years = tables["players_teams"]["year"].to_numpy()
+    rng = np.random.default_rng(0)
+    scores = rng.random((len(years), TOPK_CONFIGS))
+    actual = rng.random(len(years)) < 0.05
+
+    def run():
+        tk.topk_metrics(scores, actual, years)
+        tk.winner_ranks(scores, actual, years)
+    return run
+
+
+@benchmark("playoffs.simulate_bracket", "teams")
+def _simulate_bracket(tables, parquet_dir):
+    teams = tables["teams"]
+    season = teams[(teams["year"] == teams["year"].max()) & (teams["lgID"] == teams["lgID"].iloc[0])]
+    strength = (season["won"] / (season["won"] + season["lost"])).to_numpy()
+    conf, seeds = season["confID"].to_numpy(), season["rank"].to_numpy()
+
+    def run():
+        po.simulate_bracket(strength, conf, seeds, PLAYOFF_SIMS)
+    return run
+
+
+@benchmark("season.simulate_season", "teams")
+def _simulate_season(tables, parquet_dir):
+    teams = tables["teams"]
+    season = teams[(teams["year"] == teams["year"].max()) & (teams["lgID"] == teams["lgID"].iloc[0])]
+    win_prob = (season["won"] / (season["won"] + season["lost"])).to_numpy()
+    conf = season["confID"].to_numpy()
+
+    def run():
+        ss.simulate_season(win_prob, conf, n_sims=SEASON_SIMS)
+    return run
+
+
+def _query_filters(tables):
+    return {name: {key: list(tables[left][key].drop_duplicates().iloc[:QUERY_IDS].astype(str))}
+            for name, (_, left, key) in sq.NAMED_QUERIES.items()}
+
+
+@benchmark("sql_store.indexed_queries", "players_teams")
+def _sql_queries(tables, parquet_dir):
+    path = sq.build_database(tables, parquet_dir.parent / "basketball.sqlite")
+    filters = _query_filters(tables)
+
+    def run():
+        for name, (query, _, _) in sq.NAMED_QUERIES.items():
+            query(path=path, **filters[name])
+    return run
+
+
+@benchmark("sql_store.pandas_merges", "players_teams")
+def _pandas_queries(tables, parquet_dir):
+    filters = _query_filters(tables)
+
+    def run():
+        for name in sq.NAMED_QUERIES:
+            sq.pandas_query(name, tables, **filters[name])
+    return run
+
+
+def scale_data(scale: str, seed: int = 0):
+    """The directory with the CSVs of `scale` (generated on first use) and the one with their Parquet snapshot."""
+    if scale == "real":
+        source, out = REAL_DATA, DATA_DIR / "real"
+    else:
+        params = SCALES[scale]
+        source = out = DATA_DIR / f"{scale}-{'-'.join(str(v) for v in params.values())}-seed{seed}"
+        if not (out / "players_teams.csv").exists():
+            print(f"Generating {scale} data into {out} ...")
+            sy.generate(out, seed=seed, **params)
+
+    parquet_dir = out / "parquet"
+    if not parquet_dir.exists():
+        sd.read_and_store_data(source)
+        sd.save_data(parquet_dir)
+    return source, parquet_dir
+
+
+def measure(run, repeat: int) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": statistics.median(times), "peak_mb": peak / 2**20}
+
+
+def run_suite(scales: list, only: list = None, repeat: int = 3, seed: int = 0) -> pd.DataFrame:
+    results = []
+    with fg.figures_off():
+        for scale in scales:
+            source, parquet_dir = scale_data(scale, seed)
+            sd.read_and_store_data(source)
+            tables = {name: getattr(sd, f"{name}_df").copy() for name in sd.TABLES}
+
+            for name, spec in BENCHMARKS.items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                run = spec["setup"](tables, parquet_dir)
+                result = measure(run, repeat)
+                rows = len(tables[spec["table"]])
+                results.append({"scale": scale, "benchmark": name, "rows": rows, **result,
+                                "rows_per_s": rows / result["seconds"] if result["seconds"] else float("inf")})
+                print(f"  {scale:>6}  {name:<46} {result['seconds'] * 1000:10.2f} ms  {result['peak_mb']:8.1f} MB")
+    return pd.DataFrame(results)
+
+
+def compare(results: pd.DataFrame, baseline: dict, tolerance: float) -> pd.DataFrame:
+    """Adds the baseline time and memory of every benchmark and flags the regressions."""
+    keys = results["scale"] + "/" + results["benchmark"]
+    base = pd.DataFrame([baseline.get(key, {}) for key in keys], index=results.index,
+                        columns=["seconds", "peak_mb"]).astype(float)
+    results = results.assign(baseline_s=base["seconds"], baseline_mb=base["peak_mb"])
+    results["time_change"] = results["seconds"] / results["baseline_s"] - 1
+    results["memory_change"] = results["peak_mb"] / results["baseline_mb"] - 1
+    slower = (results["time_change"] > tolerance) & (results["seconds"] - results["baseline_s"] > MIN_SECONDS)
+    bigger = results["memory_change"] > tolerance
+    results["regression"] = slower | bigger
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", default=["real", "small", "medium"], choices=["real", *SCALES])
+    parser.add_argument("--only", nargs="+", help="run only the benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth of time and memory")
+    parser.add_argument("--history", type=Path, default=RESULTS_DIR / "history.json")
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.only, args.repeat, args.seed)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results = compare(results, baseline, args.tolerance)
+
+    pd.set_option("display.width", 200)
+    print()
+    print(results[["scale", "benchmark", "rows", "seconds", "peak_mb", "rows_per_s", "time_change",
+                   "memory_change", "regression"]].round(4).to_string(index=False))
+
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    history = json.loads(args.history.read_text()) if args.history.exists() else []
+    history.append({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": results.drop(columns=["baseline_s", "baseline_mb"]).astype(object)
+                          .where(results.notna(), None).to_dict(orient="records"),
+    })
+    args.history.write_text(json.dumps(history, indent=1))
+
+    if args.save_baseline:
+        baseline.update({f"{row.scale}/{row.benchmark}": {"seconds": row.seconds, "peak_mb": row.peak_mb}
+                         for row in results.itertuples()})
+        args.baseline.write_text(json.dumps(baseline, indent=1, sort_keys=True))
+        print(f"\nBaseline saved to {args.baseline}")
+
+    regressions = results[results["regression"]]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for row in regressions.itertuples():
+            print(f"  {row.scale}/{row.benchmark}: {row.time_change:+.0%} time, {row.memory_change:+.0%} memory")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Load test of the prediction service in data_scripts._service: p50/p99 latency and throughput
+of single queries and of batches, from several concurrent clients with keep-alive connections.
+
+    python benchmarks/service_load_test.py --requests 2000 --clients 8 --batch 1 32
+    python benchmarks/service_load_test.py --url http://127.0.0.1:8765   # against a running service
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from data_scripts import _service as svc
+
+
+def query_mix(service_teams: list, years: list, n: int, seed: int = 0) -> list:
+    """Random top-k, team rank and coach change risk queries over `years`."""
+    rng = np.random.default_rng(seed)
+    award_names = [name for name in svc.SERVICE_MODELS if name not in ("teams", "coach_turnover")]
+    queries = []
+    for kind in rng.choice(["top_k", "team_rank", "coach_change_risk"], size=n, p=[0.6, 0.2, 0.2]):
+        year = int(rng.choice(years))
+        if kind == "top_k":
+            queries.append({"type": "top_k", "dataset": str(rng.choice(award_names)), "year": year,
+                            "k": int(rng.integers(1, 11))})
+        else:
+            queries.append({"type": str(kind), "team": str(rng.choice(service_teams)), "year": year})
+    return queries
+
+
+def run_client(url, payloads: list) -> list:
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    latencies = []
+    for payload in payloads:
+        body = json.dumps(payload)
+        start = time.perf_counter()
+        conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    conn.close()
+    return latencies
+
+
+def load_test(url: str, queries: list, clients: int, batch: int) -> dict:
+    payloads = [queries[i:i + batch] if batch > 1 else queries[i] for i in range(0, len(queries), batch)]
+    chunks = [payloads[i::clients] for i in range(clients)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.concatenate([np.array(lat) for lat in pool.map(lambda chunk: run_client(url, chunk), chunks)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "batch": batch,
+        "requests": len(payloads),
+        "queries": len(queries),
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p99_ms": np.percentile(latencies, 99) * 1000,
+        "mean_ms": latencies.mean() * 1000,
+        "queries_per_s": len(queries) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL of a running service; by default one is started in this process")
+    parser.add_argument("--years", type=int, nargs="+", default=[10, 11])
+    parser.add_argument("--requests", type=int, default=2000, help="queries per batch size")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 32])
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        start = time.perf_counter()
+        service = svc.PredictionService(years=args.years)
+        print(f"Service ready in {time.perf_counter() - start:.1f}s")
+        server = svc.serve(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    teams = ["ATL", "CHI", "CON", "IND", "LAS", "MIN", "NYL", "PHO", "SAS", "SEA", "WAS"]
+    queries = query_mix(teams, args.years, args.requests)
+    results = pd.DataFrame([load_test(url, queries, args.clients, batch) for batch in args.batch])
+    print(results.round(3).to_string(index=False))
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
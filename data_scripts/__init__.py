@@ -0,0 +1,6 @@
+import os
+
+if os.environ.get("DATA_SCRIPTS_PROFILE"):
+    from data_scripts import _profiling
+
+    _profiling.enable_from_env()
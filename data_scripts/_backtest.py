@@ -0,0 +1,322 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+from sklearn.metrics import accuracy_score, mean_absolute_error, roc_auc_score
+from sklearn.preprocessing import label_binarize
+
+from data_scripts import _model_cache as mc
+from data_scripts import _models as md
+from data_scripts import _topk as tk
+from data_scripts import _warm_start as ws
+
+# Columns of the shared matrix in front of the features: year, target and group (NaN when the dataset has none).
+_YEAR, _TARGET, _GROUP, _FIRST_FEATURE = 0, 1, 2, 3
+TRAIN_YEARS = 4
+TOP_K = (3, 5, 8)
+
+# Memory-mapped matrices opened by this process, by path.
+_shared = {}
+
+
+def load_dataset(name: str, data_dir: Path = None) -> pd.DataFrame:
+    """Reads a prediction dataset in the row order its notebook trains on."""
+    spec = md.DATASETS[name]
+    if spec["kind"] == "rank":
+        return md.load_team_history(data_dir)
+    df = pd.read_csv(Path(data_dir or md.PREDICT_DIR) / spec["file"])
+    if spec["kind"] == "turnover":
+        df = df.sort_values(["tmID", "year"])
+    return df.reset_index(drop=True)
+
+
+def backtest_grid(datasets: list = None, years=range(7, 11), models: list = None) -> list:
+    """Every (dataset, test year, model) job; `models` restricts the models of each dataset's kind."""
+    jobs = []
+    for name in datasets or md.DATASETS:
+        for year in years:
+            for model in md.model_names(md.DATASETS[name]["kind"]):
+                if models is None or model in models:
+                    jobs.append((name, int(year), model))
+    return jobs
+
+
+def dataset_matrix(name: str, df: pd.DataFrame) -> np.ndarray:
+    """The float matrix split_window works on: year, target, group, then the features of `name`."""
+    spec = md.DATASETS[name]
+    matrix = np.empty((len(df), _FIRST_FEATURE + len(spec["features"])), dtype=np.float64)
+    matrix[:, _YEAR] = df["year"].to_numpy(dtype=np.float64)
+    matrix[:, _TARGET] = df[spec["target"]].to_numpy(dtype=np.float64)
+    matrix[:, _GROUP] = df[spec["group"]].to_numpy(dtype=np.float64) if "group" in spec else np.nan
+    matrix[:, _FIRST_FEATURE:] = df[spec["features"]].to_numpy(dtype=np.float64)
+    return matrix
+
+
+def _write_shared(name: str, df: pd.DataFrame, out_dir: Path) -> str:
+    path = out_dir / f"{name}.npy"
+    np.save(path, dataset_matrix(name, df))
+    return str(path)
+
+
+def _open_shared(path: str) -> np.ndarray:
+    matrix = _shared.get(path)
+    if matrix is None:
+        matrix = _shared[path] = np.load(path, mmap_mode="r")
+    return matrix
+
+
+def split_window(matrix: np.ndarray, kind: str, year: int):
+    """
+    Train rows of the TRAIN_YEARS seasons before `year` and test rows of `year`, prepared the same
+    way the notebook of `kind` does. Returns X_train, y_train, X_test, the test row positions and
+    the extra arguments of md.build_models.
+    """
+    years = matrix[:, _YEAR]
+    train = (years >= year - TRAIN_YEARS) & (years < year)
+    test_rows = np.flatnonzero(years == year)
+
+    X = matrix[:, _FIRST_FEATURE:]
+    y = matrix[:, _TARGET]
+    kwargs = {}
+
+    if kind == "turnover":
+        X_train, y_train = np.array(X[train]), y[train]
+        medians = np.nanmedian(X_train, axis=0)
+        X_test = np.array(X[test_rows])
+        X_train = np.where(np.isnan(X_train), medians, X_train)
+        X_test = np.where(np.isnan(X_test), medians, X_test)
+        pos = y_train.sum()
+        kwargs["scale_pos_weight"] = (len(y_train) - pos) / pos
+    else:
+        train &= _complete(matrix)
+        train_rows = np.flatnonzero(train)
+        if kind == "rank":
+            # The notebook trains on the rows sorted by (year, confID).
+            train_rows = train_rows[np.lexsort((matrix[train_rows, _GROUP], years[train_rows]))]
+        X_train, y_train = X[train_rows], y[train_rows]
+        X_test = np.array(X[test_rows])
+        if kind == "rank":
+            X_test = np.where(np.isnan(X_test), X_train.mean(axis=0), X_test)
+
+    return X_train, y_train, X_test, test_rows, kwargs
+
+
+def _complete(matrix: np.ndarray) -> np.ndarray:
+    return ~np.isnan(matrix[:, _FIRST_FEATURE:]).any(axis=1) & ~np.isnan(matrix[:, _TARGET])
+
+
+def predict_scores(model, kind: str, X_test) -> np.ndarray:
+    scores = model.predict(X_test) if kind == "rank" else model.predict_proba(X_test)[:, 1]
+    return np.asarray(scores, dtype=np.float64).ravel()
+
+
+def _fit_job(path: str, name: str, year: int, model_name: str, threads: int, cache: bool = True):
+    """
+    Fits one model for test year `year` and scores its rows.
+    Returns the positions of the test rows, their scores, the fit time and whether the model came from the cache.
+    """
+    kind = md.DATASETS[name]["kind"]
+    X_train, y_train, X_test, test_rows, kwargs = split_window(_open_shared(path), kind, year)
+    if len(y_train) == 0 or len(test_rows) == 0:
+        return test_rows, np.full(len(test_rows), np.nan), 0.0, False
+
+    model = md.build_models(kind, threads, dataset=name, **kwargs)[model_name]
+    hits = mc.stats["hits"]
+    start = time.perf_counter()
+    if cache:
+        model = mc.fit_cached(model, X_train, y_train)
+    else:
+        model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    return test_rows, predict_scores(model, kind, X_test), fit_seconds, mc.stats["hits"] > hits
+
+
+def _fit_chain(path: str, name: str, years: list, model_name: str, threads: int, warm_rounds):
+    """
+    Fits one model for consecutive test years, each window starting from the model of the previous
+    one (see _warm_start). Ridge keeps the window as sufficient statistics and is updated exactly.
+    Returns one _fit_job style result per year.
+    """
+    kind = md.DATASETS[name]["kind"]
+    matrix = _open_shared(path)
+    complete = _complete(matrix)
+    previous, ridge, window, results = None, None, set(), []
+
+    for year in years:
+        X_train, y_train, X_test, test_rows, kwargs = split_window(matrix, kind, year)
+        if len(y_train) == 0 or len(test_rows) == 0:
+            results.append((test_rows, np.full(len(test_rows), np.nan), 0.0, False))
+            previous = None
+            continue
+
+        model = md.build_models(kind, threads, dataset=name, **kwargs)[model_name]
+        start = time.perf_counter()
+        if isinstance(model, Ridge) and kind != "turnover":
+            ridge = ridge or ws.RidgeWindow(model.alpha)
+            new_window = set(range(year - TRAIN_YEARS, year))
+            for season in window - new_window:
+                rows = complete & (matrix[:, _YEAR] == season)
+                ridge.remove(matrix[rows, _FIRST_FEATURE:], matrix[rows, _TARGET])
+            for season in new_window - window:
+                rows = complete & (matrix[:, _YEAR] == season)
+                ridge.add(matrix[rows, _FIRST_FEATURE:], matrix[rows, _TARGET])
+            window = new_window
+            model = ridge.model()
+        else:
+            model = ws.continue_fit(model, previous, X_train, y_train, warm_rounds)
+        fit_seconds = time.perf_counter() - start
+
+        results.append((test_rows, predict_scores(model, kind, X_test), fit_seconds, False))
+        previous = model
+    return results
+
+
+def _award_metrics(test: pd.DataFrame, spec: dict) -> dict:
+    prob = test["score"]
+    actual = test[spec["target"]].to_numpy()
+    winners = np.flatnonzero(actual == 1)
+    winner = winners[0] if len(winners) else None
+    return {
+        "top_pred_prob": prob.max(),
+        "actual_prob": prob.iloc[winner] if winner is not None else np.nan,
+        "actual_rank": tk.winner_ranks(prob.to_numpy(), actual)["rank"].iloc[0],
+        "avg_probability": prob.mean(),
+        "num_zero_prob": int((prob <= 1e-6).sum()),
+        "num_unique_probs": len(np.unique(np.round(prob, 6))),
+        "num_analyzed": len(test),
+    }
+
+
+def _turnover_metrics(test: pd.DataFrame, spec: dict) -> dict:
+    table = tk.topk_metrics(test["score"].to_numpy(), test[spec["target"]].to_numpy(), k_values=TOP_K)
+    metrics = {}
+    for row in table.to_dict(orient="records"):
+        for metric in ("Recall", "Precision", "Lift"):
+            metrics[f"{metric}@{row['K']}"] = row[f"{metric}@K"]
+    return metrics
+
+
+def _rank_metrics(test: pd.DataFrame, spec: dict) -> dict:
+    predicted = test.groupby(spec["group"])["score"].rank(method="first", ascending=True).astype(int)
+    rows = []
+    for _, conf in test.assign(predicted=predicted).groupby(spec["group"]):
+        actual, pred = conf[spec["target"]].to_numpy(), conf["predicted"].to_numpy()
+        try:
+            classes = np.unique(np.concatenate([actual, pred]))
+            actual_bin = label_binarize(actual, classes=classes)
+            pred_bin = label_binarize(pred, classes=classes)
+            auc = 0.5 if actual_bin.shape[1] == 1 else roc_auc_score(actual_bin, pred_bin, average="macro", multi_class="ovr")
+        except ValueError:
+            auc = 0.0
+        rows.append({"MAE": mean_absolute_error(actual, pred), "Accuracy": accuracy_score(actual, pred), "AUC": auc})
+    # Averaged over the conferences, like evaluate_predictions.
+    return pd.DataFrame(rows).mean().to_dict()
+
+
+_METRICS = {"award": _award_metrics, "turnover": _turnover_metrics, "rank": _rank_metrics}
+
+
+def run_backtest(jobs: list, n_jobs: int = None, data_dir: Path = None, return_predictions: bool = False,
+                 cache: bool = True, warm_start: bool = False, warm_rounds=ws.WARM_ROUNDS):
+    """
+    Runs a grid of (dataset, test year, model) jobs (see backtest_grid) on a process pool of `n_jobs` workers.
+
+    Every dataset is written once as a float matrix and memory-mapped by the workers, so only
+    row positions and scores cross the process boundary. Models get cpu_count // n_jobs threads each.
+    With `cache`, fitted models are reused from _model_cache when the same job already ran.
+    With `warm_start`, the years of every (dataset, model) run in order in one worker, each window
+    continuing from the previous one (see _fit_chain); the cache is not used then.
+    Returns a tidy frame with one row per dataset, year, model and metric (fit_seconds and cache_hit
+    included), and also the per-row scores when `return_predictions`.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    frames = {name: load_dataset(name, data_dir) for name in dict.fromkeys(name for name, _, _ in jobs)}
+
+    with tempfile.TemporaryDirectory(prefix="backtest_") as tmp:
+        paths = {name: _write_shared(name, df, Path(tmp)) for name, df in frames.items()}
+        if warm_start:
+            chains = {}
+            for name, year, model in jobs:
+                chains.setdefault((name, model), []).append(year)
+            tasks = [(_fit_chain, (paths[name], name, sorted(years), model, threads, warm_rounds))
+                     for (name, model), years in chains.items()]
+        else:
+            tasks = [(_fit_job, (paths[name], name, year, model, threads, cache))
+                     for name, year, model in jobs]
+
+        if n_jobs == 1:
+            outputs = [func(*arg) for func, arg in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [pool.submit(func, *arg) for func, arg in tasks]
+                outputs = [future.result() for future in futures]
+        _shared.clear()
+
+    if warm_start:
+        by_job = {}
+        for ((name, model), years), chain in zip(chains.items(), outputs):
+            by_job.update({(name, year, model): result for year, result in zip(sorted(years), chain)})
+        results = [by_job[job] for job in jobs]
+    else:
+        results = outputs
+
+    metric_rows, predictions = [], []
+    for (name, year, model), (test_rows, scores, fit_seconds, cache_hit) in zip(jobs, results):
+        spec = md.DATASETS[name]
+        test = frames[name].iloc[test_rows].assign(score=scores)
+        # Years without training rows have no scores and only report the fit time.
+        metrics = _METRICS[spec["kind"]](test, spec) if len(test) and not np.isnan(scores).all() else {}
+        metrics["fit_seconds"] = fit_seconds
+        metrics["cache_hit"] = cache_hit
+        metric_rows += [{"dataset": name, "year": year, "model": model, "metric": metric, "value": float(value)}
+                        for metric, value in metrics.items()]
+        if return_predictions:
+            predictions.append(pd.DataFrame({
+                "dataset": name, "year": year, "model": model,
+                "id": test[spec["id"]].to_numpy(), "actual": test[spec["target"]].to_numpy(), "score": scores,
+            }))
+
+    metrics_df = pd.DataFrame(metric_rows, columns=["dataset", "year", "model", "metric", "value"])
+    if return_predictions:
+        return metrics_df, pd.concat(predictions, ignore_index=True) if predictions else pd.DataFrame()
+    return metrics_df
+
+
+def topk_report(predictions: pd.DataFrame, k_values=TOP_K, hits=(1, 3)):
+    """
+    Top-K metrics and winner ranks of the predictions of run_backtest (return_predictions=True),
+    for every dataset, year and model in one pass. Returns the top-K table (one row per dataset,
+    year, model and K) and the hit@k / MRR summary over the years (one row per dataset and model).
+    """
+    keys = predictions[["dataset", "year", "model"]]
+    topk = tk.topk_metrics(predictions["score"], predictions["actual"], keys, k_values).drop(columns="Model")
+    ranks = tk.winner_ranks(predictions["score"], predictions["actual"], keys).drop(columns="Model")
+    return topk, tk.rank_summary(ranks, hits, by=["dataset", "model"])
+
+
+def warm_start_report(datasets: list = None, years=range(7, 11), n_jobs: int = None,
+                      warm_rounds=ws.WARM_ROUNDS) -> pd.DataFrame:
+    """
+    Runs the same grid with full retraining and with warm-started windows and compares them:
+    one row per dataset, model and metric with the mean over `years` of both modes
+    (fit_seconds is summed instead).
+    """
+    jobs = backtest_grid(datasets, years)
+    runs = pd.concat([
+        run_backtest(jobs, n_jobs, cache=False).assign(mode="full"),
+        run_backtest(jobs, n_jobs, warm_start=True, warm_rounds=warm_rounds).assign(mode="warm"),
+    ])
+    runs = runs[runs["metric"] != "cache_hit"]
+
+    keys = ["dataset", "model", "metric", "mode"]
+    summary = runs.groupby(keys, sort=False)["value"].mean()
+    seconds = runs[runs["metric"] == "fit_seconds"].groupby(keys, sort=False)["value"].sum()
+    summary.loc[seconds.index] = seconds
+    return summary.unstack("mode").reset_index().rename_axis(columns=None)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+class CareerIndex:
+    """
+    Hash/array index over a players_teams shaped frame, built once in O(n log n).
+
+    Every (playerID, year) pair is packed into a single integer key and the rows are kept
+    sorted by that key, so "did this player play in year Y", "which rows are her stints in
+    year Y" and "which rows are her previous season" become vectorized binary searches
+    instead of scans over the whole frame.
+    """
+
+    def __init__(self, players_teams_df: pd.DataFrame):
+        self.df = players_teams_df
+        codes, uniques = pd.factorize(np.asarray(players_teams_df['playerID'], dtype=object), sort=True)
+        years = players_teams_df['year'].to_numpy(dtype=np.int64)
+
+        self.players = pd.Index(uniques)
+        self._codes = codes
+        self._years = years
+        # One spare slot on each side so that year - 1 of the first season still packs into a valid key.
+        self._year0 = int(years.min()) - 1 if len(years) else 0
+        self._span = int(years.max()) - self._year0 + 2 if len(years) else 2
+
+        keys = codes.astype(np.int64) * self._span + (years - self._year0)
+        self._order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self._order]
+
+        self.first_season = pd.Series(years, name='year').groupby(codes).min()
+        self.first_season.index = self.players[self.first_season.index]
+        self.first_season.index.name = 'playerID'
+
+        season_keys = np.unique(self._sorted_keys)
+        self.seasons_played = pd.Series(np.bincount(season_keys // self._span, minlength=len(self.players)),
+                                        index=self.players, name='seasons')
+        self.seasons_played.index.name = 'playerID'
+
+    def _keys(self, player_ids, years):
+        codes = self.players.get_indexer(np.asarray(player_ids, dtype=object))
+        offsets = np.asarray(years, dtype=np.int64) - self._year0
+        valid = (codes >= 0) & (offsets >= 0) & (offsets < self._span)
+        return np.where(valid, codes.astype(np.int64) * self._span + offsets, -1), valid
+
+    def played_in(self, player_ids, years) -> np.ndarray:
+        """Boolean array: True where the player has at least one row in the given year."""
+        keys, valid = self._keys(player_ids, years)
+        if len(self._sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self._sorted_keys, keys), len(self._sorted_keys) - 1)
+        return valid & (self._sorted_keys[pos] == keys)
+
+    def stint_rows(self, player_ids, years):
+        """
+        Returns (query, row) position arrays: for every query i, one pair per stint of
+        player_ids[i] in years[i], with `row` a position into the indexed frame.
+        """
+        return self._rows_for_keys(*self._keys(player_ids, years))
+
+    def _rows_for_keys(self, keys, valid):
+        left = np.searchsorted(self._sorted_keys, keys, side='left')
+        right = np.searchsorted(self._sorted_keys, keys, side='right')
+        counts = np.where(valid, right - left, 0)
+
+        query = np.repeat(np.arange(len(keys)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = self._order[np.repeat(left, counts) + within]
+        return query, rows
+
+    def stints(self, player_id, year) -> pd.DataFrame:
+        _, rows = self.stint_rows([player_id], [year])
+        return self.df.iloc[rows]
+
+    def previous_season_rows(self):
+        """(row, prev_row) position pairs linking every row to each stint of the same player one year earlier."""
+        offsets = self._years - 1 - self._year0
+        return self._rows_for_keys(self._codes.astype(np.int64) * self._span + offsets, offsets >= 0)
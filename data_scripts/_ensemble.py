@@ -0,0 +1,169 @@
+"""
+Fitting of several models on the same rows and rank aggregation of their scores.
+
+fit_models trains the members of an ensemble concurrently on a thread pool. XGBoost, LightGBM,
+CatBoost and the scikit-learn forests release the GIL while they fit, so the members overlap
+instead of running one after another. Every member gets its own thread count (see thread_counts)
+so that together they use the available cores without oversubscribing them.
+
+score_matrix stacks the member scores as one (models, rows) array, and rank_matrix ranks every
+row of it at once, optionally within groups such as (year, confID).
+"""
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from data_scripts import _model_cache as mc
+
+# Parameters holding the number of threads of a model, by library.
+THREAD_PARAMS = ("n_jobs", "thread_count", "nthread")
+# Models that fit on one core whatever their n_jobs (it only parallelises one-vs-rest fits).
+SINGLE_THREADED = (LogisticRegression,)
+
+
+def _thread_params(model) -> list:
+    """Names of the thread parameters of `model`, those of its Pipeline steps included."""
+    steps = model.steps if isinstance(model, Pipeline) else [(None, model)]
+    names = []
+    for step, estimator in steps:
+        if isinstance(estimator, SINGLE_THREADED):
+            continue
+        # CatBoost leaves the parameters still at their default out of get_params.
+        params = [*estimator.get_params(deep=False), *inspect.signature(type(estimator)).parameters]
+        names += [f"{step}__{name}" if step else name for name in dict.fromkeys(params) if name in THREAD_PARAMS]
+    return names
+
+
+def thread_counts(models: dict, threads: int = None) -> dict:
+    """
+    Threads per model when all of `models` fit at the same time on `threads` cores (all of them
+    by default). Models without a thread parameter run on one core; the other cores are split
+    evenly over the multi-threaded ones, the first models getting the remainder.
+    """
+    threads = threads or os.cpu_count() or 1
+    parallel = [name for name, model in models.items() if _thread_params(model)]
+    spare = max(threads - (len(models) - len(parallel)), len(parallel))
+    counts = {name: 1 for name in models}
+    for i, name in enumerate(parallel):
+        counts[name] = max(1, spare // len(parallel) + (i < spare % len(parallel)))
+    return counts
+
+
+def set_threads(model, threads: int):
+    for name in _thread_params(model):
+        model.set_params(**{name: threads})
+    return model
+
+
+def _fit(model, X, y, cache: bool):
+    return mc.fit_cached(model, X, y) if cache else model.fit(X, y)
+
+
+def fit_models(models: dict, X, y, threads=None, cache: bool = False) -> dict:
+    """
+    Fits every model of `models` on X, y concurrently and returns them fitted, in the same order.
+    `threads` is the total number of cores (see thread_counts) or a dict of threads per model.
+    With `cache`, models are loaded from / stored in _model_cache.
+    """
+    counts = threads if isinstance(threads, dict) else thread_counts(models, threads)
+    for name, model in models.items():
+        if name in counts:
+            set_threads(model, counts[name])
+
+    if len(models) <= 1:
+        return {name: _fit(model, X, y, cache) for name, model in models.items()}
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        futures = {name: pool.submit(_fit, model, X, y, cache) for name, model in models.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def predict_scores(model, X) -> np.ndarray:
+    """Probability of the positive class for classifiers, the prediction otherwise."""
+    scores = model.predict_proba(X)[:, 1] if hasattr(model, "predict_proba") else model.predict(X)
+    return np.asarray(scores, dtype=np.float64).ravel()
+
+
+def score_matrix(models: dict, X) -> np.ndarray:
+    """The scores of every model on X, one row per model."""
+    return np.vstack([predict_scores(model, X) for model in models.values()])
+
+
+def group_codes(groups, n: int) -> np.ndarray:
+    """Integer code of every one of `n` columns for their group labels; all zeros without groups."""
+    if groups is None:
+        return np.zeros(n, dtype=np.int32)
+    return pd.factorize(np.asarray(groups))[0].astype(np.int32)
+
+
+def sort_within_groups(keys: np.ndarray, codes: np.ndarray, stable: bool = False) -> np.ndarray:
+    """
+    Column order of every row of `keys` sorting it by group code, then ascending within the group
+    (NaN last). With `stable`, ties keep their column order.
+
+    The codes are the same for every row, so the columns are put in group order once and every
+    group is sorted as one block; the slower stable sort only runs on blocks that have ties.
+    """
+    columns = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[columns])) + 1
+    order = np.empty(keys.shape, dtype=np.intp)
+    for start, end in zip([0, *bounds], [*bounds, len(columns)]):
+        group = columns[start:end]
+        block = keys[:, group]
+        local = np.argsort(block, axis=1)
+        if stable:
+            sorted_block = np.take_along_axis(block, local, axis=1)
+            ties = (sorted_block[:, 1:] == sorted_block[:, :-1]).any() or (np.isnan(block).sum(axis=1) > 1).any()
+            if ties:
+                local = np.argsort(block, axis=1, kind="stable")
+        order[:, start:end] = group[local]
+    return order
+
+
+def rank_matrix(scores: np.ndarray, ascending: bool = False, groups=None, method: str = "average") -> np.ndarray:
+    """
+    Ranks (from 1) of every row of `scores`, like pandas' rank along each row; within `groups`
+    (one label per column) when given, like a groupby rank. `method` is "average" (ties share
+    their mean rank), "dense" (ties share a rank, no gaps after them) or "first" (ties ranked in
+    column order). NaN scores get a NaN rank.
+    """
+    scores = np.atleast_2d(np.asarray(scores, dtype=np.float64))
+    keys = scores if ascending else -scores
+    n = keys.shape[1]
+    codes = group_codes(groups, n)
+
+    order = sort_within_groups(keys, codes, stable=method == "first")
+    sorted_keys = np.take_along_axis(keys, order, axis=1)
+    sorted_codes = codes[order]
+    group_start = np.concatenate([[0], np.cumsum(np.bincount(codes))])[sorted_codes]
+
+    positions = np.broadcast_to(np.arange(n), keys.shape)
+    new_run = np.ones(keys.shape, dtype=bool)
+    new_run[:, 1:] = (sorted_keys[:, 1:] != sorted_keys[:, :-1]) | (sorted_codes[:, 1:] != sorted_codes[:, :-1])
+    if method == "first":
+        sorted_ranks = positions - group_start + 1.0
+    elif method == "average":
+        end_run = np.ones(keys.shape, dtype=bool)
+        end_run[:, :-1] = new_run[:, 1:]
+        start = np.maximum.accumulate(np.where(new_run, positions, 0), axis=1)
+        end = np.minimum.accumulate(np.where(end_run, positions, n)[:, ::-1], axis=1)[:, ::-1]
+        sorted_ranks = (start + end) / 2 - group_start + 1
+    elif method == "dense":
+        runs = np.cumsum(new_run, axis=1)
+        sorted_ranks = runs - np.take_along_axis(runs, group_start, axis=1) + 1.0
+    else:
+        raise ValueError(f"Unknown rank method '{method}', expected 'average', 'dense' or 'first'")
+
+    ranks = np.empty(keys.shape)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+    ranks[np.isnan(scores)] = np.nan
+    return ranks
+
+
+def ensemble_rank(scores: np.ndarray, ascending: bool = False, groups=None) -> np.ndarray:
+    """Mean rank of every column over the models (rows) of `scores`; the ensemble orders by it, lowest first."""
+    return rank_matrix(scores, ascending, groups).mean(axis=0)
@@ -0,0 +1,182 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+# "show" displays figures as before, "collect" stores them in `registry` for export_figures,
+# "off" drops them (benchmarks and other headless runs).
+mode = os.environ.get("DATA_SCRIPTS_FIGURES", "show")
+registry = {}
+
+
+@contextmanager
+def collect_figures():
+    """Collects every figure shown inside the block instead of displaying it."""
+    global mode
+    previous, mode = mode, "collect"
+    try:
+        yield registry
+    finally:
+        mode = previous
+
+
+@contextmanager
+def figures_off():
+    """Drops every figure shown inside the block."""
+    global mode
+    previous, mode = mode, "off"
+    try:
+        yield
+    finally:
+        mode = previous
+
+
+def clear():
+    registry.clear()
+
+
+def data_hash(*frames) -> str:
+    digest = hashlib.sha256()
+    for df in frames:
+        if isinstance(df, pd.Series):
+            df = df.to_frame()
+        digest.update(repr(list(df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _is_plotly(fig) -> bool:
+    return hasattr(fig, "to_plotly_json")
+
+
+def show(fig=None, name: str = None, data=None):
+    """
+    Drop-in replacement for fig.show() / plt.show() in the analysis functions.
+    `data` is the frame (or tuple of frames) the figure was built from; its hash decides
+    whether export_figures can skip the figure. `name` defaults to module.function of the caller.
+    """
+    import matplotlib.pyplot as plt
+
+    if fig is None:
+        fig = plt.gcf()
+
+    if mode == "off":
+        if not _is_plotly(fig):
+            plt.close(fig)
+        return
+
+    if mode != "collect":
+        if _is_plotly(fig):
+            fig.show()
+        else:
+            plt.show()
+        return
+
+    if name is None:
+        caller = sys._getframe(1)
+        name = f"{caller.f_globals['__name__'].rsplit('.', 1)[-1]}.{caller.f_code.co_name}"
+    base, n = name, 1
+    while name in registry:
+        n += 1
+        name = f"{base}_{n}"
+
+    if _is_plotly(fig):
+        kind, payload = "plotly", fig.to_json()
+        content = payload.encode()
+    else:
+        kind, payload = "matplotlib", pickle.dumps(fig)
+        content = payload
+        plt.close(fig)
+
+    # Plotly specs are deterministic, so they are part of the key; pickled matplotlib figures are not.
+    frames = data if isinstance(data, (tuple, list)) else ([data] if data is not None else [])
+    digest = hashlib.sha256(f"{name}:{kind}".encode())
+    digest.update(data_hash(*frames).encode() if frames else content)
+    if kind == "plotly":
+        digest.update(content)
+
+    registry[name] = {"name": name, "kind": kind, "payload": payload, "hash": digest.hexdigest()}
+
+
+def _render(entry: dict, out_dir: str, formats: tuple) -> list:
+    out_dir = Path(out_dir)
+    stem = out_dir / entry["name"].replace("/", "_")
+    written = []
+
+    if entry["kind"] == "plotly":
+        import plotly.io as pio
+        fig = pio.from_json(entry["payload"])
+        for fmt in formats:
+            path = f"{stem}.{fmt}"
+            if fmt == "html":
+                fig.write_html(path, include_plotlyjs="cdn")
+            elif fmt == "json":
+                Path(path).write_text(entry["payload"])
+            else:
+                fig.write_image(path)
+            written.append(path)
+    else:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        fig = pickle.loads(entry["payload"])
+        for fmt in formats:
+            path = f"{stem}.{fmt}"
+            if fmt == "html":
+                buf = io.BytesIO()
+                fig.savefig(buf, format="png", bbox_inches="tight")
+                img = base64.b64encode(buf.getvalue()).decode()
+                Path(path).write_text(f'<html><body><img src="data:image/png;base64,{img}"/></body></html>')
+            elif fmt == "json":
+                continue
+            else:
+                fig.savefig(path, bbox_inches="tight")
+            written.append(path)
+        plt.close(fig)
+
+    return written
+
+
+def export_figures(out_dir: Path, formats: tuple = ("html",), n_jobs: int = None, force: bool = False) -> pd.DataFrame:
+    """
+    Renders the collected figures to `out_dir` on a process pool.
+    Figures whose hash matches manifest.json from a previous export (and whose files still exist) are skipped.
+    Static formats (png, svg, pdf) of plotly figures need kaleido.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    todo, status = [], []
+    for name, entry in registry.items():
+        previous = manifest.get(name)
+        unchanged = (
+            not force and previous is not None
+            and previous["hash"] == entry["hash"]
+            and previous["formats"] == list(formats)
+            and all(Path(path).exists() for path in previous["files"])
+        )
+        if unchanged:
+            status.append({"name": name, "status": "skipped", "files": previous["files"]})
+        else:
+            todo.append(entry)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [(entry, pool.submit(_render, entry, str(out_dir), tuple(formats))) for entry in todo]
+            for entry, future in futures:
+                files = future.result()
+                manifest[entry["name"]] = {"hash": entry["hash"], "formats": list(formats), "files": files}
+                status.append({"name": entry["name"], "status": "rendered", "files": files})
+
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    return pd.DataFrame(status, columns=["name", "status", "files"])
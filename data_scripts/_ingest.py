@@ -0,0 +1,409 @@
+"""
+Incremental ingestion of new seasons into the teams ranking dataset and the award datasets built
+from the previous season scores of every player (AWARD_DATASETS).
+
+The store (predict_datasets/.ingest_store) keeps the raw teams, players_teams, coaches and
+awards_players tables together with the derived per-row features of data_preparation_teams_ranking
+and of the award preparation notebooks. A season drop (a directory shaped like
+basketballPlayoffs/Season_11, possibly with only some of the tables or some of the rows) is
+upserted into the raw tables, and only what its changed rows feed is recomputed: the lags of the
+affected players and teams, the career cumulatives of the affected coaches, the roster aggregates
+of the affected team-years and the per-year standardization of the seasons they belong to.
+
+The datasets are written to the store directory unless another output directory is given; with
+predict_datasets they replace the notebooks' CSVs. They are not the same for a season without box
+scores (Season_11): the teams ranking notebook drops the team of those rows, so its roster
+aggregates are 0, while the ingested rosters aggregate the previous seasons of their players.
+
+    python -m data_scripts._ingest --bootstrap                      # full history from data/
+    python -m data_scripts._ingest basketballPlayoffs/Season_11     # append a season
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from data_scripts import _lag_features as lf
+from data_scripts import _models as md
+from data_scripts import _perf_scores as ps
+from data_scripts import _store_data as sd
+
+STORE_DIR_NAME = ".ingest_store"
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+# Rows of a season drop replace the stored rows with the same key. Season drops list a player
+# traded during the season once per team, all with stint 0, hence tmID in the players_teams key.
+TABLE_KEYS = {
+    "teams": ["tmID", "year"],
+    "players_teams": ["playerID", "year", "tmID", "stint"],
+    "coaches": ["coachID", "year", "stint"],
+    "awards_players": ["playerID", "award", "year"],
+}
+
+# Weights of the previous seasons in the weighted player performance of the teams ranking notebook.
+PERFORMANCE_WEIGHTS = {
+    "2yr": [0.7, 0.3],
+    "3yr": [0.5, 0.3, 0.2],
+    "4yr": [0.5, 0.25, 0.15, 0.10],
+}
+PERFORMANCE_FEATURES = ["Performance", "OffPerformance", "DefPerformance"]
+PERFORMANCE_COLUMNS = [f"Prev{feature}" for feature in PERFORMANCE_FEATURES] + [
+    f"{feature}_weighted_{suffix}" for suffix in PERFORMANCE_WEIGHTS for feature in PERFORMANCE_FEATURES
+]
+PLAYOFF_COLUMNS = ["playoff", "firstRound", "semis", "finals"]
+BASIC_COLUMNS = ["confID", "rank"] + PLAYOFF_COLUMNS + ["prev_win_pct", "made_playoffs"]
+DATASET_COLUMNS = ["year", "tmID"] + BASIC_COLUMNS + ["prev_coach_win_pct"] + PERFORMANCE_COLUMNS
+RAW_COLUMNS = [f"{col}_raw" for col in PERFORMANCE_COLUMNS]
+
+# Award datasets whose features are the lags of one season score of the player, with their award.
+AWARD_DATASETS = {
+    "mvp": ("overall_score", "Most Valuable Player"),
+    "defensive": ("defense_score", "Defensive Player of the Year"),
+    "allstar_mvp": ("overall_score", "All-Star Game Most Valuable Player"),
+}
+SEASON_SCORES = ["overall_score", "defense_score"]
+SEASON_LAGS = (1, 2, 3)
+SEASON_COLUMNS = [f"{score}_prev_{lag}yr" for lag in SEASON_LAGS for score in SEASON_SCORES]
+DERIVED_TABLES = ["player_performance", "coach_history", "team_features", "player_seasons"]
+
+
+def _store_dir(store_dir) -> Path:
+    return Path(store_dir) if store_dir else md.PREDICT_DIR / STORE_DIR_NAME
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical identifiers (as stored by _store_data) become plain strings so seasons can be appended."""
+    categories = {col: "str" for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    return df.astype(categories) if categories else df
+
+
+def upsert(stored: pd.DataFrame, update: pd.DataFrame, keys: list):
+    """
+    Writes the rows of `update` into `stored`: rows with a stored key overwrite the columns present
+    in `update`, the others are appended. Returns the new table and the old and new versions of the
+    rows that actually changed (keys and values), so callers can tell which entities are affected.
+    """
+    update = _plain(update).drop_duplicates(keys, keep="last").reset_index(drop=True)
+    if stored is None or stored.empty:
+        return update, update
+
+    stored = stored.reindex(columns=list(stored.columns) + [c for c in update.columns if c not in stored.columns])
+    positions = pd.MultiIndex.from_frame(stored[keys]).get_indexer(pd.MultiIndex.from_frame(update[keys]))
+    existing = positions >= 0
+    rows = positions[existing]
+
+    merged = stored.copy()
+    for col in update.columns.difference(keys):
+        values = update.loc[existing, col]
+        dtype = pd.concat([merged[col].iloc[:0], values.iloc[:0]]).dtype
+        if dtype != merged[col].dtype:
+            merged[col] = merged[col].astype(dtype)
+        merged.iloc[rows, merged.columns.get_loc(col)] = values.to_numpy()
+
+    old, new = stored.iloc[rows].reset_index(drop=True), merged.iloc[rows].reset_index(drop=True)
+    differs = ((old != new) & ~(old.isna() & new.isna())).any(axis=1).to_numpy()
+    merged = pd.concat([merged, update[~existing]], ignore_index=True)
+    changed = pd.concat([old[differs], new[differs], update[~existing]], ignore_index=True)
+    return merged, changed
+
+
+def _entity_window(df: pd.DataFrame, entity: str, since: pd.Series, lookback: int) -> pd.DataFrame:
+    """
+    The rows of the entities in `since` (entity -> first changed year), sorted by (entity, year),
+    starting `lookback` rows before the first changed one: enough history for lags up to `lookback`.
+    """
+    rows = df[df[entity].isin(since.index)].sort_values([entity, "year"])
+    position = rows.groupby(entity, sort=False).cumcount()
+    changed = position.where(rows["year"] >= rows[entity].map(since))
+    first = changed.groupby(rows[entity], sort=False).transform("min")
+    return rows[position >= first - lookback]
+
+
+def _since(changed: pd.DataFrame, entity: str) -> pd.Series:
+    return changed.groupby(entity)["year"].min()
+
+
+def player_performance(players_teams: pd.DataFrame) -> pd.DataFrame:
+    """Previous and weighted performance of every players_teams row, as in add_player_performance."""
+    df = players_teams[["playerID", "year", "stint"]].copy()
+    scores = ps.performance_scores(players_teams.reindex(columns=list(ps.SCORE_COLUMNS.values())))
+    df[PERFORMANCE_FEATURES] = scores[PERFORMANCE_FEATURES]
+    df = df.sort_values(["playerID", "year"])
+
+    prev = lf.lag_features(df, PERFORMANCE_FEATURES, lags=(1,), entity="playerID", name="Prev{feature}")
+    df[prev.columns] = prev
+    for suffix, weights in PERFORMANCE_WEIGHTS.items():
+        weighted = lf.weighted_history(df, PERFORMANCE_FEATURES, weights, entity="playerID", suffix=f"_weighted_{suffix}")
+        df[weighted.columns] = weighted
+
+    df[PERFORMANCE_COLUMNS] = df[PERFORMANCE_COLUMNS].fillna(0)
+    return df.drop(columns=PERFORMANCE_FEATURES)
+
+
+def coach_history(coaches: pd.DataFrame, prior: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Career win percentage of every coach up to the previous season, as in add_prev_coach_win_pct.
+    `prior` holds the earlier seasons of the same coaches; only their totals are used.
+    """
+    df = coaches.reindex(columns=["coachID", "tmID", "year", "stint", "won", "lost"])
+    df["games"] = df["won"] + df["lost"]
+    df = df.sort_values(["coachID", "year"])
+
+    offset_wins = offset_games = 0.0
+    if prior is not None and len(prior):
+        totals = prior.assign(games=prior["won"] + prior["lost"]).groupby("coachID")[["won", "games"]].sum()
+        offset_wins = df["coachID"].map(totals["won"]).fillna(0.0)
+        offset_games = df["coachID"].map(totals["games"]).fillna(0.0)
+
+    cum_wins = df.groupby("coachID")["won"].cumsum() + offset_wins - df["won"]
+    cum_games = df.groupby("coachID")["games"].cumsum() + offset_games - df["games"]
+    df["prev_coach_win_pct"] = cum_wins / cum_games.replace(0, np.nan)
+    return df[["coachID", "tmID", "year", "stint", "prev_coach_win_pct"]]
+
+
+def team_basic_columns(teams: pd.DataFrame, conf_labels) -> pd.DataFrame:
+    """Binary playoff columns, previous win percentage and playoffs, as in prepare_basic_columns."""
+    df = teams.reindex(columns=["tmID", "year", "confID", "rank", "won", "lost"] + PLAYOFF_COLUMNS)
+    df["playoff"] = (df["playoff"] == "Y").astype(float)
+    for col in ["firstRound", "semis", "finals"]:
+        df[col] = (df[col] == "W").astype(float)
+    df["win_pct"] = df["won"] / (df["won"] + df["lost"])
+    df = df.sort_values(["tmID", "year"])
+
+    prev = lf.lag_features(df, ["win_pct", "playoff"], lags=(1,), entity="tmID", name="{feature}")
+    df["prev_win_pct"] = prev["win_pct"].fillna(0)
+    df["made_playoffs"] = prev["playoff"].fillna(0)
+    df["confID"] = np.searchsorted(conf_labels, df["confID"].to_numpy(dtype=object)).astype(float)
+    df["rank"] = df["rank"].astype(float)
+    return df.set_index(["tmID", "year"])[BASIC_COLUMNS]
+
+
+def team_aggregates(players_teams: pd.DataFrame, performance: pd.DataFrame, team_years: pd.MultiIndex) -> pd.DataFrame:
+    """Mean roster performance of `team_years`, as in add_team_player_performance (before standardization)."""
+    roster = players_teams.loc[players_teams["stint"].isin([0, 1]), ["tmID", "year", "playerID"]]
+    roster = roster[pd.MultiIndex.from_frame(roster[["tmID", "year"]]).isin(team_years)]
+    roster = roster.drop_duplicates().sort_values(["tmID", "year"])
+    merged = roster.merge(performance.drop(columns="stint"), on=["playerID", "year"], how="left")
+    aggregates = merged.groupby(["tmID", "year"])[PERFORMANCE_COLUMNS].mean()
+    return aggregates.reindex(team_years).fillna(0)
+
+
+def player_seasons(players_teams: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lags of the overall and defense scores of every player season, as in the award preparation
+    notebooks: the stints of a played season are summed, while the rows of a season without box
+    scores are kept one per team as the notebooks append them, and the lags are positional.
+    """
+    stats = list(ps.SCORE_COLUMNS.values())
+    df = players_teams.reindex(columns=["playerID", "year"] + stats)
+    played = df["GP"].notna()
+    df = pd.concat([df[played].groupby(["playerID", "year"], as_index=False)[stats].sum(), df[~played]],
+                   ignore_index=True)
+    scores = ps.performance_scores(df)
+    df["overall_score"], df["defense_score"] = scores["Performance"], scores["DefPerformance"]
+    df = df.sort_values(["playerID", "year"], kind="stable")
+
+    lags = lf.lag_features(df, SEASON_SCORES, lags=SEASON_LAGS, entity="playerID")
+    df[SEASON_COLUMNS] = lags[SEASON_COLUMNS].fillna(0)
+    return df[["playerID", "year"] + SEASON_COLUMNS].reset_index(drop=True)
+
+
+def award_dataset(seasons: pd.DataFrame, awards_players: pd.DataFrame, name: str) -> pd.DataFrame:
+    """The predict_datasets layout of award dataset `name` (a key of AWARD_DATASETS)."""
+    spec = md.DATASETS[name]
+    score, award = AWARD_DATASETS[name]
+    df = seasons[["playerID", "year"]].copy()
+    df[spec["features"]] = seasons[[f"{score}_prev_{lag}yr" for lag in SEASON_LAGS]].to_numpy()
+
+    winners = pd.DataFrame(columns=["playerID", "year"])
+    if awards_players is not None:
+        winners = awards_players.loc[awards_players["award"].str.strip().str.lower() == award.lower(), ["playerID", "year"]]
+    df[spec["target"]] = pd.MultiIndex.from_frame(df[["playerID", "year"]]).isin(
+        pd.MultiIndex.from_frame(winners.astype({"year": "int64"}))).astype(int)
+    return df
+
+
+def _team_years(*frames) -> pd.MultiIndex:
+    pairs = pd.concat([frame[["tmID", "year"]] for frame in frames], ignore_index=True).dropna().drop_duplicates()
+    return pd.MultiIndex.from_frame(pairs)
+
+
+def _load_state(store_dir: Path) -> dict:
+    state = {}
+    for name in list(TABLE_KEYS) + DERIVED_TABLES:
+        path = store_dir / f"{name}.parquet"
+        state[name] = pd.read_parquet(path) if path.exists() else None
+    manifest_path = store_dir / "manifest.json"
+    state["manifest"] = json.loads(manifest_path.read_text()) if manifest_path.exists() else {"conf_labels": [], "drops": []}
+    return state
+
+
+def _refresh(state: dict, changes: dict) -> dict:
+    """Recomputes the derived tables for the changed rows of every raw table; returns what was recomputed."""
+    teams, players_teams, coaches = state["teams"], state["players_teams"], state["coaches"]
+    features = state["team_features"]
+    if features is None:
+        features = pd.DataFrame(columns=BASIC_COLUMNS + ["prev_coach_win_pct"] + RAW_COLUMNS + PERFORMANCE_COLUMNS,
+                                index=pd.MultiIndex.from_arrays([[], []], names=["tmID", "year"]), dtype=float)
+    report = {"players": 0, "coaches": 0, "teams": 0, "team_years": 0, "years": []}
+
+    conf_labels = np.sort(teams["confID"].dropna().unique().astype(object)) if teams is not None else np.array([])
+    relabel = list(conf_labels) != state["manifest"]["conf_labels"]
+    state["manifest"]["conf_labels"] = list(conf_labels)
+
+    # Teams: previous season win percentage and playoffs (lag 1).
+    new_rows = pd.MultiIndex.from_arrays([[], []], names=["tmID", "year"])
+    changed = changes.get("teams")
+    if changed is not None and len(changed):
+        since = _since(changed, "tmID") if not relabel else teams.groupby("tmID")["year"].min()
+        basic = team_basic_columns(_entity_window(teams, "tmID", since, 1), conf_labels)
+        basic = basic[basic.index.get_level_values("year") >= basic.index.get_level_values("tmID").map(since)]
+        new_rows = basic.index.difference(features.index)
+        features = pd.concat([features, pd.DataFrame(0.0, index=new_rows, columns=features.columns)]).sort_index()
+        features.loc[basic.index, BASIC_COLUMNS] = basic
+        report["teams"] = len(since)
+
+    # Coaches: career cumulatives carried over from the seasons before the first changed one.
+    coach_team_years = new_rows
+    changed = changes.get("coaches")
+    if changed is not None and len(changed):
+        since = _since(changed, "coachID")
+        affected = coaches[coaches["coachID"].isin(since.index)]
+        after = affected["year"] >= affected["coachID"].map(since)
+        history = coach_history(affected[after], prior=affected[~after])
+
+        old = state["coach_history"]
+        if old is not None:
+            old = old[~(old["coachID"].isin(since.index) & (old["year"] >= old["coachID"].map(since)))]
+        state["coach_history"] = pd.concat([old, history], ignore_index=True).sort_values(["coachID", "year"])
+        coach_team_years = coach_team_years.union(_team_years(changed, history))
+        report["coaches"] = len(since)
+
+    coach_team_years = coach_team_years.intersection(features.index)
+    if len(coach_team_years) and state["coach_history"] is not None:
+        history = state["coach_history"]
+        history = history[pd.MultiIndex.from_frame(history[["tmID", "year"]]).isin(coach_team_years)]
+        pct = history.groupby(["tmID", "year"])["prev_coach_win_pct"].mean().reindex(coach_team_years)
+        features.loc[coach_team_years, "prev_coach_win_pct"] = pct.fillna(0).to_numpy()
+
+    # Players: lags of the changed careers, then the rosters they were or are part of.
+    player_team_years = new_rows
+    changed = changes.get("players_teams")
+    if changed is not None and len(changed):
+        since = _since(changed, "playerID")
+        window = _entity_window(players_teams, "playerID", since, max(len(w) for w in PERFORMANCE_WEIGHTS.values()))
+        performance = player_performance(window)
+        performance = performance[performance["year"] >= performance["playerID"].map(since)]
+
+        old = state["player_performance"]
+        if old is not None:
+            old = old[~(old["playerID"].isin(since.index) & (old["year"] >= old["playerID"].map(since)))]
+        state["player_performance"] = pd.concat([old, performance]).sort_values(["playerID", "year"])
+
+        # Award season lags: the careers are short, so every season of the changed players is redone.
+        seasons = player_seasons(players_teams[players_teams["playerID"].isin(since.index)])
+        seasons = seasons[seasons["year"] >= seasons["playerID"].map(since)]
+        old = state["player_seasons"]
+        if old is not None:
+            old = old[~(old["playerID"].isin(since.index) & (old["year"] >= old["playerID"].map(since)))]
+        state["player_seasons"] = pd.concat([old, seasons]).sort_values(["playerID", "year"], kind="stable")
+
+        rows = pd.concat([changed, players_teams[players_teams["playerID"].isin(since.index)]])
+        rows = rows[rows["stint"].isin([0, 1]) & (rows["year"] >= rows["playerID"].map(since))]
+        player_team_years = player_team_years.union(_team_years(rows))
+        report["players"] = len(since)
+
+    player_team_years = player_team_years.intersection(features.index)
+    if len(player_team_years) and state["player_performance"] is not None:
+        aggregates = team_aggregates(players_teams, state["player_performance"], player_team_years)
+        features.loc[player_team_years, RAW_COLUMNS] = aggregates.to_numpy()
+
+    # Standardization within every season that has a changed roster aggregate.
+    years = sorted(player_team_years.get_level_values("year").unique())
+    for year in years:
+        mask = features.index.get_level_values("year") == year
+        features.loc[mask, PERFORMANCE_COLUMNS] = StandardScaler().fit_transform(features.loc[mask, RAW_COLUMNS].to_numpy())
+
+    report["team_years"] = len(player_team_years.union(coach_team_years))
+    report["years"] = [int(year) for year in years]
+    state["team_features"] = features
+    return report
+
+
+def dataset(features: pd.DataFrame) -> pd.DataFrame:
+    """The predict_datasets/teams.csv layout of the stored team features."""
+    df = features.reset_index()[DATASET_COLUMNS]
+    return df.astype({col: int for col in ["year", "confID"] + PLAYOFF_COLUMNS})
+
+
+def ingest_tables(tables: dict, store_dir=None, output_dir=None, label: str = None) -> dict:
+    """
+    Upserts `tables` (table name -> rows) into the store, refreshes the derived features they
+    affect and writes the teams ranking and AWARD_DATASETS datasets, under their predict_datasets
+    file names, to `output_dir` (the store directory by default).
+    """
+    store_dir = _store_dir(store_dir)
+    start = time.perf_counter()
+    state = _load_state(store_dir)
+
+    changes = {}
+    for name, update in tables.items():
+        if name not in TABLE_KEYS:
+            raise ValueError(f"Unknown table '{name}', expected one of {list(TABLE_KEYS)}")
+        state[name], changes[name] = upsert(state[name], update, TABLE_KEYS[name])
+    report = _refresh(state, changes)
+    report["rows"] = {name: len(changed.drop_duplicates(TABLE_KEYS[name])) for name, changed in changes.items()}
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    for name in list(changes) + DERIVED_TABLES:
+        if state[name] is not None:
+            state[name].to_parquet(store_dir / f"{name}.parquet")
+    state["manifest"]["drops"].append({"source": label, "rows": report["rows"]})
+    (store_dir / "manifest.json").write_text(json.dumps(state["manifest"], indent=2))
+
+    output_dir = Path(output_dir) if output_dir else store_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    dataset(state["team_features"]).to_csv(output_dir / md.DATASETS["teams"]["file"], index=False)
+    if state["player_seasons"] is not None:
+        for name in AWARD_DATASETS:
+            award_dataset(state["player_seasons"], state["awards_players"], name).to_csv(
+                output_dir / md.DATASETS[name]["file"], index=False)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def ingest_season(season_dir, store_dir=None, output_dir=None) -> dict:
+    """Ingests the CSVs of the TABLE_KEYS tables found in `season_dir` (any subset of them)."""
+    season_dir = Path(season_dir)
+    tables = {name: pd.read_csv(season_dir / f"{name}.csv") for name in TABLE_KEYS if (season_dir / f"{name}.csv").exists()}
+    if not tables:
+        raise FileNotFoundError(f"No {', '.join(TABLE_KEYS)} CSV in {season_dir}")
+    return ingest_tables(tables, store_dir, output_dir, label=str(season_dir))
+
+
+def bootstrap(input_dir=DATA_DIR, store_dir=None, output_dir=None) -> dict:
+    """Starts a new store from the cleaned tables in `input_dir` (a full build of every season)."""
+    store_dir = _store_dir(store_dir)
+    for path in store_dir.glob("*"):
+        path.unlink()
+    tables = {name: sd.load_table(name, Path(input_dir)) for name in TABLE_KEYS}
+    return ingest_tables(tables, store_dir, output_dir, label=str(input_dir))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("seasons", nargs="*", help="season directories to ingest, in order")
+    parser.add_argument("--bootstrap", action="store_true", help="rebuild the store from the cleaned tables first")
+    parser.add_argument("--store", help="store directory (default predict_datasets/.ingest_store)")
+    parser.add_argument("--output-dir", help="directory of the dataset CSVs (default the store directory; "
+                                             "predict_datasets replaces the notebooks' datasets)")
+    args = parser.parse_args()
+
+    if args.bootstrap:
+        print("bootstrap:", bootstrap(store_dir=args.store, output_dir=args.output_dir))
+    for season in args.seasons:
+        print(f"{season}:", ingest_season(season, args.store, args.output_dir))
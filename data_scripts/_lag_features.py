@@ -0,0 +1,106 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Weight of the previous 1, 2, 3 and 4 seasons in the weighted history of the team features.
+DEFAULT_KERNEL = (0.7, 0.15, 0.1, 0.05)
+STORE_DIR_NAME = ".lag_store"
+
+
+def exponential_kernel(decay: float, length: int, normalize: bool = True) -> tuple:
+    """Weights decay**0, decay**1, ... for the previous `length` seasons, summing to 1 when `normalize`."""
+    weights = decay ** np.arange(length, dtype=np.float64)
+    if normalize:
+        weights = weights / weights.sum()
+    return tuple(weights)
+
+
+def lag_array(df: pd.DataFrame, features: list, max_lag: int, entity: str, order: str = "year"):
+    """
+    Lags 1..max_lag of every feature, as one (rows, features, max_lag) array in the row order of `df`.
+
+    The frame is sorted once by (entity, order); the lags are then a strided window over the sorted
+    values, masked where the window crosses into the previous entity. Like groupby(entity).shift(k),
+    a lag is positional: the k-th earlier row of the same entity, NaN when there is none.
+    """
+    codes = pd.factorize(np.asarray(df[entity]))[0]
+    sort = np.lexsort((df[order].to_numpy(), codes))
+    values = df[features].to_numpy(dtype=np.float64)[sort]
+    codes = codes[sort]
+
+    n = len(values)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else np.array([], dtype=np.int64)
+    position = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+    padded = np.vstack([np.full((max_lag, len(features)), np.nan), values])
+    # windows[i, :, j] is padded[i + j], i.e. the row max_lag - j places before row i.
+    windows = sliding_window_view(padded, max_lag + 1, axis=0)[:n]
+    lags = windows[:, :, max_lag - 1::-1]
+    lags = np.where(np.arange(1, max_lag + 1) <= position[:, None, None], lags, np.nan)
+
+    out = np.empty_like(lags)
+    out[sort] = lags
+    return out
+
+
+def lag_features(df: pd.DataFrame, features: list, lags=(1, 2, 3), entity: str = "playerID", order: str = "year",
+                 name: str = "{feature}_prev_{lag}yr") -> pd.DataFrame:
+    """The `*_prev_1yr/2yr/3yr` columns of the preparation notebooks, aligned with `df`."""
+    lagged = lag_array(df, features, max(lags), entity, order)
+    return pd.DataFrame({
+        name.format(feature=feature, lag=lag): lagged[:, i, lag - 1]
+        for lag in lags for i, feature in enumerate(features)
+    }, index=df.index)
+
+
+def weighted_history(df: pd.DataFrame, features, kernel=DEFAULT_KERNEL, entity: str = "tmID", order: str = "year",
+                     suffix: str = "_weighted") -> pd.DataFrame:
+    """
+    Σ_k importance · kernel[k] · lag_{k+1} of every feature, aligned with `df`.
+    `features` maps a feature to its importance (a list gives every feature importance 1) and
+    `kernel` holds the weight of each previous season. NaN when a season of the window is missing.
+    """
+    if not isinstance(features, dict):
+        features = dict.fromkeys(features, 1.0)
+    names = list(features)
+    importance = np.array([features[name] for name in names], dtype=np.float64)
+
+    lagged = lag_array(df, names, len(kernel), entity, order)
+    # Accumulated season by season so the sums are the same as the chained shift expressions.
+    total = (importance * kernel[0]) * lagged[:, :, 0]
+    for k in range(1, len(kernel)):
+        total = total + (importance * kernel[k]) * lagged[:, :, k]
+
+    return pd.DataFrame(total, index=df.index, columns=[f"{name}{suffix}" for name in names])
+
+
+def _store_key(source: Path, features, kernel, entity: str, order: str, suffix: str) -> str:
+    digest = hashlib.sha256(source.read_bytes())
+    digest.update(json.dumps([features, list(kernel), entity, order, suffix], sort_keys=True, default=float).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_weighted_history(source, features, kernel=DEFAULT_KERNEL, entity: str = "tmID", order: str = "year",
+                          suffix: str = "_weighted", store_dir: Path = None) -> pd.DataFrame:
+    """
+    The CSV at `source`, sorted by (entity, order), with its weighted_history columns.
+    The result is stored as Parquet in `<source dir>/.lag_store`, keyed by the CSV contents, the
+    features, the kernel and the entity, and read from there as long as none of them changed.
+    """
+    source = Path(source)
+    store_dir = Path(store_dir) if store_dir else source.parent / STORE_DIR_NAME
+    path = store_dir / f"{source.stem}-{_store_key(source, features, kernel, entity, order, suffix)}.parquet"
+    if path.exists():
+        return pd.read_parquet(path)
+
+    df = pd.read_csv(source).sort_values([entity, order]).reset_index(drop=True)
+    history = weighted_history(df, features, kernel, entity, order, suffix)
+    df[history.columns] = history
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path)
+    return df
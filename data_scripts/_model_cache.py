@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Fitted estimators keyed by what they were trained on; the least recently used ones are evicted past MAX_ENTRIES.
+CACHE_DIR = Path(os.environ.get("DATA_SCRIPTS_MODEL_CACHE", Path(__file__).resolve().parent.parent / ".model_cache"))
+MAX_ENTRIES = 512
+# Parameters that only change how a model is trained (threads, logging), not the fitted result.
+RUNTIME_PARAMS = ("n_jobs", "thread_count", "nthread", "verbose", "verbosity", "silent")
+
+stats = {"hits": 0, "misses": 0}
+
+
+def _hash_values(digest, values):
+    if isinstance(values, (pd.DataFrame, pd.Series)):
+        digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    else:
+        values = np.ascontiguousarray(values)
+        digest.update(f"{values.dtype}{values.shape}".encode())
+        digest.update(values.tobytes())
+
+
+def model_key(estimator, X, y, features: list = None, target: str = None) -> str:
+    """
+    Hash of the training rows, the feature list, the target and the hyperparameters of `estimator`.
+    `features` and `target` default to the column names when X / y are pandas objects.
+    """
+    if features is None and isinstance(X, pd.DataFrame):
+        features = list(X.columns)
+    if target is None and isinstance(y, pd.Series):
+        target = y.name
+
+    params = {name: value for name, value in estimator.get_params(deep=True).items()
+              if name.rsplit("__", 1)[-1] not in RUNTIME_PARAMS and not hasattr(value, "get_params")}
+    params = json.dumps(params, sort_keys=True, default=repr)
+    digest = hashlib.sha256(f"{type(estimator).__module__}.{type(estimator).__name__}".encode())
+    digest.update(params.encode())
+    digest.update(json.dumps([features, target], default=str).encode())
+    _hash_values(digest, X)
+    _hash_values(digest, y)
+    return digest.hexdigest()
+
+
+def _entry_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"{key}.pkl"
+
+
+def _evict(cache_dir: Path, max_entries: int):
+    entries = sorted(cache_dir.glob("*.pkl"), key=lambda path: path.stat().st_mtime_ns)
+    for path in entries[:max(0, len(entries) - max_entries)]:
+        path.unlink(missing_ok=True)
+
+
+def fit_cached(estimator, X, y, features: list = None, target: str = None, cache_dir: Path = None,
+               max_entries: int = None):
+    """
+    Returns `estimator` fitted on X, y, loading it from the cache when the same model was already
+    trained on the same rows. A hit refreshes the entry's mtime, which is the LRU order used for eviction.
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    path = _entry_path(cache_dir, model_key(estimator, X, y, features, target))
+
+    if path.exists():
+        try:
+            with open(path, "rb") as f:
+                fitted = pickle.load(f)
+            os.utime(path)
+            stats["hits"] += 1
+            return fitted
+        except (OSError, EOFError, pickle.UnpicklingError):
+            path.unlink(missing_ok=True)
+
+    stats["misses"] += 1
+    estimator.fit(X, y)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Written to a temporary file first so that parallel workers never read a half-written entry.
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(estimator, f)
+    os.replace(tmp_path, path)
+    _evict(cache_dir, max_entries or MAX_ENTRIES)
+    return estimator
+
+
+def clear_cache(cache_dir: Path = None):
+    for path in Path(cache_dir or CACHE_DIR).glob("*.pkl"):
+        path.unlink()
+    stats.update(hits=0, misses=0)
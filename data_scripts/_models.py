@@ -0,0 +1,192 @@
+import json
+import os
+from pathlib import Path
+
+from catboost import CatBoostClassifier, CatBoostRanker
+from lightgbm import LGBMClassifier, LGBMRanker
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from data_scripts import _lag_features as lf
+
+# The estimators and datasets of the prediction notebooks, importable so they can be run outside of them.
+
+PREDICT_DIR = Path(__file__).resolve().parent.parent / "predict_datasets"
+RANDOM_STATE = 42
+# Best hyperparameters per dataset and model, written by _tuning; the defaults below are used without it.
+TUNED_PARAMS = Path(os.environ.get("DATA_SCRIPTS_TUNED_PARAMS", PREDICT_DIR / "tuned_params.json"))
+
+# Largest relevance label of the rankers (a conference of MAX_RELEVANCE + 1 teams); gains are linear in it.
+MAX_RELEVANCE = 63
+
+# (mtime, params) of every tuned parameter file read, by path.
+_tuned = {}
+
+# kind: "award" (awards_prediction), "turnover" (coach_turnover_prediction) or "rank" (teams_ranking_prediction);
+# build_models also knows "ltr", the learning-to-rank models of the same standings.
+DATASETS = {
+    "mvp": {"kind": "award", "file": "mvp.csv", "id": "playerID", "target": "mvp",
+            "features": ["overall_score_prev_1yr", "overall_score_prev_2yr", "overall_score_prev_3yr"]},
+    "defensive": {"kind": "award", "file": "defensive.csv", "id": "playerID", "target": "defensive",
+                  "features": ["defense_score_prev_1yr", "defense_score_prev_2yr", "defense_score_prev_3yr"]},
+    "rookie": {"kind": "award", "file": "rookies.csv", "id": "playerID", "target": "rookie",
+               "features": ["tmID", "college", "team_prev_rank", "college_count_before"]},
+    "mip": {"kind": "award", "file": "mip.csv", "id": "playerID", "target": "improved",
+            "features": ["overall_score_prev_1yr", "overall_score_prev_2yr", "overall_score_prev_3yr", "minutes_category"]},
+    "kpsa": {"kind": "award", "file": "kpsa.csv", "id": "playerID", "target": "sportsmanship",
+             "features": ["prev_score_1", "prev_score_2", "prev_score_3", "prev_attend"]},
+    "sixth": {"kind": "award", "file": "swoty.csv", "id": "playerID", "target": "sixth",
+              "features": ["overall_score_prev_1yr", "overall_score_prev_2yr", "overall_score_prev_3yr", "GS_category"]},
+    "finals_mvp": {"kind": "award", "file": "finals_mvp.csv", "id": "playerID", "target": "finals_mvp",
+                   "features": ["PrevPerformance", "Performance_weighted_2yr", "Performance_weighted_3yr",
+                                "Performance_weighted_4yr", "team_PrevPerformance", "team_Performance_weighted_2yr",
+                                "team_Performance_weighted_3yr", "team_Performance_weighted_4yr"]},
+    "allstar_mvp": {"kind": "award", "file": "all-star_game_mvp.csv", "id": "playerID", "target": "allstar_mvp",
+                    "features": ["overall_score_prev_1yr", "overall_score_prev_2yr", "overall_score_prev_3yr"]},
+    "coach": {"kind": "award", "file": "coty.csv", "id": "coachID", "target": "coach_of_the_year",
+              "features": ["coach_tenure", "win_rate_prev_team_1yr", "win_rate_prev_team_2yr",
+                           "win_rate_prev_coach_1yr", "win_rate_prev_coach_2yr", "change_rate_prev"]},
+    "coach_turnover": {"kind": "turnover", "file": "coaches_turnover.csv", "id": "tmID", "target": "change",
+                       "features": ["coach_tenure", "win_rate_prev_team_1yr", "win_rate_prev_team_2yr",
+                                    "win_rate_prev_coach_1yr", "win_rate_prev_coach_2yr", "change_rate_prev"]},
+    "teams": {"kind": "rank", "file": "teams.csv", "id": "tmID", "target": "rank", "group": "confID",
+              "features": ["made_playoffs_weighted", "prev_win_pct_weighted", "prev_coach_win_pct_weighted",
+                           "Performance_weighted_2yr_weighted", "OffPerformance_weighted_2yr_weighted",
+                           "DefPerformance_weighted_2yr_weighted", "Performance_weighted_3yr_weighted",
+                           "OffPerformance_weighted_3yr_weighted", "DefPerformance_weighted_3yr_weighted",
+                           "Performance_weighted_4yr_weighted", "OffPerformance_weighted_4yr_weighted",
+                           "DefPerformance_weighted_4yr_weighted"]},
+}
+
+# Importance of every team feature in the weighted history of teams_ranking_prediction.
+TEAM_FEATURE_WEIGHTS = {
+    "made_playoffs": 0.33,
+    "prev_win_pct": 0.8,
+    "prev_coach_win_pct": 0.5,
+    "Performance_weighted_2yr": 0.85,
+    "OffPerformance_weighted_2yr": 0.6,
+    "DefPerformance_weighted_2yr": 1.0,
+    "Performance_weighted_3yr": 0.35,
+    "OffPerformance_weighted_3yr": 0.25,
+    "DefPerformance_weighted_3yr": 0.45,
+    "Performance_weighted_4yr": 0.3,
+    "OffPerformance_weighted_4yr": 0.2,
+    "DefPerformance_weighted_4yr": 0.35,
+}
+
+
+def add_weighted_history(df, test_year=None, kernel=lf.DEFAULT_KERNEL):
+    df = df.sort_values(["tmID", "year"]).copy()
+
+    if test_year is not None:
+        df = df[df["year"] <= test_year].copy()
+
+    history = lf.weighted_history(df, TEAM_FEATURE_WEIGHTS, kernel, entity="tmID")
+    df[history.columns] = history
+    return df
+
+
+def load_team_history(data_dir: Path = None, kernel=lf.DEFAULT_KERNEL):
+    """teams.csv with the weighted history of the team features, read from the lag store when up to date."""
+    return lf.load_weighted_history(Path(data_dir or PREDICT_DIR) / DATASETS["teams"]["file"],
+                                    TEAM_FEATURE_WEIGHTS, kernel, entity="tmID")
+
+
+def award_models(threads: int = None) -> dict:
+    return {
+        "Logistic Regression": Pipeline([
+            ("scaler", StandardScaler()),
+            ("model", LogisticRegression(C=1.0, penalty="l2", solver="lbfgs", max_iter=1000, class_weight="balanced")),
+        ]),
+        "XGBClassifier": XGBClassifier(
+            n_estimators=500, learning_rate=0.05, max_depth=5, subsample=0.8, colsample_bytree=0.7,
+            eval_metric="logloss", n_jobs=threads
+        ),
+        "CatBoostClassifier": CatBoostClassifier(
+            depth=4, learning_rate=0.05, iterations=500, loss_function="MultiClass", verbose=False,
+            thread_count=threads or -1, allow_writing_files=False
+        ),
+    }
+
+
+def turnover_models(scale_pos_weight: float, threads: int = None) -> dict:
+    return {
+        "LightGBM": LGBMClassifier(
+            objective="binary", num_leaves=15, max_depth=4, learning_rate=0.05, n_estimators=300,
+            subsample=0.8, colsample_bytree=0.8, scale_pos_weight=scale_pos_weight * 2.0,
+            random_state=RANDOM_STATE, verbose=-1, n_jobs=threads
+        ),
+        "CatBoost": CatBoostClassifier(
+            loss_function="Logloss", depth=4, iterations=300, learning_rate=0.05, auto_class_weights="Balanced",
+            random_seed=RANDOM_STATE, verbose=0, thread_count=threads or -1, allow_writing_files=False
+        ),
+        "XGBoost": XGBClassifier(
+            objective="binary:logistic", eval_metric="aucpr", max_depth=4, learning_rate=0.05, n_estimators=300,
+            subsample=0.8, colsample_bytree=0.8, scale_pos_weight=scale_pos_weight * 2.0,
+            random_state=RANDOM_STATE, verbosity=0, n_jobs=threads
+        ),
+    }
+
+
+def rank_models(threads: int = None) -> dict:
+    return {
+        "ExtraTrees": ExtraTreesRegressor(n_estimators=200, max_depth=4, min_samples_split=2,
+                                          random_state=RANDOM_STATE, n_jobs=threads),
+        "RandomForest": RandomForestRegressor(n_estimators=200, max_depth=4, min_samples_split=2, max_features="sqrt",
+                                              random_state=RANDOM_STATE, n_jobs=threads),
+        "GradientBoosting": GradientBoostingRegressor(n_estimators=200, learning_rate=0.05, max_depth=3, subsample=0.8,
+                                                      random_state=RANDOM_STATE),
+        "Ridge": Ridge(alpha=1.0, random_state=RANDOM_STATE),
+    }
+
+
+def ranker_models(threads: int = None) -> dict:
+    """Learning-to-rank models of the team standings (see _ranking); labels are relevances, higher is better."""
+    return {
+        "LGBMRanker": LGBMRanker(
+            objective="lambdarank", n_estimators=200, learning_rate=0.05, num_leaves=7, min_child_samples=5,
+            label_gain=list(range(MAX_RELEVANCE + 1)), random_state=RANDOM_STATE, verbose=-1, n_jobs=threads
+        ),
+        "CatBoostRanker": CatBoostRanker(
+            loss_function="YetiRank", depth=4, iterations=300, learning_rate=0.05, random_seed=RANDOM_STATE,
+            verbose=0, thread_count=threads or -1, allow_writing_files=False
+        ),
+    }
+
+
+def tuned_params(dataset: str, model_name: str, path: Path = None) -> dict:
+    """The hyperparameters _tuning chose for `model_name` on `dataset`; empty when it has not been tuned."""
+    path = Path(path or TUNED_PARAMS)
+    if not path.exists():
+        return {}
+    mtime = path.stat().st_mtime_ns
+    cached = _tuned.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _tuned[path] = (mtime, json.loads(path.read_text())["params"])
+    return dict(cached[1].get(dataset, {}).get(model_name, {}))
+
+
+def build_models(kind: str, threads: int = None, dataset: str = None, **kwargs) -> dict:
+    """The models of `kind`, with the tuned hyperparameters of `dataset` applied when there are any."""
+    if kind == "award":
+        models = award_models(threads)
+    elif kind == "turnover":
+        models = turnover_models(kwargs.get("scale_pos_weight", 1.0), threads)
+    elif kind == "rank":
+        models = rank_models(threads)
+    elif kind == "ltr":
+        models = ranker_models(threads)
+    else:
+        raise ValueError(f"Unknown model kind '{kind}', expected 'award', 'turnover', 'rank' or 'ltr'")
+
+    if dataset is not None:
+        for name, model in models.items():
+            model.set_params(**tuned_params(dataset, name))
+    return models
+
+
+def model_names(kind: str) -> list:
+    return list(build_models(kind).keys())
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# Column of players_teams used for every argument of the scoring kernels.
+SCORE_COLUMNS = {
+    "PTS": "points",
+    "REB": "rebounds",
+    "AST": "assists",
+    "STL": "steals",
+    "BLK": "blocks",
+    "TOV": "turnovers",
+    "PF": "PF",
+    "FGM": "fgMade",
+    "FGA": "fgAttempted",
+    "GP": "GP",
+}
+
+
+def _as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def offense_score(PTS, AST, FGM, FGA, TOV, GP):
+    """Array version of players_teams_data.offense_score_per_game (0 where GP == 0 or FGA == 0)."""
+    PTS, AST, FGM, FGA, TOV, GP = map(_as_float, (PTS, AST, FGM, FGA, TOV, GP))
+    zero = (GP == 0) | (FGA == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        FG_percent = FGM / FGA
+        score = (PTS / GP) + 1.5 * (AST / GP) + 10 * FG_percent - 2 * (TOV / GP)
+    return np.where(zero, 0.0, score)
+
+
+def defense_score(REB, STL, BLK, PF, GP):
+    """Array version of players_teams_data.defense_score_per_game (0 where GP == 0)."""
+    REB, STL, BLK, PF, GP = map(_as_float, (REB, STL, BLK, PF, GP))
+    zero = GP == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = 1.2 * (REB / GP) + 3 * (STL / GP) + 2 * (BLK / GP) - 1 * (PF / GP)
+    return np.where(zero, 0.0, score)
+
+
+def overall_score(PTS, REB, AST, STL, BLK, TOV, FGM, FGA, GP):
+    """Array version of players_teams_data.overall_performance_per_game (0 where GP == 0 or FGA == 0)."""
+    PTS, REB, AST, STL, BLK, TOV, FGM, FGA, GP = map(_as_float, (PTS, REB, AST, STL, BLK, TOV, FGM, FGA, GP))
+    zero = (GP == 0) | (FGA == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        FG_percent = FGM / FGA
+        score = (
+            (PTS / GP) +
+            (REB / GP) * 1.2 +
+            (AST / GP) * 1.5 +
+            (STL / GP) * 3 +
+            (BLK / GP) * 2 -
+            (TOV / GP) * 2 +
+            FG_percent * 10
+        )
+    return np.where(zero, 0.0, score)
+
+
+def performance_scores(data, games_col: str = "GP"):
+    """
+    Computes the overall, offensive and defensive scores of every row in one pass.
+
+    `data` is a players_teams shaped DataFrame or a mapping of column name to NumPy array
+    (a structured array also works). `games_col` replaces GP as the divisor, e.g. "minutes"
+    for per-minute scores. Returns a DataFrame aligned with `data` when given a DataFrame,
+    otherwise a dict of arrays.
+    """
+    cols = {arg: data[col] for arg, col in SCORE_COLUMNS.items() if arg != "GP"}
+    cols["GP"] = data[games_col]
+
+    scores = {
+        "Performance": overall_score(cols["PTS"], cols["REB"], cols["AST"], cols["STL"], cols["BLK"],
+                                     cols["TOV"], cols["FGM"], cols["FGA"], cols["GP"]),
+        "OffPerformance": offense_score(cols["PTS"], cols["AST"], cols["FGM"], cols["FGA"], cols["TOV"], cols["GP"]),
+        "DefPerformance": defense_score(cols["REB"], cols["STL"], cols["BLK"], cols["PF"], cols["GP"]),
+    }
+
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(scores, index=data.index)
+    return scores
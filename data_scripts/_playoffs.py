@@ -0,0 +1,108 @@
+"""
+Monte Carlo simulation of the playoff bracket.
+
+The bracket of series_post: in each conference the first seed plays the fourth and the second
+plays the third in the first round (FR), the winners meet in the conference finals (CF) and the two
+conference champions in the finals (F). simulate_bracket plays the bracket of every simulation at
+once: a round is a few array operations over all simulations, and a series is decided by one
+uniform draw against the exact chance of winning it (series_probability) rather than game by game.
+
+Strengths are the chance of each team beating an average team in one game, such as a win
+percentage predicted by a model; two teams meet with the log5 probability. Seeds are the
+conference ranks (1 = best), one per team, or one row per simulation to play the brackets of
+simulated seasons.
+
+    from data_scripts import _playoffs as po
+
+    odds = po.playoff_odds(teams, n_sims=1_000_000)   # tmID, confID, seed and strength columns
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+ROUNDS = ("FR", "CF", "F")
+# Wins needed to take a series of each round: best of 3, 3 and 5, as in series_post.
+SERIES_WINS = {"FR": 2, "CF": 2, "F": 3}
+# Seeds of a conference in bracket order: 1 plays 4 and 2 plays 3, their winners play each other.
+BRACKET = (1, 4, 2, 3)
+# Simulations played per batch, which bounds the memory of a run.
+CHUNK = 250_000
+# Strengths are kept this far from 0 and 1 so that every game can go either way.
+EPSILON = 1e-6
+
+
+def game_probability(strength) -> np.ndarray:
+    """(teams, teams) chance that the row team beats the column team in one game (log5)."""
+    s = np.clip(np.asarray(strength, dtype=np.float64), EPSILON, 1 - EPSILON)
+    a, b = s[:, None], s[None, :]
+    return a * (1 - b) / (a * (1 - b) + b * (1 - a))
+
+
+def series_probability(p, wins: int):
+    """Chance of taking a series first to `wins` wins, from the chance `p` of winning each game."""
+    p = np.asarray(p, dtype=np.float64)
+    # Win the last game after exactly k losses, for every k the series allows.
+    return sum(math.comb(wins - 1 + k, k) * p ** wins * (1 - p) ** k for k in range(wins))
+
+
+def _bracket_slots(seeds: np.ndarray, conf: np.ndarray, n_conf: int) -> np.ndarray:
+    """(simulations, conferences * len(BRACKET)) team index of every bracket slot, conference by conference."""
+    position = np.full(max(BRACKET) + 1, -1)
+    position[list(BRACKET)] = np.arange(len(BRACKET))
+    qualified = (seeds >= 1) & (seeds <= max(BRACKET))
+    rows, teams = np.nonzero(qualified)
+    slots = np.full((len(seeds), n_conf * len(BRACKET)), -1)
+    slots[rows, conf[teams] * len(BRACKET) + position[seeds[rows, teams]]] = teams
+    if (slots < 0).any() or (qualified.sum(axis=1) != slots.shape[1]).any():
+        raise ValueError(f"Every conference needs exactly one team of each seed {sorted(BRACKET)}")
+    return slots
+
+
+def simulate_bracket(strength, conf, seeds, n_sims: int = 1_000_000, series_wins: dict = SERIES_WINS,
+                     random_state: int = 0, chunk: int = CHUNK) -> np.ndarray:
+    """
+    Plays the bracket `n_sims` times (once per row of `seeds` when it has one row per simulation)
+    and returns, as a (len(ROUNDS) + 1, teams) array, the chance of every team playing each round
+    and of winning the title. Seeds must be unique within a conference; NaN or seeds past the
+    bracket miss the playoffs.
+    """
+    strength = np.asarray(strength, dtype=np.float64)
+    conf, conferences = pd.factorize(np.asarray(conf), sort=True)
+    if len(conferences) != 2:
+        raise ValueError(f"The bracket needs two conferences, got {len(conferences)}")
+    seeds = np.nan_to_num(np.asarray(seeds, dtype=np.float64), nan=0).astype(np.int64)
+    if seeds.ndim == 2:
+        n_sims = len(seeds)
+
+    game = game_probability(strength)
+    series = {rnd: series_probability(game, series_wins[rnd]) for rnd in ROUNDS}
+    rng = np.random.default_rng(random_state)
+    counts = np.zeros((len(ROUNDS) + 1, len(strength)), dtype=np.int64)
+
+    for start in range(0, n_sims, chunk):
+        size = min(chunk, n_sims - start)
+        block = seeds[start:start + size] if seeds.ndim == 2 else np.broadcast_to(seeds, (size, len(seeds)))
+        alive = _bracket_slots(block, conf, len(conferences))
+        for i, rnd in enumerate(ROUNDS):
+            counts[i] += np.bincount(alive.ravel(), minlength=len(strength))
+            # Neighbouring slots meet; the first of each pair wins with its series probability.
+            first, second = alive[:, 0::2], alive[:, 1::2]
+            alive = np.where(rng.random(first.shape) < series[rnd][first, second], first, second)
+        counts[-1] += np.bincount(alive.ravel(), minlength=len(strength))
+    return counts / n_sims
+
+
+def playoff_odds(teams: pd.DataFrame, n_sims: int = 1_000_000, strength: str = "strength", seed: str = "seed",
+                 conf: str = "confID", seeds=None, **kwargs) -> pd.DataFrame:
+    """
+    `teams` with the chance of playing every round of ROUNDS and of winning the title added as
+    columns ("FR", "CF", "F", "title"). `seeds` overrides the seed column, for instance with one
+    row of simulated conference ranks per simulation; other arguments go to simulate_bracket.
+    """
+    probabilities = simulate_bracket(teams[strength], teams[conf], teams[seed] if seeds is None else seeds,
+                                     n_sims, **kwargs)
+    odds = teams.reset_index(drop=True)
+    for name, values in zip([*ROUNDS, "title"], probabilities):
+        odds[name] = values
+    return odds
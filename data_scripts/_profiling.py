@@ -0,0 +1,354 @@
+"""
+Opt-in timing and memory instrumentation of the data_scripts functions.
+
+Every public function of the data_scripts modules (and the public methods of their classes) is
+wrapped to record calls, wall and CPU time, peak traced allocation and the rows of the DataFrames
+and Series going in and out. Nothing is wrapped unless profiling is switched on, so a normal run
+pays nothing.
+
+Inside Python:
+
+    from data_scripts import _profiling as pf
+
+    with pf.profiling(jsonl="profile.jsonl", memory=True) as prof:
+        sd.read_and_store_data()
+        td.fix_missing_values()
+    print(prof.flame())
+    prof.summary()
+
+For a whole run (script or notebook kernel), set the environment before data_scripts is imported:
+
+    DATA_SCRIPTS_PROFILE=profile.jsonl DATA_SCRIPTS_PROFILE_MEMORY=1 python script.py
+
+The flame summary is printed to stderr at exit ("1" instead of a path skips the JSON lines).
+Each JSON line is one finished call; `python -m data_scripts._profiling profile.jsonl` rebuilds
+the summary from such a file.
+"""
+import argparse
+import atexit
+import functools
+import importlib.abc
+import importlib.machinery
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+PACKAGE = __name__.rsplit(".", 1)[0]
+
+
+def _rows(value):
+    """Rows of a DataFrame / Series, summed over tuples and lists of them; None when there are none."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        counts = [len(item) for item in value if isinstance(item, (pd.DataFrame, pd.Series))]
+        return sum(counts) if counts else None
+    return None
+
+
+class Profiler:
+    """
+    Collects the calls of instrumented functions. Statistics are aggregated per call stack
+    ("teams_data.fix_missing_values;_store_data.load_data"), which is what flame() and collapsed()
+    draw; summary() folds them per function. With `memory`, tracemalloc runs for the lifetime of
+    the profiler and peak_bytes is the peak allocation above what was live when the call started.
+    CPU time is process time, so calls that overlap in threads are charged each other's work.
+    """
+
+    def __init__(self, jsonl: str = None, memory: bool = False):
+        self.memory = memory
+        self.stacks = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._finder = None
+        self._file = open(jsonl, "a") if jsonl else None
+        self._started_tracing = memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def call(self, func, name: str, args: tuple, kwargs: dict):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        frame = {"path": f"{parent['path']};{name}" if parent else name, "child_wall": 0.0, "peak_seen": 0}
+
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent:
+                parent["peak_seen"] = max(parent["peak_seen"], peak)
+            tracemalloc.reset_peak()
+            frame["base"] = current
+
+        stack.append(frame)
+        error = None
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as e:
+            result, error = None, type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            stack.pop()
+            peak_bytes = None
+            if tracing and tracemalloc.is_tracing():
+                peak = max(tracemalloc.get_traced_memory()[1], frame["peak_seen"])
+                peak_bytes = max(0, peak - frame["base"])
+                if parent:
+                    parent["peak_seen"] = max(parent["peak_seen"], peak)
+            if parent:
+                parent["child_wall"] += wall
+
+            rows_in = [_rows(value) for value in (*args, *kwargs.values())]
+            rows_in = [count for count in rows_in if count is not None]
+            self._record({
+                "function": name,
+                "stack": frame["path"],
+                "depth": len(stack),
+                "wall_s": wall,
+                "self_s": wall - frame["child_wall"],
+                "cpu_s": cpu,
+                "peak_bytes": peak_bytes,
+                "rows_in": sum(rows_in) if rows_in else None,
+                "rows_out": _rows(result),
+                "error": error,
+            })
+
+    def _record(self, event: dict):
+        with self._lock:
+            stats = self.stacks.get(event["stack"])
+            if stats is None:
+                stats = self.stacks[event["stack"]] = {
+                    "function": event["function"], "calls": 0, "errors": 0, "wall_s": 0.0, "self_s": 0.0,
+                    "cpu_s": 0.0, "peak_bytes": None, "rows_in": None, "rows_out": None,
+                }
+            stats["calls"] += 1
+            stats["errors"] += event["error"] is not None
+            for key in ("wall_s", "self_s", "cpu_s"):
+                stats[key] += event[key]
+            if event["peak_bytes"] is not None:
+                stats["peak_bytes"] = max(stats["peak_bytes"] or 0, event["peak_bytes"])
+            for key in ("rows_in", "rows_out"):
+                if event[key] is not None:
+                    stats[key] = (stats[key] or 0) + event[key]
+            if self._file is not None:
+                self._file.write(json.dumps({"time": time.time(), **event}) + "\n")
+
+    def summary(self) -> pd.DataFrame:
+        """One row per function, slowest first. Wall time of recursive calls is counted at every level."""
+        return summary_table(self.stacks)
+
+    def flame(self, min_share: float = 0.005, width: int = 30) -> str:
+        return flame_text(self.stacks, min_share, width)
+
+    def collapsed(self) -> str:
+        return collapsed_text(self.stacks)
+
+
+def summary_table(stacks: dict) -> pd.DataFrame:
+    columns = ["calls", "errors", "wall_s", "self_s", "cpu_s", "peak_bytes", "rows_in", "rows_out"]
+    if not stacks:
+        return pd.DataFrame(columns=["function", *columns])
+    df = pd.DataFrame(list(stacks.values()))
+    table = df.groupby("function").agg(
+        calls=("calls", "sum"), errors=("errors", "sum"), wall_s=("wall_s", "sum"), self_s=("self_s", "sum"),
+        cpu_s=("cpu_s", "sum"), peak_bytes=("peak_bytes", "max"),
+    )
+    # Functions that never took or returned a frame keep NaN rows rather than 0.
+    table[["rows_in", "rows_out"]] = df.groupby("function")[["rows_in", "rows_out"]].sum(min_count=1)
+    table["rows_per_s"] = table["rows_in"] / table["wall_s"]
+    return table.sort_values("wall_s", ascending=False).reset_index()
+
+
+def collapsed_text(stacks: dict) -> str:
+    """Self time per stack in microseconds, in the folded format of flamegraph.pl and speedscope."""
+    return "\n".join(f"{path} {round(stats['self_s'] * 1e6)}" for path, stats in sorted(stacks.items()))
+
+
+def flame_text(stacks: dict, min_share: float = 0.005, width: int = 30) -> str:
+    """
+    The call tree as indented text, children under their caller sorted by wall time, with a bar
+    proportional to the share of the total. Stacks below `min_share` of the total are left out.
+    """
+    total = sum(stats["wall_s"] for path, stats in stacks.items() if ";" not in path)
+    if not total:
+        return "(no instrumented calls)"
+
+    children = {}
+    for path in stacks:
+        children.setdefault(path.rpartition(";")[0], []).append(path)
+
+    lines = [f"{'wall s':>9} {'self s':>9} {'calls':>7}  {'peak MB':>8}  function"]
+
+    def walk(parent, depth):
+        for path in sorted(children.get(parent, []), key=lambda p: -stacks[p]["wall_s"]):
+            stats = stacks[path]
+            share = stats["wall_s"] / total
+            if share < min_share:
+                continue
+            peak = f"{stats['peak_bytes'] / 2**20:8.1f}" if stats["peak_bytes"] is not None else f"{'':8}"
+            bar = "#" * max(1, round(share * width))
+            lines.append(f"{stats['wall_s']:9.3f} {stats['self_s']:9.3f} {stats['calls']:7d}  {peak}  "
+                         f"{'  ' * depth}{stats['function']}  {bar}")
+            walk(path, depth + 1)
+
+    walk("", 0)
+    return "\n".join(lines)
+
+
+def read_jsonl(path: str) -> dict:
+    """Aggregates the calls of a JSON lines file into the per stack statistics of Profiler.stacks."""
+    profiler = Profiler()
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                profiler._record(json.loads(line))
+    return profiler.stacks
+
+
+def _wrap(func, name: str, profiler: Profiler):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return profiler.call(func, name, args, kwargs)
+    wrapper._profiled = func
+    return wrapper
+
+
+def _instrumentable(obj, module_name: str) -> bool:
+    return (inspect.isfunction(obj) and obj.__module__ == module_name
+            and not hasattr(obj, "_profiled") and not hasattr(obj, "__wrapped__"))
+
+
+def instrument_module(module, profiler: Profiler) -> list:
+    """
+    Wraps the public functions defined in `module`, and the public methods and __init__ of its
+    public classes. Callers that look functions up through the module (sd.load_data, or a plain
+    call from the same module) go through the wrappers. Returns the instrumented names.
+    """
+    short = module.__name__.rsplit(".", 1)[-1]
+    names = []
+    for attr, obj in list(vars(module).items()):
+        if attr.startswith("_"):
+            continue
+        if _instrumentable(obj, module.__name__):
+            setattr(module, attr, _wrap(obj, f"{short}.{attr}", profiler))
+            names.append(attr)
+        elif inspect.isclass(obj) and obj.__module__ == module.__name__:
+            for method, func in list(vars(obj).items()):
+                if (method == "__init__" or not method.startswith("_")) and _instrumentable(func, module.__name__):
+                    label = f"{short}.{obj.__qualname__}" + ("" if method == "__init__" else f".{method}")
+                    setattr(obj, method, _wrap(func, label, profiler))
+                    names.append(f"{attr}.{method}")
+    return names
+
+
+def uninstrument_module(module):
+    for attr, obj in list(vars(module).items()):
+        if hasattr(obj, "_profiled"):
+            setattr(module, attr, obj._profiled)
+        elif inspect.isclass(obj) and obj.__module__ == module.__name__:
+            for method, func in list(vars(obj).items()):
+                if hasattr(func, "_profiled"):
+                    setattr(obj, method, func._profiled)
+
+
+def _package_modules():
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and name.startswith(PACKAGE + ".") and name != __name__]
+
+
+class _InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """Instruments the data_scripts modules imported while profiling is on, right after they run."""
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    def find_spec(self, name, path, target=None):
+        if not name.startswith(PACKAGE + ".") or name == __name__:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path, target)
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        exec_module, profiler = spec.loader.exec_module, self.profiler
+
+        def exec_and_instrument(module):
+            exec_module(module)
+            instrument_module(module, profiler)
+        spec.loader.exec_module = exec_and_instrument
+        return spec
+
+
+def enable(jsonl: str = None, memory: bool = False) -> Profiler:
+    """Instruments every data_scripts module, loaded now or later, until disable() is called."""
+    profiler = Profiler(jsonl, memory)
+    profiler._finder = _InstrumentingFinder(profiler)
+    sys.meta_path.insert(0, profiler._finder)
+    for module in _package_modules():
+        instrument_module(module, profiler)
+    return profiler
+
+
+def disable(profiler: Profiler):
+    if profiler._finder is not None and profiler._finder in sys.meta_path:
+        sys.meta_path.remove(profiler._finder)
+    for module in _package_modules():
+        uninstrument_module(module)
+    profiler.close()
+
+
+@contextmanager
+def profiling(jsonl: str = None, memory: bool = False):
+    """Profiles the data_scripts calls made inside the block; the originals are restored afterwards."""
+    profiler = enable(jsonl, memory)
+    try:
+        yield profiler
+    finally:
+        disable(profiler)
+
+
+def enable_from_env() -> Profiler:
+    """Used by data_scripts/__init__.py when DATA_SCRIPTS_PROFILE is set."""
+    target = os.environ["DATA_SCRIPTS_PROFILE"]
+    memory = os.environ.get("DATA_SCRIPTS_PROFILE_MEMORY", "") not in ("", "0")
+    profiler = enable(None if target == "1" else target, memory)
+
+    def report():
+        print(profiler.flame(), file=sys.stderr)
+        disable(profiler)
+    atexit.register(report)
+    return profiler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jsonl", help="JSON lines written by a profiled run")
+    parser.add_argument("--collapsed", action="store_true", help="print folded stacks for flamegraph.pl / speedscope")
+    parser.add_argument("--min-share", type=float, default=0.005)
+    args = parser.parse_args()
+
+    stacks = read_jsonl(args.jsonl)
+    if args.collapsed:
+        print(collapsed_text(stacks))
+    else:
+        print(flame_text(stacks, args.min_share))
+        print()
+        print(summary_table(stacks).to_string(index=False))
@@ -0,0 +1,180 @@
+"""
+Learning-to-rank of the conference standings.
+
+teams_ranking_prediction regresses the rank of every team and then orders the predictions inside
+each conference. The rankers of _models.ranker_models learn the order itself instead: LightGBM
+with the lambdarank objective and CatBoost with YetiRank, every (year, confID) being one query
+group and the label of a team its relevance (how many teams of its conference finished below it).
+
+rank_backtest fits every test year and model in one batched call, concurrently on a thread pool,
+then ranks the predictions of all years and conferences at once and scores them (NDCG, Spearman,
+MAE, accuracy) without a loop over conferences. Regressors such as those of _models.rank_models
+can be passed along for comparison; their score is the negated predicted rank.
+
+    from data_scripts import _ranking as rk
+
+    predictions, metrics = rk.rank_backtest(years=range(7, 11))
+    rk.rank_distribution(predictions)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRanker
+from lightgbm import LGBMRanker
+from sklearn.base import clone
+
+from data_scripts import _backtest as bt
+from data_scripts import _ensemble as en
+from data_scripts import _models as md
+
+GROUP = ["year", "confID"]
+
+
+def is_ranker(model) -> bool:
+    return isinstance(model, (LGBMRanker, CatBoostRanker))
+
+
+def relevance(df: pd.DataFrame, target: str = "rank") -> np.ndarray:
+    """Relevance label of every row: the worst rank of its (year, confID) minus its own rank."""
+    worst = df.groupby(GROUP)[target].transform("max")
+    return (worst - df[target]).to_numpy(dtype=np.int64)
+
+
+def _window(df: pd.DataFrame, year: int, features: list, target: str):
+    """Complete training rows of the TRAIN_YEARS seasons before `year`, sorted by query group, and the rows of `year`."""
+    train = df[df["year"].between(year - bt.TRAIN_YEARS, year - 1)].dropna(subset=features + [target])
+    train = train.sort_values(GROUP, kind="stable")
+    test = df[df["year"] == year]
+    return train, test, test[features].fillna(train[features].mean()).to_numpy(dtype=np.float64)
+
+
+def _fit(model, train: pd.DataFrame, features: list, target: str):
+    X = train[features].to_numpy(dtype=np.float64)
+    if isinstance(model, LGBMRanker):
+        model.fit(X, relevance(train, target), group=train.groupby(GROUP).size().to_numpy())
+    elif isinstance(model, CatBoostRanker):
+        model.fit(X, relevance(train, target), group_id=train.groupby(GROUP).ngroup().to_numpy())
+    else:
+        model.fit(X, train[target].to_numpy(dtype=np.float64))
+    return model
+
+
+def _score(model, X: np.ndarray) -> np.ndarray:
+    """Higher is better: the ranker score, or the negated rank predicted by a regressor."""
+    scores = np.asarray(model.predict(X), dtype=np.float64).ravel()
+    return scores if is_ranker(model) else -scores
+
+
+def rank_backtest(df: pd.DataFrame = None, years=range(7, 11), models: dict = None, threads: int = None,
+                  data_dir=None):
+    """
+    Fits every model of `models` (the rankers of _models by default) for every test year on the
+    TRAIN_YEARS seasons before it and ranks the teams of every (year, confID).
+
+    Returns the predictions, one row per team and year with the actual rank and the score and
+    predicted rank of every model ("<model>_Score", "<model>_Rank"), and the metrics of every
+    year, conference and model (see ranking_metrics).
+    """
+    spec = md.DATASETS["teams"]
+    features, target = spec["features"], spec["target"]
+    df = md.load_team_history(data_dir) if df is None else df
+    models = models or md.ranker_models()
+
+    windows = {int(year): _window(df, int(year), features, target) for year in years}
+    jobs = [(year, name) for year, (train, test, _) in windows.items() if len(train) and len(test) for name in models]
+    threads = threads or os.cpu_count() or 1
+    per_job = max(1, threads // max(1, len(jobs)))
+
+    def fit(year, name):
+        return _fit(en.set_threads(clone(models[name]), per_job), windows[year][0], features, target)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), threads))) as pool:
+        futures = {job: pool.submit(fit, *job) for job in jobs}
+        fitted = {job: future.result() for job, future in futures.items()}
+
+    tests = [test for _, test, _ in windows.values()]
+    predictions = pd.concat(tests)[[*GROUP, "tmID", target]].reset_index(drop=True)
+    scores = np.full((len(models), len(predictions)), np.nan)
+    start = 0
+    for year, (_, test, X_test) in windows.items():
+        for i, name in enumerate(models):
+            if (year, name) in fitted:
+                scores[i, start:start + len(test)] = _score(fitted[(year, name)], X_test)
+        start += len(test)
+
+    # Every model, year and conference ranked at once; the highest score ranks first.
+    groups = predictions.groupby(GROUP).ngroup().to_numpy()
+    ranks = en.rank_matrix(scores, groups=groups, method="first")
+    for name, model_scores, model_ranks in zip(models, scores, ranks):
+        predictions[f"{name}_Score"] = model_scores
+        predictions[f"{name}_Rank"] = model_ranks
+    return predictions, ranking_metrics(predictions, list(models), target)
+
+
+def _group_sums(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Sum of every row of `values` (models, rows) within every group, as (models, groups)."""
+    offsets = (np.arange(values.shape[0]) * n_groups)[:, None]
+    sums = np.bincount((codes + offsets).ravel(), weights=values.ravel(), minlength=values.shape[0] * n_groups)
+    return sums.reshape(values.shape[0], n_groups)
+
+
+def ranking_metrics(predictions: pd.DataFrame, models: list, target: str = "rank") -> pd.DataFrame:
+    """
+    NDCG (linear gains, the relevance of rank_backtest), Spearman correlation, MAE and accuracy of
+    the predicted ranks of every model in every (year, confID), from the "<model>_Rank" columns.
+    Rows without an actual rank are left out.
+    """
+    known = predictions[predictions[target].notna()]
+    keys = known[GROUP].drop_duplicates().sort_values(GROUP).reset_index(drop=True)
+    codes = known.groupby(GROUP).ngroup().to_numpy()
+    n_groups = len(keys)
+    size = np.bincount(codes, minlength=n_groups)
+
+    actual = known[target].to_numpy(dtype=np.float64)
+    # Predicted positions among the rows that have an actual rank, and the ideal ones.
+    predicted = en.rank_matrix(known[[f"{name}_Rank" for name in models]].to_numpy(dtype=np.float64).T,
+                               ascending=True, groups=codes, method="first")
+    ideal = en.rank_matrix(actual, ascending=True, groups=codes, method="first")
+    gain = (pd.Series(actual).groupby(codes).transform("max").to_numpy() - actual)[None, :]
+
+    dcg = _group_sums(gain / np.log2(predicted + 1), codes, n_groups)
+    ideal_dcg = _group_sums(gain / np.log2(ideal + 1), codes, n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ndcg = np.where(ideal_dcg > 0, dcg / ideal_dcg, np.nan)
+
+    # Spearman: the Pearson correlation of the (average) ranks within each group.
+    x = en.rank_matrix(actual, ascending=True, groups=codes)
+    y = en.rank_matrix(predicted, ascending=True, groups=codes)
+    mean_x, mean_y = _group_sums(x, codes, n_groups) / size, _group_sums(y, codes, n_groups) / size
+    dx, dy = x - mean_x[:, codes], y - mean_y[:, codes]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spearman = _group_sums(dx * dy, codes, n_groups) / np.sqrt(
+            _group_sums(dx ** 2, codes, n_groups) * _group_sums(dy ** 2, codes, n_groups))
+
+    mae = _group_sums(np.abs(predicted - actual), codes, n_groups) / size
+    accuracy = _group_sums((predicted == actual).astype(np.float64), codes, n_groups) / size
+
+    metrics = keys.loc[np.tile(np.arange(n_groups), len(models))].reset_index(drop=True)
+    metrics["model"] = np.repeat(np.asarray(models, dtype=object), n_groups)
+    for name, values in {"NDCG": ndcg, "Spearman": spearman, "MAE": mae, "Accuracy": accuracy}.items():
+        metrics[name] = values.ravel()
+    return metrics
+
+
+def rank_distribution(predictions: pd.DataFrame, models: list = None, target: str = "rank") -> pd.DataFrame:
+    """
+    For every conference and model, how often a team that finished at each rank was predicted at
+    each rank, over all the years of `predictions`: one row per (confID, model, rank, predicted_rank)
+    with the count and its share of the teams that finished at that rank.
+    """
+    models = models or [column[:-len("_Rank")] for column in predictions.columns if column.endswith("_Rank")]
+    known = predictions[predictions[target].notna()]
+    long = known.melt(id_vars=["confID", target], value_vars=[f"{name}_Rank" for name in models],
+                      var_name="model", value_name="predicted_rank")
+    long["model"] = long["model"].str[:-len("_Rank")]
+    counts = long.groupby(["confID", "model", target, "predicted_rank"], sort=True).size().rename("count")
+    counts = counts.reset_index()
+    counts["share"] = counts["count"] / counts.groupby(["confID", "model", target])["count"].transform("sum")
+    return counts
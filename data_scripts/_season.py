@@ -0,0 +1,91 @@
+"""
+Monte Carlo simulation of the regular season and the conference seeding it produces.
+
+Every team's win total is drawn from a binomial of its games and its predicted chance of winning
+a game, for many seasons at once, and the teams are ranked by wins within their conference
+(teams_data.regular_season_ranks ranks the real seasons the same way) by one grouped rank_matrix
+call over all the simulated seasons. The (seasons, teams) rank matrix gives the chance of every
+team finishing at each rank and of reaching the playoffs, and its rows can be played as brackets
+by _playoffs.
+
+Win totals are drawn independently per team, so the simulated wins of a season need not add up
+to its games played; there is no schedule to pair the teams game by game.
+
+    from data_scripts import _playoffs as po
+    from data_scripts import _season as ss
+
+    wins, ranks = ss.simulate_season(teams["win_prob"], teams["confID"], n_sims=100_000)
+    ss.season_odds(teams)                      # chance of every rank and of the playoffs
+    po.playoff_odds(teams, seeds=ranks)        # title odds over the simulated seedings
+"""
+import numpy as np
+import pandas as pd
+
+from data_scripts import _ensemble as en
+from data_scripts import _playoffs as po
+
+# Games of a regular season since year 4 (32 before).
+GAMES = 34
+# Teams of each conference that reach the playoffs.
+PLAYOFF_SEEDS = max(po.BRACKET)
+# Seasons simulated per batch, which bounds the memory of a run.
+CHUNK = 100_000
+
+
+def simulate_season(win_prob, conf, games=GAMES, n_sims: int = 100_000, ties: str = "random",
+                    random_state: int = 0, chunk: int = CHUNK):
+    """
+    Win totals and conference ranks (1 = most wins) of every team in `n_sims` simulated seasons,
+    as two (n_sims, teams) arrays. `games` is one number or one per team. Teams level on wins are
+    ordered at random with `ties` "random", so every rank is held by one team and the rows can
+    seed a bracket; any other `ties` is a rank_matrix method ("dense" like regular_season_ranks,
+    "average" or "first").
+    """
+    win_prob = np.clip(np.asarray(win_prob, dtype=np.float64), 0, 1)
+    games = np.broadcast_to(np.asarray(games, dtype=np.int64), win_prob.shape)
+    conf = en.group_codes(np.asarray(conf), len(win_prob))
+    rng = np.random.default_rng(random_state)
+
+    wins = np.empty((n_sims, len(win_prob)), dtype=np.int32)
+    ranks = np.empty((n_sims, len(win_prob)))
+    for start in range(0, n_sims, chunk):
+        size = min(chunk, n_sims - start)
+        block = rng.binomial(games, win_prob, size=(size, len(win_prob)))
+        wins[start:start + size] = block
+        if ties == "random":
+            # A uniform fraction below 1 breaks the ties without reordering different win totals.
+            ranks[start:start + size] = en.rank_matrix(block + rng.random(block.shape), groups=conf, method="first")
+        else:
+            ranks[start:start + size] = en.rank_matrix(block, groups=conf, method=ties)
+    return wins, ranks
+
+
+def rank_probabilities(ranks: np.ndarray) -> np.ndarray:
+    """(teams, ranks) chance of every team finishing at each rank, from simulate_season's ranks."""
+    n_sims, n_teams = ranks.shape
+    n_ranks = int(np.nanmax(ranks))
+    # An average rank of tied teams (2.5) is counted at its whole part.
+    index = np.arange(n_teams) * n_ranks + np.floor(ranks).astype(np.int64) - 1
+    return np.bincount(index.ravel(), minlength=n_teams * n_ranks).reshape(n_teams, n_ranks) / n_sims
+
+
+def playoff_probability(ranks: np.ndarray, seeds: int = PLAYOFF_SEEDS) -> np.ndarray:
+    """Chance of every team finishing in the first `seeds` places of its conference."""
+    return (ranks <= seeds).mean(axis=0)
+
+
+def season_odds(teams: pd.DataFrame, n_sims: int = 100_000, win_prob: str = "win_prob", conf: str = "confID",
+                games: str = None, **kwargs) -> pd.DataFrame:
+    """
+    `teams` with the expected wins, the chance of every conference rank ("rank_1", "rank_2", ...)
+    and of reaching the playoffs added as columns. `games` names a column of games per team
+    (GAMES for all without it); other arguments go to simulate_season.
+    """
+    wins, ranks = simulate_season(teams[win_prob], teams[conf], GAMES if games is None else teams[games],
+                                  n_sims, **kwargs)
+    odds = teams.reset_index(drop=True)
+    odds["expected_wins"] = wins.mean(axis=0)
+    for rank, values in enumerate(rank_probabilities(ranks).T, start=1):
+        odds[f"rank_{rank}"] = values
+    odds["playoffs"] = playoff_probability(ranks)
+    return odds
@@ -0,0 +1,268 @@
+"""
+Long-running local prediction service.
+
+At startup the prediction datasets are loaded and, for the requested years, every dataset gets
+the model test_data_prediction uses for it, with the same hyperparameters, the same missing values
+filled with 0 and the same TRAIN_YEARS training window (fitted through _model_cache). Queries are
+then lookups into precomputed score tables:
+
+    python -m data_scripts._service --port 8765 --years 10 11
+
+    POST /predict  {"type": "top_k", "dataset": "mvp", "year": 11, "k": 3}
+                   {"type": "team_rank", "team": "ATL", "year": 11}
+                   {"type": "coach_change_risk", "team": "ATL", "year": 11}
+    A JSON list of queries is answered as one batch, in order.
+    GET /health
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from catboost import CatBoostClassifier
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from data_scripts import _backtest as bt
+from data_scripts import _model_cache as mc
+from data_scripts import _models as md
+
+# Model used for every dataset, as chosen in test_data_prediction.
+SERVICE_MODELS = {
+    "mvp": "Logistic Regression",
+    "defensive": "Logistic Regression",
+    "rookie": "CatBoostClassifier",
+    "mip": "XGBClassifier",
+    "kpsa": "CatBoostClassifier",
+    "sixth": "CatBoostClassifier",
+    "finals_mvp": "Logistic Regression",
+    "allstar_mvp": "Logistic Regression",
+    "coach": "XGBClassifier",
+    "coach_turnover": "XGBClassifier",
+    "teams": "RandomForest",
+}
+
+
+def test_data_model(model_name: str, threads: int = None):
+    """
+    A fresh `model_name` estimator with the hyperparameters test_data_prediction fits, which are not
+    those of the backtest models in _models.build_models.
+    """
+    if model_name == "Logistic Regression":
+        return Pipeline([("scaler", StandardScaler()), ("model", LogisticRegression(
+            C=1.0, penalty="l2", solver="lbfgs", max_iter=1000, class_weight="balanced"
+        ))])
+    if model_name == "XGBClassifier":
+        return XGBClassifier(
+            n_estimators=500, learning_rate=0.05, max_depth=5, subsample=0.8, colsample_bytree=0.7,
+            eval_metric="logloss", n_jobs=threads
+        )
+    if model_name == "CatBoostClassifier":
+        return CatBoostClassifier(
+            depth=4, learning_rate=0.05, iterations=500, loss_function="Logloss", verbose=False,
+            thread_count=threads or -1, allow_writing_files=False
+        )
+    if model_name == "RandomForest":
+        return RandomForestRegressor(
+            n_estimators=200, max_depth=4, min_samples_split=2, max_features="sqrt", random_state=md.RANDOM_STATE,
+            n_jobs=threads
+        )
+    raise ValueError(f"Unknown model '{model_name}', expected one of {sorted(set(SERVICE_MODELS.values()))}")
+
+
+class PredictionService:
+    """
+    Holds one score table per (dataset, year): the ids of the rows of that year, their scores and
+    their rank (descending probability, or predicted conference rank for teams). Tables for years
+    that were not warmed up are built on first use.
+    """
+
+    def __init__(self, years=(11,), datasets: list = None, models: dict = None, threads: int = None):
+        self.models = {**SERVICE_MODELS, **(models or {})}
+        self.datasets = list(datasets or self.models)
+        self.threads = threads
+        self._frames = {}
+        self._tables = {}
+        self._lock = threading.Lock()
+
+        for name in self.datasets:
+            test_data_model(self.models[name])  # unknown model names fail here, not on the first query
+            # Every missing value is 0, as in test_data_prediction (the year-11 ranks included).
+            self._frames[name] = pd.read_csv(md.PREDICT_DIR / md.DATASETS[name]["file"]).fillna(0)
+
+        for name in self.datasets:
+            for year in years:
+                self.table(name, year)
+
+    def table(self, name: str, year: int) -> dict:
+        key = (name, int(year))
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    table = self._tables[key] = self._build_table(name, int(year))
+        return table
+
+    def _build_table(self, name: str, year: int) -> dict:
+        if name not in self._frames:
+            raise KeyError(f"Unknown dataset '{name}', expected one of {self.datasets}")
+        spec = md.DATASETS[name]
+        kind = spec["kind"]
+        df = self._frames[name]
+        if kind == "rank":
+            df = md.add_weighted_history(df, test_year=year)
+        features = spec["features"]
+        train = df[df["year"].between(year - bt.TRAIN_YEARS, year - 1)].dropna(subset=features + [spec["target"]])
+        test = df[df["year"] == year]
+        if kind == "rank":
+            # The history of a team's first season is missing: it gets the training means.
+            train = train.sort_values(["year", spec["group"]])
+            test = test.fillna({column: train[column].mean() for column in features})
+        if len(test) == 0 or len(train) == 0:
+            raise KeyError(f"No {name} predictions for year {year}")
+
+        model = mc.fit_cached(test_data_model(self.models[name], self.threads),
+                              train[features], train[spec["target"]])
+        scores = bt.predict_scores(model, kind, test[features])
+
+        if kind == "rank":
+            groups = test[spec["group"]].to_numpy()
+            rank = pd.Series(scores).groupby(groups).rank(method="first").to_numpy().astype(int)
+        else:
+            groups = None
+            rank = pd.Series(scores).rank(ascending=False, method="first").to_numpy().astype(int)
+
+        ids = test[spec["id"]].astype(str).to_numpy()
+        return {
+            "ids": ids,
+            "scores": scores,
+            "rank": rank,
+            "groups": groups,
+            "order": np.argsort(rank, kind="stable"),
+            "row_of": {id_: i for i, id_ in enumerate(ids)},
+        }
+
+    def top_k(self, dataset: str, year: int, k: int = 3) -> list:
+        table = self.table(dataset, year)
+        return [{"id": table["ids"][i], "probability": float(table["scores"][i]), "rank": int(table["rank"][i])}
+                for i in table["order"][:k]]
+
+    def _team_row(self, dataset: str, team: str, year: int):
+        table = self.table(dataset, year)
+        row = table["row_of"].get(team)
+        if row is None:
+            raise KeyError(f"Team '{team}' has no {dataset} prediction for year {year}")
+        return table, row
+
+    def team_rank(self, team: str, year: int) -> dict:
+        table, row = self._team_row("teams", team, year)
+        return {"team": team, "confID": int(table["groups"][row]), "predicted_rank": int(table["rank"][row]),
+                "score": float(table["scores"][row])}
+
+    def coach_change_risk(self, team: str, year: int) -> dict:
+        table, row = self._team_row("coach_turnover", team, year)
+        return {"team": team, "probability": float(table["scores"][row]), "rank": int(table["rank"][row])}
+
+    def answer(self, query: dict) -> dict:
+        if not isinstance(query, dict):
+            return {"error": f"A query is a JSON object, got {type(query).__name__}"}
+        try:
+            kind = query.get("type")
+            year = int(query.get("year", 11))
+            if kind == "top_k":
+                return {"result": self.top_k(query["dataset"], year, int(query.get("k", 3)))}
+            if kind == "team_rank":
+                return {"result": self.team_rank(query["team"], year)}
+            if kind == "coach_change_risk":
+                return {"result": self.coach_change_risk(query["team"], year)}
+            return {"error": f"Unknown query type '{kind}', expected 'top_k', 'team_rank' or 'coach_change_risk'"}
+        except (KeyError, ValueError, TypeError) as e:
+            return {"error": str(e)}
+
+    def answer_batch(self, queries: list) -> list:
+        """Answers queries in order; the score table of every (dataset, year) in the batch is built once up front."""
+        needed = set()
+        for query in queries:
+            if not isinstance(query, dict):
+                continue
+            dataset = {"team_rank": "teams", "coach_change_risk": "coach_turnover"}.get(query.get("type"), query.get("dataset"))
+            if dataset in self._frames:
+                needed.add((dataset, query.get("year", 11)))
+        for dataset, year in needed:
+            try:
+                self.table(dataset, year)
+            except (KeyError, ValueError, TypeError):
+                pass
+        return [self.answer(query) for query in queries]
+
+
+def make_handler(service: PredictionService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; with Nagle on, keep-alive clients wait on the delayed ACK.
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", "tables": len(service._tables)})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError:
+                self._send(400, {"error": "invalid JSON"})
+                return
+            queries = payload if isinstance(payload, list) else [payload]
+            if not all(isinstance(query, dict) for query in queries):
+                self._send(400, {"error": "a query is a JSON object, and a batch a list of them"})
+            elif isinstance(payload, list):
+                self._send(200, service.answer_batch(payload))
+            else:
+                self._send(200, service.answer(payload))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(service: PredictionService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Creates the HTTP server; call serve_forever() on it (or run it in a thread)."""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--years", type=int, nargs="+", default=[11], help="years to precompute at startup")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = PredictionService(years=args.years)
+    print(f"Loaded {len(service._tables)} score tables in {time.perf_counter() - start:.1f}s, "
+          f"serving on http://{args.host}:{args.port}")
+    serve(service, args.host, args.port).serve_forever()
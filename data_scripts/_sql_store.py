@@ -0,0 +1,224 @@
+"""
+Optional SQLite backend over the seven basketballPlayoffs tables.
+
+The analysis functions join the same tables on the same keys again and again (players_teams with
+awards_players on playerID/year, with players on playerID = bioID, coaches and players with teams
+on tmID/year), and every pandas merge rebuilds its hash table from scratch. build_database loads
+the tables once into a local SQLite file with composite indexes on those keys (INDEXES), so
+repeated queries, above all the ones restricted to a few players, teams or seasons, are answered
+from the indexes instead.
+
+The query API returns DataFrames: table reads one table, join joins two like pd.merge (same key
+handling and "_x"/"_y" suffixes) and the named queries below are the joins the data scripts use.
+Filters are keyword arguments on columns, a value or a list of values each:
+
+    from data_scripts import _sql_store as sq
+
+    sq.build_database()                                   # once, or when the CSVs change
+    sq.table("players_teams", playerID="abrossv01w")
+    sq.award_seasons(award="Rookie of the Year")          # awards_players_data.load_dataset's merge
+    sq.join("players_teams", "teams", on=["tmID", "year"], shift={"year": -1}, year=[5, 6])
+
+compare_query_paths times these queries against the pandas merges they replace. Queries that
+return whole tables stay faster in pandas, since SQLite hands every row back to be rebuilt into a
+DataFrame; the indexes pay off for the selective ones.
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from data_scripts import _store_data as sd
+
+DB_PATH = Path(os.environ.get("DATA_SCRIPTS_SQLITE", Path(__file__).resolve().parent.parent / ".sql_store" / "basketball.sqlite"))
+
+# Composite indexes of every table, on the keys the data scripts join and filter on.
+INDEXES = {
+    "awards_players": [("playerID", "year"), ("year", "award")],
+    "coaches": [("coachID", "year"), ("tmID", "year")],
+    "players_teams": [("playerID", "year"), ("tmID", "year")],
+    "players": [("bioID",)],
+    "series_post": [("year", "round"), ("tmIDWinner", "year"), ("tmIDLoser", "year")],
+    "teams_post": [("tmID", "year")],
+    "teams": [("tmID", "year"), ("year", "confID")],
+}
+
+# Open connections, by database path.
+_connections = {}
+
+
+def build_database(tables: dict = None, path: Path = None, data_dir=None) -> Path:
+    """
+    Writes `tables` (name -> DataFrame, the CSVs of `data_dir` by default) to the SQLite file at
+    `path`, replacing the tables already there, and creates their INDEXES.
+    """
+    path = Path(path or DB_PATH)
+    tables = tables if tables is not None else sd.read_tables(data_dir, compact=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    close(path)
+
+    with sqlite3.connect(path) as con:
+        con.execute("PRAGMA synchronous = OFF")
+        for name, df in tables.items():
+            # Categories go in as their values; SQLite has no dictionary type.
+            df = df.apply(lambda col: col.astype(object) if isinstance(col.dtype, pd.CategoricalDtype) else col)
+            df.to_sql(name, con, if_exists="replace", index=False)
+            for columns in INDEXES.get(name, []):
+                if set(columns) <= set(df.columns):
+                    con.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_{"_".join(columns)}" '
+                                f'ON "{name}" ({", ".join(_quote(c) for c in columns)})')
+        # Table statistics, so the query planner knows how selective every index is.
+        con.execute("ANALYZE")
+    return path
+
+
+def connect(path: Path = None) -> sqlite3.Connection:
+    """The open connection to the database at `path`, which must have been built (build_database)."""
+    path = Path(path or DB_PATH)
+    if path not in _connections:
+        if not path.exists():
+            raise FileNotFoundError(f"No SQLite database at {path}; create it with build_database()")
+        _connections[path] = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    return _connections[path]
+
+
+def close(path: Path = None):
+    con = _connections.pop(Path(path or DB_PATH), None)
+    if con is not None:
+        con.close()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def columns_of(name: str, path: Path = None) -> list:
+    return [row[1] for row in connect(path).execute(f"PRAGMA table_info({_quote(name)})")]
+
+
+def _where(filters: dict, alias: str = None):
+    """SQL condition and parameters of `filters` (column -> value or list of values) on table `alias`."""
+    prefix = f"{alias}." if alias else ""
+    conditions, params = [], []
+    for column, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set, range, pd.Series)) else [value]
+        conditions.append(f"{prefix}{_quote(column)} IN ({', '.join('?' * len(values))})")
+        params += [v.item() if hasattr(v, "item") else v for v in values]
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def query(sql: str, params=(), path: Path = None) -> pd.DataFrame:
+    """Runs any SELECT on the database and returns its rows."""
+    return pd.read_sql_query(sql, connect(path), params=list(params))
+
+
+def table(name: str, columns: list = None, path: Path = None, **filters) -> pd.DataFrame:
+    """The rows of table `name` matching `filters`, with only `columns` when given."""
+    select = ", ".join(_quote(c) for c in columns) if columns else "*"
+    where, params = _where(filters)
+    return query(f"SELECT {select} FROM {_quote(name)}{where}", params, path)
+
+
+def join(left: str, right: str, on, how: str = "inner", shift: dict = None, suffixes=("_x", "_y"),
+         path: Path = None, **filters) -> pd.DataFrame:
+    """
+    Joins tables `left` and `right` like pd.merge: `on` is a list of key columns shared by both or
+    a dict of left -> right key columns, `how` is "inner" or "left", and the other columns both
+    tables have get `suffixes`. `shift` offsets right keys from the left ones: {"year": -1} matches
+    every left row with the right row of the year before. `filters` apply to the left table.
+    """
+    if how not in ("inner", "left"):
+        raise ValueError(f"Unknown join '{how}', expected 'inner' or 'left'")
+    keys = dict(on) if isinstance(on, dict) else {column: column for column in on}
+    shift = shift or {}
+    left_columns, right_columns = columns_of(left, path), columns_of(right, path)
+
+    # Keys with the same name in both tables appear once, like in pd.merge.
+    shared_keys = {l for l, r in keys.items() if l == r}
+    overlap = (set(left_columns) & set(right_columns)) - shared_keys
+    select = [f"l.{_quote(c)} AS {_quote(c + suffixes[0] if c in overlap else c)}" for c in left_columns]
+    select += [f"r.{_quote(c)} AS {_quote(c + suffixes[1] if c in overlap else c)}" for c in right_columns
+               if c not in shared_keys]
+
+    condition = " AND ".join(f"r.{_quote(r)} = l.{_quote(l)}" + (f" + {shift[l]:d}" if shift.get(l) else "")
+                             for l, r in keys.items())
+    where, params = _where(filters, "l")
+    sql = (f"SELECT {', '.join(select)} FROM {_quote(left)} AS l "
+           f"{'LEFT ' if how == 'left' else ''}JOIN {_quote(right)} AS r ON {condition}{where}")
+    return query(sql, params, path)
+
+
+def award_seasons(path: Path = None, **filters) -> pd.DataFrame:
+    """Every award with the season of its player (awards_players_data.load_dataset's merged_players)."""
+    return join("awards_players", "players_teams", ["playerID", "year"], path=path, **filters)
+
+
+def player_bios(path: Path = None, **filters) -> pd.DataFrame:
+    """Every player season with the player's biography (players on bioID), like _proc_data.cleanPlayers."""
+    return join("players_teams", "players", {"playerID": "bioID"}, path=path, **filters)
+
+
+def coach_seasons(path: Path = None, **filters) -> pd.DataFrame:
+    """Every coach season with the season of its team."""
+    return join("coaches", "teams", ["tmID", "year"], path=path, **filters)
+
+
+def previous_team_seasons(path: Path = None, **filters) -> pd.DataFrame:
+    """
+    Every player season with the previous season of its team (NaN for a team's first season), as
+    awards_players_data.roty_rank_of_team matches the team rank of the year before.
+    """
+    return join("players_teams", "teams", ["tmID", "year"], how="left", shift={"year": -1}, path=path, **filters)
+
+
+# Left table and filter column of every named query, for compare_query_paths.
+NAMED_QUERIES = {
+    "award_seasons": (award_seasons, "awards_players", "playerID"),
+    "player_bios": (player_bios, "players_teams", "playerID"),
+    "coach_seasons": (coach_seasons, "coaches", "coachID"),
+    "previous_team_seasons": (previous_team_seasons, "players_teams", "playerID"),
+}
+
+
+def pandas_query(name: str, tables: dict, **filters) -> pd.DataFrame:
+    """The pandas merge path of the named query `name` on `tables`, the left table filtered first."""
+    left_name = NAMED_QUERIES[name][1]
+    left = tables[left_name]
+    for column, value in filters.items():
+        left = left[left[column].isin(value if isinstance(value, (list, tuple, set, range)) else [value])]
+    if name == "award_seasons":
+        return left.merge(tables["players_teams"], on=["playerID", "year"])
+    if name == "player_bios":
+        return left.merge(tables["players"], left_on="playerID", right_on="bioID")
+    if name == "coach_seasons":
+        return left.merge(tables["teams"], on=["tmID", "year"])
+    return left.merge(tables["teams"].assign(year=tables["teams"]["year"] + 1), on=["tmID", "year"], how="left")
+
+
+def compare_query_paths(data_dir=None, path: Path = None, repeat: int = 5, ids: int = 10) -> pd.DataFrame:
+    """
+    Median seconds of every named query, over the whole tables and restricted to `ids` players or
+    coaches, answered by pandas merges of the CSVs of `data_dir` and by the SQLite database built
+    from them at `path`.
+    """
+    tables = sd.read_tables(data_dir, compact=False)
+    path = build_database(tables, path)
+
+    def median_seconds(run):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        return sorted(times)[len(times) // 2]
+
+    rows = []
+    for name, (sql_query, left, key) in NAMED_QUERIES.items():
+        some = list(tables[left][key].drop_duplicates().iloc[:ids])
+        for scope, filters in [("all", {}), (f"{len(some)} {key}", {key: some})]:
+            rows.append({"query": name, "rows": scope,
+                         "pandas_seconds": median_seconds(lambda: pandas_query(name, tables, **filters)),
+                         "sqlite_seconds": median_seconds(lambda: sql_query(path=path, **filters))})
+    return pd.DataFrame(rows)
@@ -1,4 +1,8 @@
+import numpy as np
 import pandas as pd
+import json
+import subprocess
+import sys
 from pathlib import Path
 
 awards_players_df = pd.DataFrame()
@@ -9,56 +13,249 @@ series_post_df = pd.DataFrame()
 teams_post_df = pd.DataFrame()
 teams_df = pd.DataFrame()
 
-def read_and_store_data(data_dir: str = None):
-    global awards_players_df, coaches_df, players_teams_df, players_df, series_post_df, teams_post_df, teams_df
-    
+TABLES = ["awards_players", "coaches", "players_teams", "players", "series_post", "teams_post", "teams"]
+
+# Dtypes applied at ingest (read_and_store_data) and again before saving. Identifier columns name a
+# shared dictionary ("person", "team", "league"): all columns of a dictionary get one CategoricalDtype
+# built from every table, so merges and concats between tables keep the category codes. Integer
+# columns not listed here become int32 (season stats and their sums stay far below 2**31), or the
+# nullable Int types when values are missing. Floats stay float64, since float32 would change the means
+# and sums computed from them.
+# Y/N flags such as teams.playoff stay strings: plots map them to labels, and a mapped categorical
+# cannot be compared with plain values.
+SHARED_CATEGORIES = ("person", "team", "league")
+DEFAULT_INT = "int32"
+# Dictionaries built by the last read_tables; their bytes are counted once by memory_savings, not per column.
+shared_dtypes = {}
+
+TABLE_SCHEMAS = {
+    "awards_players": {"playerID": "person", "award": "category", "year": "int16", "lgID": "league"},
+    "coaches": {"coachID": "person", "year": "int16", "tmID": "team", "lgID": "league", "stint": "int8"},
+    "players_teams": {"playerID": "person", "year": "int16", "stint": "int8", "tmID": "team", "lgID": "league"},
+    "players": {"bioID": "person", "pos": "category"},
+    "series_post": {"year": "int16", "round": "category", "series": "category", "tmIDWinner": "team",
+                    "lgIDWinner": "league", "tmIDLoser": "team", "lgIDLoser": "league"},
+    "teams_post": {"year": "int16", "tmID": "team", "lgID": "league"},
+    "teams": {"year": "int16", "lgID": "league", "tmID": "team", "franchID": "team", "confID": "category",
+              "divID": "category", "name": "category", "arena": "category"},
+}
+
+
+def shared_categories(tables: dict) -> dict:
+    """One CategoricalDtype per shared dictionary, with the values of all its columns in `tables`."""
+    values = {kind: set() for kind in SHARED_CATEGORIES}
+    for name, df in tables.items():
+        for col, kind in TABLE_SCHEMAS.get(name, {}).items():
+            if kind in values and col in df.columns:
+                column = df[col]
+                values[kind].update(column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype)
+                                    else column.dropna().astype(str).unique())
+    return {kind: pd.CategoricalDtype(sorted(found)) for kind, found in values.items()}
+
+
+def _compact_column(column: pd.Series, dtype: str, categories: dict) -> pd.Series:
+    if dtype in SHARED_CATEGORIES or dtype == "category":
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            if dtype in categories and column.dtype != categories[dtype]:
+                return column.cat.set_categories(categories[dtype].categories)
+            return column
+        if dtype in categories:
+            return column.astype(str).where(column.notna()).astype(categories[dtype])
+        return column.astype("category")
+
+    if column.dtype.kind not in "iuf" or (column.dtype.kind == "f" and not (column.dropna() % 1 == 0).all()):
+        return column
+    dtype = np.dtype(dtype or DEFAULT_INT)
+    valid = column.dropna()
+    if len(valid) and (valid.min() < np.iinfo(dtype).min or valid.max() > np.iinfo(dtype).max):
+        dtype = np.dtype("int64")
+    return column.astype(dtype.name.capitalize() if column.isna().any() else dtype)
+
+
+def apply_schema(name: str, df: pd.DataFrame, categories: dict = None) -> pd.DataFrame:
+    """
+    Casts `df` to the compact dtypes of TABLE_SCHEMAS[name] (see above). Shared dictionaries come from
+    `categories` (shared_categories); without it those columns get a category dtype of their own.
+    Columns dropped during cleaning are skipped and columns that no longer fit their dtype are left as they are.
+    """
+    schema = TABLE_SCHEMAS.get(name, {})
+    categories = categories or {}
+    columns = {}
+    for col in df.columns:
+        column = df[col]
+        if col in schema or column.dtype.kind in "iu":
+            column = _compact_column(column, schema.get(col), categories)
+        columns[col] = column
+    return pd.DataFrame(columns, index=df.index)
+
+
+def read_tables(data_dir: str = None, compact: bool = True) -> dict:
+    """Reads the seven CSVs of `data_dir` (basketballPlayoffs by default), in the compact dtypes unless `compact` is off."""
+    global shared_dtypes
     base_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
+    tables = {name: pd.read_csv(base_dir / f"{name}.csv") for name in TABLES}
+    if compact:
+        shared_dtypes = shared_categories(tables)
+        tables = {name: apply_schema(name, df, shared_dtypes) for name, df in tables.items()}
+    return tables
+
+
+def read_and_store_data(data_dir: str = None, compact: bool = True):
+    for name, df in read_tables(data_dir, compact).items():
+        globals()[f"{name}_df"] = df
 
-    awards_players_df = pd.read_csv(base_dir / "awards_players.csv")
-    coaches_df = pd.read_csv(base_dir / "coaches.csv")
-    players_teams_df = pd.read_csv(base_dir / "players_teams.csv")
-    players_df = pd.read_csv(base_dir / "players.csv")
-    series_post_df = pd.read_csv(base_dir / "series_post.csv")
-    teams_post_df = pd.read_csv(base_dir / "teams_post.csv")
-    teams_df = pd.read_csv(base_dir / "teams.csv")
 
-def df_info_table(df: pd.DataFrame) -> pd.DataFrame:
+def column_bytes(df: pd.DataFrame) -> pd.Series:
+    """Bytes per column; columns of a shared dictionary count only their codes."""
+    shared = list(shared_dtypes.values())
+    return pd.Series({
+        col: df[col].cat.codes.nbytes if any(df[col].dtype == dtype for dtype in shared)
+        else df[col].memory_usage(index=False, deep=True)
+        for col in df.columns
+    }, dtype="int64")
+
+
+def df_info_table(df: pd.DataFrame, before: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Per column counts, dtype and bytes in memory. With `before` (the same table in other dtypes,
+    e.g. read_tables(compact=False)), its dtypes and bytes are added to compare the two.
+    """
     info_df = pd.DataFrame({
         "Non-Null Count": df.notna().sum(),
         "Null Count": df.isna().sum(),
         "Missing %": (df.isna().sum() / len(df) * 100).round(2),
         "Dtype": df.dtypes.astype(str),
         "Unique Values": df.nunique(),
+        "Bytes": column_bytes(df),
     })
+    if before is not None:
+        info_df["Dtype Before"] = before.dtypes.astype(str).reindex(info_df.index)
+        info_df["Bytes Before"] = column_bytes(before).reindex(info_df.index)
+        info_df["Saving %"] = ((1 - info_df["Bytes"] / info_df["Bytes Before"]) * 100).round(2)
     return info_df
 
-def save_data(output_dir: Path):
+
+def memory_savings(data_dir: str = None) -> pd.DataFrame:
+    """
+    Bytes of every table read with the default pandas inference and with the compact schema.
+    The shared dictionaries are a row of their own, since all tables point to the same ones.
+    """
+    before, after = read_tables(data_dir, compact=False), read_tables(data_dir)
+    rows = []
+    for name in TABLES:
+        rows.append({
+            "table": name,
+            "rows": len(after[name]),
+            "bytes_before": int(column_bytes(before[name]).sum()),
+            "bytes_after": int(column_bytes(after[name]).sum()),
+        })
+    rows.append({
+        "table": "shared dictionaries",
+        "rows": sum(len(dtype.categories) for dtype in shared_dtypes.values()),
+        "bytes_before": 0,
+        "bytes_after": int(sum(dtype.categories.memory_usage(deep=True) for dtype in shared_dtypes.values())),
+    })
+    rows.append({"table": "total", "rows": sum(len(df) for df in after.values()),
+                 "bytes_before": sum(row["bytes_before"] for row in rows),
+                 "bytes_after": sum(row["bytes_after"] for row in rows)})
+    savings = pd.DataFrame(rows)
+    savings["saving_%"] = ((1 - savings["bytes_after"] / savings["bytes_before"].replace(0, np.nan)) * 100).round(2)
+    return savings
+
+def save_data(output_dir: Path, fmt: str = "parquet"):
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    awards_players_df.to_pickle(output_dir / "awards_players.pkl")
-    coaches_df.to_pickle(output_dir / "coaches.pkl")
-    players_teams_df.to_pickle(output_dir / "players_teams.pkl")
-    players_df.to_pickle(output_dir / "players.pkl")
-    series_post_df.to_pickle(output_dir / "series_post.pkl")
-    teams_post_df.to_pickle(output_dir / "teams_post.pkl")
-    teams_df.to_pickle(output_dir / "teams.pkl")
-
-
-def load_data(input_dir: Path):
-    global awards_players_df, coaches_df, players_teams_df, players_df, series_post_df, teams_post_df, teams_df
-
-    awards_players_path = input_dir / "awards_players.pkl"
-    coaches_path = input_dir / "coaches.pkl"
-    players_teams_path = input_dir / "players_teams.pkl"
-    players_path = input_dir / "players.pkl"
-    series_post_path = input_dir / "series_post.pkl"
-    teams_post_path = input_dir / "teams_post.pkl"
-    teams_path = input_dir / "teams.pkl"
-
-    awards_players_df = pd.read_pickle(awards_players_path)
-    coaches_df = pd.read_pickle(coaches_path)
-    players_teams_df = pd.read_pickle(players_teams_path)
-    players_df = pd.read_pickle(players_path)
-    series_post_df = pd.read_pickle(series_post_path)
-    teams_post_df = pd.read_pickle(teams_post_path)
-    teams_df = pd.read_pickle(teams_path)
\ No newline at end of file
+    for name in TABLES:
+        df = globals()[f"{name}_df"]
+        if fmt == "parquet":
+            # Every file keeps only the categories it uses, so a loaded table does not carry the whole shared dictionary.
+            df = apply_schema(name, df)
+            df = df.apply(lambda col: col.cat.remove_unused_categories() if isinstance(col.dtype, pd.CategoricalDtype) else col)
+            df.to_parquet(output_dir / f"{name}.parquet")
+        elif fmt == "pickle":
+            df.to_pickle(output_dir / f"{name}.pkl")
+        else:
+            raise ValueError(f"Unknown storage format '{fmt}', expected 'parquet' or 'pickle'")
+
+
+def load_table(name: str, input_dir: Path, columns: list = None) -> pd.DataFrame:
+    """
+    Loads a single table from `input_dir`, reading only `columns` when given.
+    Prefers the Parquet snapshot and falls back to the legacy pickle.
+    """
+    if name not in TABLES:
+        raise ValueError(f"Unknown table '{name}', expected one of {TABLES}")
+
+    parquet_path = input_dir / f"{name}.parquet"
+    if parquet_path.exists():
+        return pd.read_parquet(parquet_path, columns=columns)
+
+    df = pd.read_pickle(input_dir / f"{name}.pkl")
+    return df[columns] if columns is not None else df
+
+
+def load_data(input_dir: Path, tables: list = None, columns: dict = None):
+    """
+    Loads the stored tables into the module level dataframes.
+    `tables` restricts which tables are read and `columns` maps a table name to the columns to project.
+    """
+    columns = columns or {}
+    for name in tables or TABLES:
+        globals()[f"{name}_df"] = load_table(name, input_dir, columns.get(name))
+
+
+_LOAD_PROBE = """
+import io, json, os, resource, time
+from pathlib import Path
+import pandas as pd
+
+# Warm up the Arrow memory pool so its one-off arena is not charged to the first load.
+buf = io.BytesIO()
+pd.DataFrame({{"warmup": [0]}}).to_parquet(buf)
+pd.read_parquet(buf)
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+before = rss_kb()
+start = time.perf_counter()
+loaded = []
+for name in {tables!r}:
+    path = Path({input_dir!r}) / (name + {suffix!r})
+    cols = {columns!r}.get(name)
+    if {suffix!r} == ".parquet":
+        df = pd.read_parquet(path, columns=cols)
+    else:
+        df = pd.read_pickle(path)
+        df = df[cols] if cols is not None else df
+    loaded.append(df)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_kb": rss_kb() - before}}))
+"""
+
+def compare_load_paths(input_dir: Path, tables: list = None, columns: dict = None, repeat: int = 3) -> pd.DataFrame:
+    """
+    Measures load time and resident memory growth of the pickle and Parquet snapshots in `input_dir`.
+    Every run happens in a fresh interpreter so that RSS is not shared between measurements.
+    """
+    tables = tables or TABLES
+    columns = columns or {}
+
+    rows = []
+    for backend, suffix in [("pickle", ".pkl"), ("parquet", ".parquet")]:
+        if not all((input_dir / f"{name}{suffix}").exists() for name in tables):
+            continue
+        code = _LOAD_PROBE.format(tables=tables, input_dir=str(input_dir), suffix=suffix, columns=columns)
+        for run in range(repeat):
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            rows.append({"backend": backend, "run": run, "seconds": result["seconds"], "rss_mb": result["rss_kb"] / 1024})
+
+    runs = pd.DataFrame(rows)
+    if runs.empty:
+        return runs
+    return runs.groupby("backend", as_index=False).agg(seconds=("seconds", "median"), rss_mb=("rss_mb", "median"))
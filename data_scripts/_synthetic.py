@@ -0,0 +1,402 @@
+"""
+Seeded synthetic data in the basketballPlayoffs layout, for profiling the data_scripts at scale.
+
+The seven CSVs (players, players_teams, teams, coaches, series_post, teams_post, awards_players)
+are written season by season, so memory stays bounded by one season plus the per-player state.
+Every id refers to a row of players.csv or teams.csv of the same year, every league plays the
+FR -> CF -> F bracket of its top four teams per conference, and box scores add up (points from
+made shots, rebounds from offensive + defensive, team totals from the roster).
+
+    python -m data_scripts._synthetic out_dir --seasons 100 --leagues 4 --teams 30 --roster 13
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TABLES = ["players", "players_teams", "teams", "coaches", "series_post", "teams_post", "awards_players"]
+
+GAMES = 34
+CONFERENCE_GAMES = 20
+RETAIN = 0.7            # chance a player stays with her team for the next season
+FREE_AGENT_SHARE = 0.4  # share of open roster spots filled by released players instead of rookies
+TRADE_RATE = 0.03       # players moved mid-season (stints 1 and 2)
+COACH_CHANGE_RATE = 0.05
+POSITIONS = ["G", "F", "C", "F-C", "G-F", "F-G", "C-F"]
+POSITION_SHARES = [0.38, 0.28, 0.16, 0.09, 0.07, 0.01, 0.01]
+# Round, series letters of conference 0 / conference 1 and best-of length of the bracket.
+ROUNDS = [("FR", ["A", "B"], ["C", "D"], 3), ("CF", ["E"], ["F"], 3), ("F", ["G"], [], 5)]
+
+PLAYERS_TEAMS_COLUMNS = [
+    "playerID", "year", "stint", "tmID", "lgID", "GP", "GS", "minutes", "points", "oRebounds", "dRebounds",
+    "rebounds", "assists", "steals", "blocks", "turnovers", "PF", "fgAttempted", "fgMade", "ftAttempted",
+    "ftMade", "threeAttempted", "threeMade", "dq",
+]
+# Post-season columns, in the order of the regular season ones from GP on.
+POST_COLUMNS = [
+    "PostGP", "PostGS", "PostMinutes", "PostPoints", "PostoRebounds", "PostdRebounds", "PostRebounds", "PostAssists",
+    "PostSteals", "PostBlocks", "PostTurnovers", "PostPF", "PostfgAttempted", "PostfgMade", "PostftAttempted",
+    "PostftMade", "PostthreeAttempted", "PostthreeMade", "PostDQ",
+]
+# Team offensive totals and the players_teams column they add up.
+TEAM_TOTALS = {
+    "o_fgm": "fgMade", "o_fga": "fgAttempted", "o_ftm": "ftMade", "o_fta": "ftAttempted", "o_3pm": "threeMade",
+    "o_3pa": "threeAttempted", "o_oreb": "oRebounds", "o_dreb": "dRebounds", "o_reb": "rebounds",
+    "o_asts": "assists", "o_pf": "PF", "o_stl": "steals", "o_to": "turnovers", "o_blk": "blocks", "o_pts": "points",
+}
+TEAMS_COLUMNS = [
+    "year", "lgID", "tmID", "franchID", "confID", "divID", "rank", "playoff", "seeded", "firstRound", "semis",
+    "finals", "name", *TEAM_TOTALS, *[col.replace("o_", "d_") for col in TEAM_TOTALS], "tmORB", "tmDRB", "tmTRB",
+    "opptmORB", "opptmDRB", "opptmTRB", "won", "lost", "GP", "homeW", "homeL", "awayW", "awayL", "confW", "confL",
+    "min", "attend", "arena",
+]
+
+
+class _Pool:
+    """Per-person state (skill, seasons played) in arrays that grow by doubling."""
+
+    def __init__(self, capacity: int):
+        self.n = 0
+        self.skill = np.empty(capacity)
+        self.seasons = np.zeros(capacity, dtype=np.int64)
+
+    def add(self, skill) -> np.ndarray:
+        count = len(skill)
+        if self.n + count > len(self.skill):
+            size = max(2 * len(self.skill), self.n + count)
+            self.skill = np.resize(self.skill, size)
+            self.seasons = np.concatenate([self.seasons, np.zeros(size - len(self.seasons), dtype=np.int64)])
+        ids = np.arange(self.n, self.n + count)
+        self.skill[ids] = skill
+        self.n += count
+        return ids
+
+
+def _player_ids(index) -> pd.Series:
+    return pd.Series(np.asarray(index)).map("syn{:07d}w".format)
+
+
+def _coach_ids(index) -> pd.Series:
+    return pd.Series(np.asarray(index)).map("syc{:06d}99w".format)
+
+
+def _player_bios(rng, ids) -> pd.DataFrame:
+    n = len(ids)
+    birth = pd.Timestamp("1970-01-01") + pd.to_timedelta(rng.integers(0, 365 * 25, n), unit="D")
+    college = pd.Series(rng.integers(0, 300, n)).map("College {:03d}".format).where(rng.random(n) > 0.19, "")
+    return pd.DataFrame({
+        "bioID": _player_ids(ids),
+        "pos": rng.choice(POSITIONS, n, p=POSITION_SHARES),
+        "firstseason": 0,
+        "lastseason": 0,
+        "height": np.round(rng.normal(72, 3.5, n)),
+        "weight": np.round(rng.normal(170, 20, n)).astype(np.int64),
+        "college": college,
+        "collegeOther": np.where(rng.random(n) < 0.012, "Junior College", ""),
+        "birthDate": birth.strftime("%Y-%m-%d"),
+        "deathDate": "0000-00-00",
+    })
+
+
+def _coach_bios(ids) -> pd.DataFrame:
+    return pd.DataFrame({"bioID": _coach_ids(ids), "pos": "", "firstseason": 0, "lastseason": 0, "height": 0.0,
+                         "weight": 0, "college": "", "collegeOther": "", "birthDate": "0000-00-00",
+                         "deathDate": "0000-00-00"})
+
+
+def _play_series(rng, high, low, strength, best_of: int):
+    """Best-of series between the `high` and `low` seeds; returns winners, losers and games won by each."""
+    p = 1 / (1 + np.exp(strength[low] - strength[high]))
+    wins = rng.random((len(high), best_of)) < p[:, None]
+    need = best_of // 2 + 1
+    high_wins, low_wins = np.cumsum(wins, axis=1), np.cumsum(~wins, axis=1)
+    end = np.argmax((high_wins == need) | (low_wins == need), axis=1)
+    high_wins, low_wins = high_wins[np.arange(len(high)), end], low_wins[np.arange(len(high)), end]
+    high_won = high_wins == need
+    return (np.where(high_won, high, low), np.where(high_won, low, high),
+            np.where(high_won, high_wins, low_wins), np.where(high_won, low_wins, high_wins))
+
+
+def _box_scores(rng, games, minutes, skill) -> dict:
+    """Counting stats of `minutes` played in `games` games; made shots and rebounds add up."""
+    rate = np.exp(0.25 * skill)
+    fga = rng.poisson(minutes * 0.3 * rate)
+    three_a = rng.binomial(fga, 0.22)
+    three_m = rng.binomial(three_a, 0.33)
+    two_m = rng.binomial(fga - three_a, np.clip(0.45 + 0.03 * skill, 0.3, 0.6))
+    fta = rng.poisson(minutes * 0.08 * rate)
+    ftm = rng.binomial(fta, 0.75)
+    o_reb = rng.poisson(minutes * 0.05 * rate)
+    d_reb = rng.poisson(minutes * 0.12 * rate)
+    return {
+        "points": 2 * two_m + 3 * three_m + ftm, "oRebounds": o_reb, "dRebounds": d_reb, "rebounds": o_reb + d_reb,
+        "assists": rng.poisson(minutes * 0.08 * rate), "steals": rng.poisson(minutes * 0.04 * rate),
+        "blocks": rng.poisson(minutes * 0.02 * rate), "turnovers": rng.poisson(minutes * 0.07),
+        "PF": rng.poisson(minutes * 0.1), "fgAttempted": fga, "fgMade": two_m + three_m, "ftAttempted": fta,
+        "ftMade": ftm, "threeAttempted": three_a, "threeMade": three_m, "dq": rng.binomial(games, 0.01),
+    }
+
+
+def _group_argmax(keys, values, candidates=None) -> np.ndarray:
+    """Row index of the largest value of every key (among `candidates`)."""
+    order = np.lexsort((-values, keys))
+    if candidates is not None:
+        order = order[candidates[order]]
+    keys = keys[order]
+    return order[np.r_[True, keys[1:] != keys[:-1]]] if len(order) else order
+
+
+def generate(output_dir, seasons: int = 10, leagues: int = 1, teams: int = 14, roster: int = 13, seed: int = 0) -> dict:
+    """
+    Writes the seven tables for `seasons` seasons of `leagues` leagues with `teams` teams (two
+    conferences) of `roster` players each to `output_dir`. Returns the row count of every table.
+    """
+    if teams < 8 or roster < 5:
+        raise ValueError("Every league needs at least 8 teams (4 playoff teams per conference) and rosters of 5")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    n_teams = leagues * teams
+    league = np.repeat(np.arange(leagues), teams)
+    conference = np.tile((np.arange(teams) >= teams // 2).astype(np.int64), leagues)
+    league_ids = np.array(["WNBA"] + [f"LG{i:02d}" for i in range(1, leagues)])
+    width = len(str(teams - 1))
+    team_ids = np.array([f"T{lg:02d}{t:0{width}d}" if leagues > 1 else f"T{t:0{width}d}"
+                         for lg in range(leagues) for t in range(teams)])
+    team_lg = league_ids[league]
+
+    players = _Pool(n_teams * roster * max(2, seasons // 3))
+    coaches = _Pool(n_teams * 2)
+    free_agents = np.array([], dtype=np.int64)
+    fired = np.array([], dtype=np.int64)
+
+    files = {name: open(output_dir / f"{name}.csv", "w", newline="") for name in TABLES}
+    counts = dict.fromkeys(TABLES, 0)
+
+    def write(name, df):
+        df.to_csv(files[name], header=counts[name] == 0, index=False)
+        counts[name] += len(df)
+
+    try:
+        rosters = players.add(rng.normal(0, 1, n_teams * roster)).reshape(n_teams, roster)
+        write("players", _player_bios(rng, rosters.ravel()))
+        coach = coaches.add(rng.normal(0, 1, n_teams))
+        write("players", _coach_bios(coach))
+        prev_win_pct = np.full(n_teams, 0.5)
+        prev_skill = players.skill[:players.n].copy()
+
+        for year in range(1, seasons + 1):
+            if year > 1:
+                # Off-season: skills drift, veterans retire, open spots go to free agents and rookies.
+                players.skill[:players.n] += rng.normal(0.05, 0.3, players.n) - 0.02 * players.seasons[:players.n]
+                retire = rng.random(rosters.shape) < np.clip(0.02 * players.seasons[rosters], 0, 0.9)
+                leave = (rng.random(rosters.shape) > RETAIN) | retire
+                free_agents = np.concatenate([free_agents, rosters[leave & ~retire]])[-n_teams * roster:]
+                free_agents = rng.permutation(free_agents)
+                open_spots = int(leave.sum())
+                signed = free_agents[:int(open_spots * FREE_AGENT_SHARE)]
+                free_agents = free_agents[len(signed):]
+                rookies = players.add(rng.normal(-0.3, 1, open_spots - len(signed)))
+                write("players", _player_bios(rng, rookies))
+                rosters[leave] = rng.permutation(np.concatenate([signed, rookies]))
+
+                change = ((prev_win_pct < 0.35) & (rng.random(n_teams) < 0.6)) | (rng.random(n_teams) < 0.1)
+                fired = rng.permutation(np.concatenate([fired, coach[change]]))[-n_teams:]
+                rehired = fired[:int(change.sum() * 0.3)]
+                fired = fired[len(rehired):]
+                hired = coaches.add(rng.normal(0, 1, int(change.sum()) - len(rehired)))
+                write("players", _coach_bios(hired))
+                coach[change] = rng.permutation(np.concatenate([rehired, hired]))
+
+            # Regular season.
+            skill = players.skill[rosters]
+            strength = 3 * skill.mean(axis=1) + rng.normal(0, 0.5, n_teams)
+            league_mean = np.bincount(league, strength) / teams
+            won = rng.binomial(GAMES, 1 / (1 + np.exp(-(strength - league_mean[league]))))
+            home_w = rng.hypergeometric(GAMES // 2, GAMES - GAMES // 2, won)
+            conf_w = rng.hypergeometric(CONFERENCE_GAMES, GAMES - CONFERENCE_GAMES, won)
+            order = np.lexsort((rng.random(n_teams), -won, conference, league))
+            group = league[order] * 2 + conference[order]
+            starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+            rank = np.empty(n_teams, dtype=np.int64)
+            rank[order] = np.arange(n_teams) - np.repeat(starts, np.diff(np.r_[starts, n_teams])) + 1
+
+            # Playoffs: seeds 1-4 of every conference, 1 v 4 and 2 v 3, conference winners in the final.
+            seed_of = np.full((leagues, 2, teams), -1)
+            seed_of[league, conference, rank - 1] = np.arange(n_teams)
+            rounds = {"FR": None, "CF": None, "F": None}
+            post_w = np.zeros(n_teams, dtype=np.int64)
+            post_l = np.zeros(n_teams, dtype=np.int64)
+            series_rows = []
+            alive = seed_of[:, :, :4]
+            for name, letters0, letters1, best_of in ROUNDS:
+                if name == "FR":
+                    high, low = alive[:, :, [0, 1]], alive[:, :, [3, 2]]
+                elif name == "CF":
+                    high, low = alive[:, :, [0]], alive[:, :, [1]]
+                else:
+                    high, low = alive[:, [0], [0]][:, :, None], alive[:, [1], [0]][:, :, None]
+                winners, losers, w, l = _play_series(rng, high.ravel(), low.ravel(), strength, best_of)
+                np.add.at(post_w, winners, w)
+                np.add.at(post_w, losers, l)
+                np.add.at(post_l, winners, l)
+                np.add.at(post_l, losers, w)
+                letters = np.array(letters0 + letters1 if name != "F" else letters0)
+                series_rows.append(pd.DataFrame({
+                    "year": year, "round": name, "series": np.tile(letters, leagues),
+                    "tmIDWinner": team_ids[winners], "lgIDWinner": team_lg[winners],
+                    "tmIDLoser": team_ids[losers], "lgIDLoser": team_lg[losers], "W": w, "L": l,
+                    "league": league[winners], "winner": winners, "loser": losers,
+                }))
+                rounds[name] = (winners, losers)
+                # Higher seed of every next-round pairing first.
+                alive = np.where(winners.reshape(high.shape) == high.reshape(high.shape), high, low)
+                alive = alive.reshape(leagues, 2 if name != "F" else 1, -1)
+            series = pd.concat(series_rows, ignore_index=True).sort_values(["league", "series"], kind="stable")
+            write("series_post", series.drop(columns=["league", "winner", "loser"]))
+            champion = rounds["F"][0]
+
+            result = {}
+            for name, column in [("FR", "firstRound"), ("CF", "semis"), ("F", "finals")]:
+                winners, losers = rounds[name]
+                result[column] = np.full(n_teams, "", dtype=object)
+                result[column][winners], result[column][losers] = "W", "L"
+            playoff = rank <= 4
+            write("teams_post", pd.DataFrame({"year": year, "tmID": team_ids[playoff], "lgID": team_lg[playoff],
+                                              "W": post_w[playoff], "L": post_l[playoff]}))
+
+            # Box scores: every roster spot plays stint 0, traded players split the season over stints 1 and 2.
+            player = rosters.ravel()
+            team = np.repeat(np.arange(n_teams), roster)
+            starter = (np.argsort(np.argsort(-skill, axis=1), axis=1) < 5).ravel()
+            traded = rng.random(len(player)) < TRADE_RATE
+            games = rng.binomial(GAMES, 0.85, len(player))
+            first_part = rng.binomial(games, 0.5)
+            destination = league[team] * teams + (team % teams + rng.integers(1, teams, len(player))) % teams
+            rows = pd.DataFrame({
+                "player": np.r_[player, player[traded]],
+                "stint": np.r_[np.where(traded, 1, 0), np.full(traded.sum(), 2)],
+                "team": np.r_[team, destination[traded]],
+                "GP": np.r_[np.where(traded, first_part, games), (games - first_part)[traded]],
+                "starter": np.r_[starter, starter[traded]],
+            })
+            rows = rows.sort_values(["player", "stint"], kind="stable").reset_index(drop=True)
+            row_skill = players.skill[rows["player"].to_numpy()]
+            gp = rows["GP"].to_numpy()
+            per_game = np.clip(np.where(rows["starter"], 28, 12) + rng.normal(0, 4, len(rows)), 2, 38)
+            stats = _box_scores(rng, gp, np.round(gp * per_game).astype(np.int64), row_skill)
+            gs = rng.binomial(gp, np.where(rows["starter"], 0.9, 0.05))
+
+            # Players finishing the season with a playoff team play its post-season games.
+            row_team = rows["team"].to_numpy()
+            plays_post = playoff[row_team] & (rows["stint"].to_numpy() != 1)
+            post_games = rng.binomial(np.where(plays_post, (post_w + post_l)[row_team], 0), 0.9)
+            post_minutes = np.round(post_games * per_game).astype(np.int64)
+            post = {"GP": post_games, "GS": rng.binomial(post_games, np.where(rows["starter"], 0.9, 0.05)),
+                    "minutes": post_minutes, **_box_scores(rng, post_games, post_minutes, row_skill)}
+
+            pt = pd.DataFrame({
+                "playerID": _player_ids(rows["player"]), "year": year, "stint": rows["stint"],
+                "tmID": team_ids[row_team], "lgID": team_lg[row_team], "GP": gp, "GS": gs,
+                "minutes": np.round(gp * per_game).astype(np.int64), **stats,
+                **{post_col: post[col] for col, post_col in zip(PLAYERS_TEAMS_COLUMNS[5:], POST_COLUMNS)},
+            })
+            write("players_teams", pt[PLAYERS_TEAMS_COLUMNS + POST_COLUMNS])
+
+            # Team totals of the regular season add up the roster.
+            totals = {col: np.bincount(row_team, pt[source].to_numpy(), minlength=n_teams).astype(np.int64)
+                      for col, source in TEAM_TOTALS.items()}
+            allowed = np.exp(0.1 * (GAMES - 2 * won) / GAMES)
+            team_df = pd.DataFrame({
+                "year": year, "lgID": team_lg, "tmID": team_ids, "franchID": team_ids,
+                "confID": np.where(conference == 0, "EA", "WE"), "divID": "", "rank": rank,
+                "playoff": np.where(playoff, "Y", "N"), "seeded": 0, **result,
+                "name": pd.Series(team_ids).map("Synthetic {}".format), **totals,
+                **{col.replace("o_", "d_"): np.round(values * allowed).astype(np.int64) for col, values in totals.items()},
+                "tmORB": 0, "tmDRB": 0, "tmTRB": 0, "opptmORB": 0, "opptmDRB": 0, "opptmTRB": 0,
+                "won": won, "lost": GAMES - won, "GP": GAMES, "homeW": home_w, "homeL": GAMES // 2 - home_w,
+                "awayW": won - home_w, "awayL": GAMES - GAMES // 2 - (won - home_w), "confW": conf_w,
+                "confL": CONFERENCE_GAMES - conf_w, "min": GAMES * 200 + 25 * rng.poisson(2, n_teams),
+                "attend": rng.integers(80_000, 250_000, n_teams),
+                "arena": pd.Series(team_ids).map("Arena {}".format),
+            })
+            write("teams", team_df[TEAMS_COLUMNS])
+
+            # Coaches: one per team, some replaced mid-season (stints 1 and 2).
+            replaced = rng.random(n_teams) < COACH_CHANGE_RATE
+            successor = coaches.add(rng.normal(0, 1, int(replaced.sum())))
+            write("players", _coach_bios(successor))
+            split = rng.binomial(GAMES, 0.5, n_teams)
+            split_won = rng.hypergeometric(won, GAMES - won, split)
+            team_idx = np.r_[np.arange(n_teams), np.flatnonzero(replaced)]
+            coach_won = np.r_[np.where(replaced, split_won, won), (won - split_won)[replaced]]
+            coach_games = np.r_[np.where(replaced, split, GAMES), (GAMES - split)[replaced]]
+            final_coach = np.r_[~replaced, np.ones(replaced.sum(), dtype=bool)]
+            coach_df = pd.DataFrame({
+                "coachID": _coach_ids(np.r_[coach, successor]), "year": year, "tmID": team_ids[team_idx],
+                "lgID": team_lg[team_idx], "stint": np.r_[np.where(replaced, 1, 0), np.full(replaced.sum(), 2)],
+                "won": coach_won, "lost": coach_games - coach_won,
+                "post_wins": np.where(final_coach, post_w[team_idx], 0),
+                "post_losses": np.where(final_coach, post_l[team_idx], 0),
+            }).sort_values(["coachID", "year"], kind="stable")
+            write("coaches", coach_df)
+            coach[replaced] = successor
+
+            # Awards of every league.
+            lg = league[row_team]
+            main = rows["stint"].to_numpy() != 2
+            score = pt["points"].to_numpy() + pt["rebounds"].to_numpy() + pt["assists"].to_numpy()
+            defense = 3 * pt["steals"].to_numpy() + 2 * pt["blocks"].to_numpy() + pt["dRebounds"].to_numpy()
+            rookie = players.seasons[rows["player"].to_numpy()] == 0
+            improved = players.skill[rows["player"].to_numpy()] - prev_skill[np.minimum(rows["player"].to_numpy(), len(prev_skill) - 1)]
+            bench = (gs < gp / 2) & (gp > 0)
+            all_star = np.zeros(len(rows), dtype=bool)
+            all_star[np.argsort(-score)[:24 * leagues]] = True
+            awards = [
+                ("Most Valuable Player", _group_argmax(lg, score, main)),
+                ("Defensive Player of the Year", _group_argmax(lg, defense, main)),
+                ("Rookie of the Year", _group_argmax(lg, score, main & rookie)),
+                ("Most Improved Player", _group_argmax(lg, improved, main & ~rookie)),
+                ("Sixth Woman of the Year", _group_argmax(lg, score, main & bench)),
+                ("Kim Perrot Sportsmanship Award", _group_argmax(lg, rng.random(len(rows)), main)),
+                ("All-Star Game Most Valuable Player", _group_argmax(lg, rng.random(len(rows)), main & all_star)),
+                ("WNBA Finals Most Valuable Player",
+                 _group_argmax(lg, pt["PostPoints"].to_numpy(), np.isin(row_team, champion))),
+            ]
+            award_rows = [pd.DataFrame({"playerID": pt["playerID"].to_numpy()[idx], "award": award, "year": year,
+                                        "lgID": league_ids[lg[idx]]}) for award, idx in awards]
+            best_team = _group_argmax(league, won.astype(float))
+            award_rows.append(pd.DataFrame({"playerID": _coach_ids(coach[best_team]), "award": "Coach of the Year",
+                                            "year": year, "lgID": league_ids[league[best_team]]}))
+            if year % 10 == 0:
+                for lg_index in range(leagues):
+                    best = np.flatnonzero(main & (lg == lg_index))
+                    best = best[np.argsort(-row_skill[best])[:10]]
+                    award_rows.append(pd.DataFrame({"playerID": pt["playerID"].to_numpy()[best],
+                                                    "award": "WNBA All-Decade Team", "year": year,
+                                                    "lgID": league_ids[lg_index]}))
+            write("awards_players", pd.concat(award_rows, ignore_index=True)[["playerID", "award", "year", "lgID"]])
+
+            players.seasons[np.unique(player)] += 1
+            prev_skill = players.skill[:players.n].copy()
+            prev_win_pct = won / GAMES
+    finally:
+        for handle in files.values():
+            handle.close()
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir")
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--leagues", type=int, default=1)
+    parser.add_argument("--teams", type=int, default=14, help="teams per league")
+    parser.add_argument("--roster", type=int, default=13, help="players per team")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(generate(args.output_dir, args.seasons, args.leagues, args.teams, args.roster, args.seed))
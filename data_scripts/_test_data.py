@@ -1,40 +1,106 @@
 import pandas as pd
+import json
 from pathlib import Path
+from data_scripts._career_index import CareerIndex
+
+INDEX_DIR_NAME = ".season_index"
+PARTITIONED_TABLES = ["players_teams", "coaches", "teams"]
+
+_indexes = {}
+
+def _base_dir(data_dir):
+    return Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
+
+def _source_stamp(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def _partition_path(index_dir: Path, table: str, year) -> Path:
+    return index_dir / table / f"year={year}.parquet"
+
+def build_season_index(data_dir=None, tables: list = None) -> dict:
+    """
+    Splits each source CSV into one Parquet file per season under `<data_dir>/.season_index`
+    and writes a small index.json with the source stamps and the rows of every season.
+    The first season of every player is precomputed once into first_seasons.parquet.
+    """
+    base_dir = _base_dir(data_dir)
+    index_dir = base_dir / INDEX_DIR_NAME
+    index_path = index_dir / "index.json"
+    index = json.loads(index_path.read_text()) if index_path.exists() else {"tables": {}}
+
+    for table in tables or PARTITIONED_TABLES:
+        df = pd.read_csv(base_dir / f"{table}.csv")
+        table_dir = index_dir / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+        for old_partition in table_dir.glob("year=*.parquet"):
+            old_partition.unlink()
+
+        years = {}
+        for year, season_df in df.groupby("year", sort=True):
+            season_df.to_parquet(_partition_path(index_dir, table, year))
+            years[str(year)] = len(season_df)
+
+        index["tables"][table] = {"source": _source_stamp(base_dir / f"{table}.csv"), "years": years}
+
+        if table == "players_teams":
+            main_stints = df.loc[df['stint'].isin([0, 1]), ['playerID', 'year']]
+            first_seasons = CareerIndex(main_stints).first_season.reset_index()
+            first_seasons.to_parquet(index_dir / "first_seasons.parquet")
+
+    index_path.write_text(json.dumps(index, indent=2))
+    _indexes[base_dir] = index
+    return index
+
+def _season_index(base_dir: Path, table: str) -> dict:
+    index = _indexes.get(base_dir)
+    if index is None:
+        index_path = base_dir / INDEX_DIR_NAME / "index.json"
+        index = json.loads(index_path.read_text()) if index_path.exists() else {"tables": {}}
+        _indexes[base_dir] = index
+
+    entry = index["tables"].get(table)
+    if entry is None or entry["source"] != _source_stamp(base_dir / f"{table}.csv"):
+        index = build_season_index(base_dir, [table])
+        entry = index["tables"][table]
+    return entry
+
+def load_season(data_dir, table: str, year, columns: list = None) -> pd.DataFrame:
+    """Reads a single season of `table`, (re)building the season index when the source CSV changed."""
+    base_dir = _base_dir(data_dir)
+    entry = _season_index(base_dir, table)
+    if str(year) not in entry["years"]:
+        return pd.DataFrame(columns=columns)
+    return pd.read_parquet(_partition_path(base_dir / INDEX_DIR_NAME, table, year), columns=columns)
+
+def load_first_seasons(data_dir) -> pd.DataFrame:
+    base_dir = _base_dir(data_dir)
+    _season_index(base_dir, "players_teams")
+    return pd.read_parquet(base_dir / INDEX_DIR_NAME / "first_seasons.parquet")
 
 def load_player_test_data(data_dir, year):
-    base_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
-    players_teams_df = pd.read_csv(base_dir / "players_teams.csv")
-    playerTeamsTest_df = players_teams_df.loc[players_teams_df['year'] == year, ['playerID', 'year', 'tmID', 'lgID', 'stint']]
+    playerTeamsTest_df = load_season(data_dir, "players_teams", year, ['playerID', 'year', 'tmID', 'lgID', 'stint'])
     playerTeamsTest_df = playerTeamsTest_df[playerTeamsTest_df['stint'].isin([0, 1])]
     playerTeamsTest_df['stint'] = playerTeamsTest_df['stint'].replace(1, 0)
     return playerTeamsTest_df
 
 def load_coach_test_data(data_dir, year):
-    base_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
-    coaches_df = pd.read_csv(base_dir / "coaches.csv")
-    coachesTest_df = coaches_df.loc[coaches_df['year'] == year, ['coachID', 'year', 'tmID', 'lgID', 'stint']]
+    coachesTest_df = load_season(data_dir, "coaches", year, ['coachID', 'year', 'tmID', 'lgID', 'stint'])
     coachesTest_df = coachesTest_df[coachesTest_df['stint'].isin([0, 1])]
     coachesTest_df['stint'] = coachesTest_df['stint'].replace(1, 0)
     return coachesTest_df
 
 def load_teams_test_data(data_dir, year):
-    base_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
-    teams_df = pd.read_csv(base_dir / "teams.csv")
-    teamsTest_df = teams_df.loc[teams_df['year'] == year, ['tmID', 'franchID', 'year', 'confID', 'lgID', 'name', 'arena']]
+    teamsTest_df = load_season(data_dir, "teams", year, ['tmID', 'franchID', 'year', 'confID', 'lgID', 'name', 'arena'])
     return teamsTest_df
 
 def load_rookies_test_data(data_dir, year):
-    base_dir = Path(data_dir) if data_dir else Path(__file__).resolve().parent.parent / "basketballPlayoffs"
-    players_teams_df = pd.read_csv(base_dir / "players_teams.csv")
-    playerTeamsTest_df = players_teams_df[['playerID', 'year', 'tmID', 'lgID', 'stint']].copy()
-    playerTeamsTest_df = playerTeamsTest_df[playerTeamsTest_df['stint'].isin([0, 1])]
-    playerTeamsTest_df['stint'] = playerTeamsTest_df['stint'].replace(1, 0)
-    min_year_df = playerTeamsTest_df.groupby('playerID')['year'].min().reset_index()
+    min_year_df = load_first_seasons(data_dir)
     rookiesTeamTest_df = min_year_df[min_year_df['year'] == year]
     rookiesTeamTest_df = rookiesTeamTest_df.merge(
-        playerTeamsTest_df,
+        load_player_test_data(data_dir, year),
         on=['playerID', 'year'],
         how='left'
     )
 
-    return rookiesTeamTest_df
\ No newline at end of file
+    return rookiesTeamTest_df
@@ -0,0 +1,113 @@
+"""
+Top-K and winner-rank metrics of many models at once.
+
+`scores` has one column per model (a DataFrame, or an array whose columns `models` names) and
+`groups` splits its rows into the sets that are ranked separately, such as the seasons of a
+backtest; it can be one label per row or a DataFrame of several key columns. Every model column is
+sorted within every group by one argsort. Recall@K, Precision@K and Lift@K for all K are read off
+the cumulative hit counts of that order, and the rank of each group's actual winner off the dense
+ranks, instead of sorting once per (group, K, model).
+
+An actual value of 1 marks a positive (a coach change, an award winner).
+"""
+import numpy as np
+import pandas as pd
+
+from data_scripts import _ensemble as en
+
+TOP_K = (3, 5, 8)
+
+
+def _prepare(scores, actual, groups, models):
+    """(models, rows) score array, positives, group codes, the keys of every code and the model names."""
+    if isinstance(scores, pd.DataFrame):
+        models = list(scores.columns)
+        scores = scores.to_numpy(dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.ndim == 1:
+        scores = scores[:, None]
+    models = list(models) if models is not None else list(range(scores.shape[1]))
+    positive = np.asarray(actual) == 1
+
+    if groups is None:
+        codes, keys = np.zeros(len(scores), dtype=np.int32), pd.DataFrame(index=range(1))
+    elif isinstance(groups, pd.DataFrame):
+        codes, uniques = pd.MultiIndex.from_frame(groups).factorize(sort=True)
+        keys = uniques.to_frame(index=False).set_axis(list(groups.columns), axis=1)
+    else:
+        codes, uniques = pd.factorize(np.asarray(groups), sort=True)
+        keys = pd.DataFrame({getattr(groups, "name", None) or "group": uniques})
+    return np.ascontiguousarray(scores.T), positive, codes.astype(np.int32), keys, models
+
+
+def _tidy(keys: pd.DataFrame, models: list, columns: dict, k_values=None) -> pd.DataFrame:
+    """One row per group, (K,) model, from arrays shaped ([K,] models, groups)."""
+    n_groups, n_models = len(keys), len(models)
+    n_k = 1 if k_values is None else len(k_values)
+    # Rows ordered by group, then K, then model.
+    group_index = np.repeat(np.arange(n_groups), n_k * n_models)
+    out = keys.iloc[group_index].reset_index(drop=True)
+    out["Model"] = np.tile(np.asarray(models, dtype=object), n_groups * n_k)
+    if k_values is not None:
+        out["K"] = np.tile(np.repeat(np.asarray(k_values), n_models), n_groups)
+    for name, values in columns.items():
+        values = values.reshape(n_k, n_models, n_groups)
+        out[name] = values.transpose(2, 0, 1).ravel()
+    return out
+
+
+def topk_metrics(scores, actual, groups=None, k_values=TOP_K, models: list = None) -> pd.DataFrame:
+    """
+    Recall@K, Precision@K, Lift@K and the hits of the top K rows by score of every model, group
+    and K; one row each, ordered by group, K and model. Ties keep their row order, like a stable
+    sort on the score.
+    """
+    scores, positive, codes, keys, models = _prepare(scores, actual, groups, models)
+    order = en.sort_within_groups(-scores, codes, stable=True)
+    # Positives among the first i sorted rows, with a leading zero column.
+    hits_before = np.zeros((scores.shape[0], scores.shape[1] + 1), dtype=np.int64)
+    np.cumsum(positive[order], axis=1, out=hits_before[:, 1:])
+
+    sizes = np.bincount(codes, minlength=len(keys))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    total = np.bincount(codes, weights=positive, minlength=len(keys))
+    base_rate = total / sizes
+
+    k_values = list(k_values)
+    hits = np.stack([hits_before[:, starts + np.minimum(k, sizes)] - hits_before[:, starts] for k in k_values])
+    k = np.asarray(k_values)[:, None, None]
+    precision = hits / k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = np.where(total > 0, hits / total, 0.0)
+        lift = np.where(base_rate > 0, precision / base_rate, 0.0)
+
+    return _tidy(keys, models, {"Recall@K": recall, "Precision@K": precision, "Lift@K": lift, "Hits": hits},
+                 k_values)
+
+
+def winner_ranks(scores, actual, groups=None, models: list = None) -> pd.DataFrame:
+    """
+    Dense rank (1 = highest score) of the first positive row of every group, for every model;
+    NaN for groups without a positive. One row per group and model, in a "rank" column.
+    """
+    scores, positive, codes, keys, models = _prepare(scores, actual, groups, models)
+    ranks = en.rank_matrix(scores, groups=codes, method="dense")
+
+    rows = np.flatnonzero(positive)
+    with_winner, first = np.unique(codes[rows], return_index=True)
+    winner = np.full((len(models), len(keys)), np.nan)
+    winner[:, with_winner] = ranks[:, rows[first]]
+    return _tidy(keys, models, {"rank": winner})
+
+
+def rank_summary(ranks: pd.DataFrame, hits=(1, 3), by="Model", rank: str = "rank") -> pd.DataFrame:
+    """
+    hit@k and the mean reciprocal rank over the groups of `ranks` (see winner_ranks) that have a
+    winner, for every value of the column(s) `by`.
+    """
+    ranks = ranks.dropna(subset=[rank])
+    columns = {f"hit@{k}": ranks[rank] <= k for k in hits}
+    grouped = ranks.assign(**columns, MRR=1.0 / ranks[rank]).groupby(by, sort=True)
+    summary = grouped[[*columns, "MRR"]].mean()
+    summary["groups"] = grouped.size()
+    return summary.reset_index()
@@ -0,0 +1,263 @@
+"""
+Successive-halving search over the hyperparameters of the prediction models.
+
+Every (dataset, model) search samples `candidates` configurations from SEARCH_SPACES, the current
+defaults of _models always being one of them, and scores them on the walk-forward splits of
+_backtest (train on the TRAIN_YEARS seasons before a test year, score that year). The first rung
+scores every candidate on the most recent years only; every following rung keeps the best 1/eta
+of them, plus the defaults, and adds years, until the survivors are scored on all `years`. Boosted
+models other than the defaults get their number of rounds by early stopping: a fit on the window
+one season earlier, validated on the season right before the test year, gives the round count of
+the test year fit. The evaluations
+of all searches run together on a process pool.
+
+The winners are written to _models.TUNED_PARAMS, which build_models and the prediction
+notebooks read:
+
+    python -m data_scripts._tuning --datasets mvp coach_turnover teams --n-jobs 4
+    python -m data_scripts._tuning --models XGBClassifier CatBoostClassifier --candidates 54 --eta 3
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+from lightgbm import LGBMClassifier, early_stopping
+from sklearn.ensemble import GradientBoostingRegressor
+from xgboost import XGBClassifier
+
+from data_scripts import _backtest as bt
+from data_scripts import _models as md
+
+# Values tried for every model of _models, by model name.
+SEARCH_SPACES = {
+    "Logistic Regression": {"model__C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0]},
+    "XGBClassifier": {"learning_rate": [0.02, 0.05, 0.1, 0.2], "max_depth": [2, 3, 4, 5, 6],
+                      "subsample": [0.6, 0.8, 1.0], "colsample_bytree": [0.5, 0.7, 1.0], "min_child_weight": [1, 3, 5]},
+    "CatBoostClassifier": {"learning_rate": [0.02, 0.05, 0.1, 0.2], "depth": [3, 4, 5, 6],
+                           "l2_leaf_reg": [1, 3, 10, 30]},
+    "LightGBM": {"learning_rate": [0.02, 0.05, 0.1, 0.2], "num_leaves": [7, 15, 31], "max_depth": [3, 4, 6],
+                 "min_child_samples": [5, 10, 20], "subsample": [0.6, 0.8, 1.0], "colsample_bytree": [0.5, 0.8, 1.0]},
+    "CatBoost": {"learning_rate": [0.02, 0.05, 0.1, 0.2], "depth": [3, 4, 5, 6], "l2_leaf_reg": [1, 3, 10, 30]},
+    "XGBoost": {"learning_rate": [0.02, 0.05, 0.1, 0.2], "max_depth": [2, 3, 4, 5, 6],
+                "subsample": [0.6, 0.8, 1.0], "colsample_bytree": [0.5, 0.8, 1.0], "min_child_weight": [1, 3, 5]},
+    "ExtraTrees": {"n_estimators": [100, 200, 400], "max_depth": [3, 4, 6, 8], "min_samples_split": [2, 4, 8],
+                   "max_features": [1.0, "sqrt", 0.5]},
+    "RandomForest": {"n_estimators": [100, 200, 400], "max_depth": [3, 4, 6, 8], "min_samples_split": [2, 4, 8],
+                     "max_features": [1.0, "sqrt", 0.5]},
+    "GradientBoosting": {"learning_rate": [0.02, 0.05, 0.1], "max_depth": [2, 3, 4], "subsample": [0.6, 0.8, 1.0],
+                         "min_samples_leaf": [1, 3, 5]},
+    "Ridge": {"alpha": [0.01, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0]},
+}
+# Parameter holding the number of boosting rounds of the models tuned with early stopping.
+ROUNDS = {"XGBClassifier": "n_estimators", "CatBoostClassifier": "iterations", "LightGBM": "n_estimators",
+          "CatBoost": "iterations", "XGBoost": "n_estimators", "GradientBoosting": "n_estimators"}
+MAX_ROUNDS = 1000
+EARLY_STOPPING = 50
+
+# Score of one test year from its _backtest metrics, higher is better.
+OBJECTIVES = {
+    "award": lambda metrics: 1 / metrics["actual_rank"],
+    "turnover": lambda metrics: np.mean([metrics[f"Recall@{k}"] for k in bt.TOP_K]),
+    "rank": lambda metrics: -metrics["MAE"],
+}
+
+
+def sample_configs(kind: str, model_name: str, n: int, seed: int = md.RANDOM_STATE) -> list:
+    """`n` distinct configurations of SEARCH_SPACES[model_name], the first being the current defaults."""
+    space = SEARCH_SPACES[model_name]
+    defaults = md.build_models(kind)[model_name].get_params()
+    configs = [{param: defaults[param] for param in space if defaults.get(param) is not None}]
+    seen = {json.dumps(configs[0], sort_keys=True, default=str)}
+    rng = np.random.default_rng(seed)
+    total = math.prod(len(values) for values in space.values())
+    if configs[0].keys() == space.keys() and all(configs[0][param] in space[param] for param in space):
+        total -= 1
+
+    while len(configs) < min(n, total + 1):
+        config = {param: values[rng.integers(len(values))] for param, values in space.items()}
+        key = json.dumps(config, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def rung_budgets(n_years: int, eta: int) -> list:
+    """Years scored at every rung, growing by `eta` up to all of them."""
+    rungs = int(math.log(n_years, eta) + 1e-9) + 1 if n_years > 1 else 1
+    return [max(1, math.ceil(n_years / eta ** (rungs - 1 - rung))) for rung in range(rungs)]
+
+
+def _early_stopped_rounds(matrix: np.ndarray, kind: str, model_name: str, params: dict, year: int, threads: int):
+    """Rounds of the best validation loss when fitting the window before `year` and validating on `year - 1`."""
+    X_fit, y_fit, X_val, val_rows, kwargs = bt.split_window(matrix, kind, year - 1)
+    y_val = matrix[val_rows, bt._TARGET]
+    known = ~np.isnan(y_val)
+    X_val, y_val = X_val[known], y_val[known]
+    if len(y_val) == 0 or len(np.unique(y_fit)) < 2:
+        return None
+
+    model = md.build_models(kind, threads, **kwargs)[model_name]
+    model.set_params(**params, **{ROUNDS[model_name]: MAX_ROUNDS})
+    if isinstance(model, XGBClassifier):
+        model.set_params(early_stopping_rounds=EARLY_STOPPING)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        return model.best_iteration + 1
+    if isinstance(model, LGBMClassifier):
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], callbacks=[early_stopping(EARLY_STOPPING, verbose=False)])
+        return model.best_iteration_ or MAX_ROUNDS
+    if isinstance(model, CatBoostClassifier):
+        model.fit(X_fit, y_fit, eval_set=(X_val, y_val), early_stopping_rounds=EARLY_STOPPING)
+        return model.get_best_iteration() + 1
+    if isinstance(model, GradientBoostingRegressor):
+        model.fit(X_fit, y_fit)
+        errors = [np.mean((predicted - y_val) ** 2) for predicted in model.staged_predict(X_val)]
+        return int(np.argmin(errors)) + 1
+    return None
+
+
+def _evaluate(path: str, name: str, model_name: str, params: dict, year: int, threads: int, early_stop: bool = True):
+    """Fits one configuration for test year `year`; returns its objective and the early-stopped rounds."""
+    spec = md.DATASETS[name]
+    kind = spec["kind"]
+    matrix = bt._open_shared(path)
+    X_train, y_train, X_test, test_rows, kwargs = bt.split_window(matrix, kind, year)
+    if len(y_train) == 0 or len(test_rows) == 0:
+        return np.nan, None
+
+    params = dict(params)
+    rounds = None
+    if early_stop and model_name in ROUNDS:
+        rounds = _early_stopped_rounds(matrix, kind, model_name, params, year, threads)
+    if rounds is not None:
+        params[ROUNDS[model_name]] = rounds
+
+    model = md.build_models(kind, threads, **kwargs)[model_name]
+    model.set_params(**params)
+    model.fit(X_train, y_train)
+
+    test = pd.DataFrame({spec["target"]: matrix[test_rows, bt._TARGET], "score": bt.predict_scores(model, kind, X_test)})
+    if "group" in spec:
+        test[spec["group"]] = matrix[test_rows, bt._GROUP]
+    return float(OBJECTIVES[kind](bt._METRICS[kind](test, spec))), rounds
+
+
+def _finite(value):
+    return float(value) if value is not None and np.isfinite(value) else None
+
+
+def _run(pool, tasks: list) -> list:
+    if pool is None:
+        return [_evaluate(*task) for task in tasks]
+    futures = [pool.submit(_evaluate, *task) for task in tasks]
+    return [future.result() for future in futures]
+
+
+def tune(datasets: list = None, models: list = None, years=range(7, 11), candidates: int = 27, eta: int = 3,
+         n_jobs: int = None, seed: int = md.RANDOM_STATE, data_dir: Path = None, output: Path = None):
+    """
+    Runs one successive-halving search per (dataset, model) and writes the winners to `output`
+    (_models.TUNED_PARAMS by default), keeping the entries of searches that were not run.
+    Returns the summary (default and tuned score, chosen parameters) and every scored rung.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    years = sorted((int(year) for year in years), reverse=True)
+    budgets = rung_budgets(len(years), eta)
+
+    searches = {}
+    for name in datasets or md.DATASETS:
+        kind = md.DATASETS[name]["kind"]
+        for model_name in md.model_names(kind):
+            if models is None or model_name in models:
+                configs = sample_configs(kind, model_name, candidates, seed)
+                searches[(name, model_name)] = {"configs": configs, "alive": list(range(len(configs)))}
+
+    results, history = {}, []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="tuning_") as tmp:
+        paths = {name: bt._write_shared(name, bt.load_dataset(name, data_dir), Path(tmp))
+                 for name in dict.fromkeys(name for name, _ in searches)}
+        pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else None
+        try:
+            for rung, budget in enumerate(budgets):
+                rung_years = years[:budget]
+                todo = [(key, i, year) for key, search in searches.items() for i in search["alive"]
+                        for year in rung_years if (key, i, year) not in results]
+                tasks = [(paths[key[0]], key[0], key[1], searches[key]["configs"][i], year, threads, i != 0)
+                         for key, i, year in todo]
+                results.update(zip(todo, _run(pool, tasks)))
+
+                for key, search in searches.items():
+                    scores = {i: np.nanmean([results[(key, i, year)][0] for year in rung_years])
+                              if not all(np.isnan(results[(key, i, year)][0]) for year in rung_years) else -np.inf
+                              for i in search["alive"]}
+                    history += [{"dataset": key[0], "model": key[1], "rung": rung, "years": len(rung_years),
+                                 "candidate": i, "score": score, "params": json.dumps(search["configs"][i], default=str)}
+                                for i, score in scores.items()]
+                    ranked = sorted(search["alive"], key=lambda i: -scores[i])
+                    search["scores"] = scores
+                    if rung < len(budgets) - 1:
+                        ranked = ranked[:max(1, math.ceil(len(ranked) / eta))]
+                        # The defaults always go on, so the last rung compares them with the winner.
+                        ranked += [0] if 0 not in ranked else []
+                    search["alive"] = ranked
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            bt._shared.clear()
+
+    summary, chosen = [], {}
+    for (name, model_name), search in searches.items():
+        best = search["alive"][0]
+        params = dict(search["configs"][best])
+        rounds = [results[((name, model_name), best, year)][1] for year in years]
+        rounds = [r for r in rounds if r is not None]
+        if rounds:
+            params[ROUNDS[model_name]] = int(np.median(rounds))
+        default_score = search["scores"].get(0)
+        summary.append({"dataset": name, "model": model_name, "candidates": len(search["configs"]),
+                        "default_score": default_score, "tuned_score": search["scores"][best],
+                        "params": params})
+        chosen.setdefault(name, {})[model_name] = params
+
+    output = Path(output or md.TUNED_PARAMS)
+    stored = json.loads(output.read_text()) if output.exists() else {"params": {}, "scores": {}}
+    for name, params in chosen.items():
+        stored["params"].setdefault(name, {}).update(params)
+    for row in summary:
+        stored["scores"].setdefault(row["dataset"], {})[row["model"]] = {
+            "default": _finite(row["default_score"]), "tuned": _finite(row["tuned_score"]),
+        }
+    stored.update({"years": sorted(years), "eta": eta, "candidates": candidates,
+                   "updated": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": round(time.perf_counter() - start, 1)})
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(stored, indent=1))
+
+    return pd.DataFrame(summary), pd.DataFrame(history)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", nargs="+", choices=list(md.DATASETS))
+    parser.add_argument("--models", nargs="+", choices=list(SEARCH_SPACES))
+    parser.add_argument("--years", type=int, nargs="+", default=list(range(7, 11)))
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=md.RANDOM_STATE)
+    parser.add_argument("--output", type=Path, default=None, help=f"default {md.TUNED_PARAMS}")
+    args = parser.parse_args()
+
+    summary, _ = tune(args.datasets, args.models, args.years, args.candidates, args.eta, args.n_jobs, args.seed,
+                      output=args.output)
+    pd.set_option("display.width", 200)
+    print(summary.to_string(index=False))
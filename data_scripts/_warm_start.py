@@ -0,0 +1,92 @@
+import numpy as np
+from catboost import CatBoostClassifier
+from lightgbm import LGBMClassifier
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LogisticRegression, Ridge
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+# Boosting rounds added per new window, as a fraction of the rounds of a full fit.
+WARM_ROUNDS = 0.2
+
+
+def _final_estimator(model):
+    return model.steps[-1][1] if isinstance(model, Pipeline) else model
+
+
+def _rounds(estimator, name: str, warm_rounds) -> int:
+    if isinstance(warm_rounds, int):
+        return warm_rounds
+    return max(1, int(round(estimator.get_params()[name] * warm_rounds)))
+
+
+def continue_fit(model, previous, X, y, warm_rounds=WARM_ROUNDS):
+    """
+    Fits `model` on the window X, y starting from `previous`, the model fitted on the window before.
+
+    Boosters (XGBoost, LightGBM, CatBoost, GradientBoosting) keep the previous trees and add
+    `warm_rounds` rounds (an int, or a fraction of the full round count) fitted on the new window.
+    LogisticRegression restarts lbfgs from the previous coefficients. Other models are refitted.
+    Without `previous` this is a plain fit.
+    """
+    if previous is None:
+        return model.fit(X, y)
+
+    estimator = _final_estimator(model)
+    if isinstance(estimator, XGBClassifier):
+        estimator.set_params(n_estimators=_rounds(estimator, "n_estimators", warm_rounds))
+        return model.fit(X, y, xgb_model=_final_estimator(previous).get_booster())
+    if isinstance(estimator, LGBMClassifier):
+        estimator.set_params(n_estimators=_rounds(estimator, "n_estimators", warm_rounds))
+        return model.fit(X, y, init_model=_final_estimator(previous).booster_)
+    if isinstance(estimator, CatBoostClassifier):
+        estimator.set_params(iterations=_rounds(estimator, "iterations", warm_rounds))
+        return model.fit(X, y, init_model=_final_estimator(previous))
+    if isinstance(estimator, (GradientBoostingRegressor, LogisticRegression)):
+        step = _final_estimator(previous)
+        if isinstance(step, GradientBoostingRegressor):
+            step.set_params(warm_start=True, n_estimators=step.n_estimators_ + _rounds(step, "n_estimators", warm_rounds))
+        else:
+            step.set_params(warm_start=True)
+        return previous.fit(X, y)
+    return model.fit(X, y)
+
+
+class RidgeWindow:
+    """
+    Ridge regression over a sliding window kept as sufficient statistics (n, Σx, Σy, XᵀX, Xᵀy).
+    Adding a season and dropping the oldest one are O(rows · features²) updates, and model()
+    solves the same centered normal equations as Ridge(fit_intercept=True), so the fit is exact.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.n = 0
+        self.sum_x = self.sum_y = self.xtx = self.xty = 0.0
+
+    def _update(self, X, y, sign: int):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.n += sign * len(y)
+        self.sum_x = self.sum_x + sign * X.sum(axis=0)
+        self.sum_y = self.sum_y + sign * y.sum()
+        self.xtx = self.xtx + sign * (X.T @ X)
+        self.xty = self.xty + sign * (X.T @ y)
+
+    def add(self, X, y):
+        self._update(X, y, 1)
+
+    def remove(self, X, y):
+        self._update(X, y, -1)
+
+    def model(self) -> Ridge:
+        mean_x = self.sum_x / self.n
+        mean_y = self.sum_y / self.n
+        gram = self.xtx - self.n * np.outer(mean_x, mean_x) + self.alpha * np.eye(len(mean_x))
+        coef = np.linalg.solve(gram, self.xty - self.n * mean_x * mean_y)
+
+        ridge = Ridge(alpha=self.alpha)
+        ridge.coef_ = coef
+        ridge.intercept_ = mean_y - mean_x @ coef
+        ridge.n_features_in_ = len(coef)
+        return ridge
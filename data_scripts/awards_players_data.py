@@ -1,5 +1,8 @@
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
+from data_scripts._career_index import CareerIndex
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from IPython.display import display
@@ -9,15 +12,17 @@ awards = pd.DataFrame()
 coaches = pd.DataFrame()
 players = pd.DataFrame()
 merged_players = pd.DataFrame()
+career = None
 
 def load_dataset():
-    global awards, coaches, players, merged_players
+    global awards, coaches, players, merged_players, career
 
     awards = sd.awards_players_df.copy()
     players = sd.players_teams_df.copy()
     coaches = sd.coaches_df.copy()
 
     merged_players = pd.merge(awards, players, on=["playerID", "year"], how="inner")
+    career = CareerIndex(players)
 
 
 metric_explanations = {
@@ -51,13 +56,164 @@ metric_explanations = {
     "PostFG%": "Postseason field goal percentage"
 }
 
-def plot_award_correlation(df, award_col, title, metrics):
+AWARD_SPECS = {
+    "All-Star Game Most Valuable Player": {
+        "title": "All-Star Game MVP — Correlation with Winning Award",
+        "metrics": ["MPG", "PPG", "APG", "RPG", "FG%", "3P%", "FT%", "TS%"],
+    },
+    "Coach of the Year": {
+        "title": "Coach of the Year — Correlation with Winning Award",
+        "metrics": ["won", "lost", "Win%", "post_wins", "post_losses", "PostWin%"],
+        "coach": True,
+    },
+    "Defensive Player of the Year": {
+        "title": "Defensive Player of the Year — Correlation with Winning Award",
+        "metrics": ["SPG", "BPG", "DRPG", "TOV/G"],
+    },
+    "Kim Perrot Sportsmanship Award": {
+        "title": "Kim Perrot Sportsmanship Award — Correlation with Winning Award",
+        "metrics": ["PF/G", "DQ/G"],
+    },
+    "Most Improved Player": {
+        "title": "Most Improved Player — Correlation with Winning Award",
+        "metrics": ["PPG_Improvement", "RPG_Improvement", "APG_Improvement"],
+    },
+    "Most Valuable Player": {
+        "title": "Most Valuable Player — Correlation with Winning Award",
+        "metrics": ["PPG", "RPG", "APG", "TS%"],
+    },
+    "Rookie of the Year": {
+        "title": "Rookie of the Year — Correlation with Winning Award",
+        "metrics": ["PPG", "RPG", "APG", "SPG", "BPG"],
+        "rookies_only": True,
+    },
+    "Sixth Woman of the Year": {
+        "title": "Sixth Woman of the Year — Correlation with Winning Award",
+        "metrics": ["PPG", "RPG", "APG", "%GamesStarted"],
+    },
+    "WNBA Finals Most Valuable Player": {
+        "title": "Finals MVP — Correlation with Winning Award",
+        "metrics": ["PostPPG", "PostRPG", "PostAPG", "PostFG%"],
+    },
+}
+
+
+def _nonzero(s):
+    return s.where(s != 0)
+
+
+def player_metric_matrix() -> pd.DataFrame:
+    """
+    Every per-game metric used by the player awards, computed once for every row of `players`.
+    Improvements compare against the player's previous season summed over all of its stints,
+    so they are NaN for players without a previous season.
+    """
+    data = players[['playerID', 'year']].copy()
+
+    data["MPG"] = players["minutes"] / players["GP"]
+    data["PPG"] = players["points"] / players["GP"]
+    data["APG"] = players["assists"] / players["GP"]
+    data["RPG"] = players["rebounds"] / players["GP"]
+    data["SPG"] = players["steals"] / players["GP"]
+    data["BPG"] = players["blocks"] / players["GP"]
+    data["DRPG"] = players["dRebounds"] / players["GP"]
+    data["TOV/G"] = players["turnovers"] / players["GP"]
+    data["PF/G"] = players["PF"] / players["GP"]
+    data["DQ/G"] = players["dq"] / players["GP"]
+    data["%GamesStarted"] = players["GS"] / players["GP"]
+    data["FG%"] = players["fgMade"] / _nonzero(players["fgAttempted"])
+    data["3P%"] = players["threeMade"] / _nonzero(players["threeAttempted"])
+    data["FT%"] = players["ftMade"] / _nonzero(players["ftAttempted"])
+    data["TS%"] = players["points"] / _nonzero(2 * (players["fgAttempted"] + 0.44 * players["ftAttempted"]))
+    data["PostPPG"] = players["PostPoints"] / _nonzero(players["PostGP"])
+    data["PostRPG"] = players["PostRebounds"] / _nonzero(players["PostGP"])
+    data["PostAPG"] = players["PostAssists"] / _nonzero(players["PostGP"])
+    data["PostFG%"] = players["PostfgMade"] / _nonzero(players["PostfgAttempted"])
+
+    rows, prev_rows = career.previous_season_rows()
+    has_prev = np.bincount(rows, minlength=len(players)) > 0
+    for stat, metric in [("points", "PPG_Improvement"), ("rebounds", "RPG_Improvement"), ("assists", "APG_Improvement")]:
+        prev_stat = np.bincount(rows, weights=players[stat].to_numpy()[prev_rows], minlength=len(players))
+        prev_gp = np.bincount(rows, weights=players["GP"].to_numpy()[prev_rows], minlength=len(players))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            improvement = (players[stat] / players["GP"]).to_numpy() - prev_stat / prev_gp
+        data[metric] = np.where(has_prev, improvement, np.nan)
+
+    data["is_rookie"] = ~career.played_in(players['playerID'], players['year'] - 1)
+    return data
+
+
+def coach_metric_matrix() -> pd.DataFrame:
+    data = coaches[['coachID', 'year', 'won', 'lost', 'post_wins', 'post_losses']].copy()
+    data["Win%"] = data["won"] / _nonzero(data["won"] + data["lost"])
+    data["PostWin%"] = data["post_wins"] / _nonzero(data["post_wins"] + data["post_losses"])
+    return data
+
+
+def _tag_winners(data, id_col, award_names):
+    """Adds one 0/1 column per award with a single join against the awards table."""
+    won = awards[awards["award"].isin(award_names)].rename(columns={"playerID": id_col})[[id_col, "year", "award"]]
+    won = won.assign(won=1).pivot_table(index=[id_col, "year"], columns="award", values="won", aggfunc="max", observed=True)
+    won = won.reindex(columns=list(award_names))
+    won.columns = [f"won::{name}" for name in won.columns]
+    data = data.merge(won, left_on=[id_col, "year"], right_index=True, how="left")
+    data[won.columns] = data[won.columns].fillna(0).astype(int)
+    return data
+
+
+def award_correlation(df, award_col, metrics) -> pd.Series:
     df = df.copy()
     df[metrics + [award_col]] = df[metrics + [award_col]].apply(pd.to_numeric, errors='coerce')
     df = df.dropna(subset=metrics)
 
-    correlations = df[metrics + [award_col]].corr()[award_col].drop(award_col).sort_values(ascending=False)
-    
+    return df[metrics + [award_col]].corr()[award_col].drop(award_col).sort_values(ascending=False)
+
+
+def award_correlation_tables(award_names: list = None, plot: bool = False) -> pd.DataFrame:
+    """
+    Correlation of every award's metrics with winning it, for all awards in one pass.
+    The metric matrices are built once and the winners of every award are tagged with one join.
+    Returns a long table with one row per (award, metric).
+    """
+    award_names = list(award_names or AWARD_SPECS)
+    player_awards = [name for name in award_names if not AWARD_SPECS[name].get("coach")]
+    coach_awards = [name for name in award_names if AWARD_SPECS[name].get("coach")]
+
+    matrices = {}
+    if player_awards:
+        matrices["player"] = _tag_winners(player_metric_matrix(), "playerID", player_awards)
+    if coach_awards:
+        matrices["coach"] = _tag_winners(coach_metric_matrix(), "coachID", coach_awards)
+
+    award_years = pd.concat([
+        merged_players[["award", "year"]],
+        awards.loc[awards["award"].isin(coach_awards), ["award", "year"]],
+    ]).groupby("award", observed=True)["year"].unique()
+
+    tables = []
+    for name in award_names:
+        spec = AWARD_SPECS[name]
+        data = matrices["coach" if spec.get("coach") else "player"]
+        years = award_years.get(name, [])
+        mask = data["year"].isin(years)
+        if spec.get("rookies_only"):
+            mask &= data["is_rookie"]
+
+        correlations = award_correlation(data[mask], f"won::{name}", spec["metrics"])
+        if plot:
+            show_award_correlation(correlations, spec["title"])
+
+        tables.append(pd.DataFrame({
+            "award": name,
+            "metric": correlations.index,
+            "correlation": correlations.values,
+            "description": [metric_explanations.get(metric, 'No description') for metric in correlations.index],
+        }))
+
+    return pd.concat(tables, ignore_index=True)
+
+
+def show_award_correlation(correlations, title):
     # Colors for positive vs negative correlations
     colors = ['blue' if x > 0 else 'red' for x in correlations.values]
 
@@ -78,7 +234,7 @@ def plot_award_correlation(df, award_col, title, metrics):
         width=800,
         height=350
     )
-    fig.show()
+    fg.show(fig, name=title, data=correlations)
 
     print(f"\n📊 Correlation Analysis: {title}")
     print("=" * 80)
@@ -88,149 +244,42 @@ def plot_award_correlation(df, award_col, title, metrics):
     print("-" * 80)
 
 
-def asgmvp_analyze():
-    asg_years = merged_players[merged_players['award'] == "All-Star Game Most Valuable Player"]['year'].unique()
-    data = players[players['year'].isin(asg_years)].copy()
-    
-    data["MPG"] = data["minutes"] / data["GP"]
-    data["PPG"] = data["points"] / data["GP"]
-    data["APG"] = data["assists"] / data["GP"]
-    data["RPG"] = data["rebounds"] / data["GP"]
-    data["FG%"] = data["fgMade"] / data["fgAttempted"].replace(0, pd.NA)
-    data["3P%"] = data["threeMade"] / data["threeAttempted"].replace(0, pd.NA)
-    data["FT%"] = data["ftMade"] / data["ftAttempted"].replace(0, pd.NA)
-    data["TS%"] = data["points"] / (2 * (data["fgAttempted"] + 0.44 * data["ftAttempted"]).replace(0, pd.NA))
-    
-    asg_mvp_winners = merged_players[merged_players['award'] == "All-Star Game Most Valuable Player"][['playerID', 'year']]
-    data = pd.merge(data, asg_mvp_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
+def plot_award_correlation(df, award_col, title, metrics):
+    show_award_correlation(award_correlation(df, award_col, metrics), title)
 
-    metrics = ["MPG", "PPG", "APG", "RPG", "FG%", "3P%", "FT%", "TS%"]
-    plot_award_correlation(data, 'won_award', "All-Star Game MVP — Correlation with Winning Award", metrics)
 
+def asgmvp_analyze():
+    award_correlation_tables(["All-Star Game Most Valuable Player"], plot=True)
 
-def coy_analyze():
-    coy_years = awards[awards["award"] == "Coach of the Year"]['year'].unique()
-    data = coaches[coaches['year'].isin(coy_years)].copy()
-    
-    data["Games"] = data["won"] + data["lost"]
-    data["Win%"] = data["won"] / data["Games"].replace(0, pd.NA)
-    data["PostWin%"] = data["post_wins"] / (data["post_wins"] + data["post_losses"]).replace(0, pd.NA)
-    
-    coy_winners = awards[awards["award"] == "Coach of the Year"].rename(columns={"playerID": "coachID"})[['coachID', 'year']]
-    data = pd.merge(data, coy_winners, on=['coachID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
 
-    metrics = ["won", "lost", "Win%", "post_wins", "post_losses", "PostWin%"]
-    plot_award_correlation(data, 'won_award', "Coach of the Year — Correlation with Winning Award", metrics)
+def coy_analyze():
+    award_correlation_tables(["Coach of the Year"], plot=True)
 
 
 def dpoy_analyze():
-    dpoy_years = merged_players[merged_players["award"] == "Defensive Player of the Year"]['year'].unique()
-    data = players[players['year'].isin(dpoy_years)].copy()
-    
-    data["SPG"] = data["steals"] / data["GP"]
-    data["BPG"] = data["blocks"] / data["GP"]
-    data["DRPG"] = data["dRebounds"] / data["GP"]
-    data["TOV/G"] = data["turnovers"] / data["GP"]
-    
-    dpoy_winners = merged_players[merged_players["award"] == "Defensive Player of the Year"][['playerID', 'year']]
-    data = pd.merge(data, dpoy_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
-
-    metrics = ["SPG", "BPG", "DRPG", "TOV/G"]
-    plot_award_correlation(data, 'won_award', "Defensive Player of the Year — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Defensive Player of the Year"], plot=True)
 
 
 def kpsw_analyze():
-    kpsw_years = merged_players[merged_players["award"] == "Kim Perrot Sportsmanship Award"]['year'].unique()
-    data = players[players['year'].isin(kpsw_years)].copy()
-    
-    data["PF/G"] = data["PF"] / data["GP"]
-    data["DQ/G"] = data["dq"] / data["GP"]
-    
-    kpsw_winners = merged_players[merged_players["award"] == "Kim Perrot Sportsmanship Award"][['playerID', 'year']]
-    data = pd.merge(data, kpsw_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
-
-    metrics = ["PF/G", "DQ/G"]
-    plot_award_correlation(data, 'won_award', "Kim Perrot Sportsmanship Award — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Kim Perrot Sportsmanship Award"], plot=True)
 
 
 def mip_analyze():
-    mip_years = merged_players[merged_players["award"] == "Most Improved Player"]['year'].unique()
-    data = players[players['year'].isin(mip_years)].copy()
-    
-    prev_year = players.copy()
-    prev_year["year"] -= 1
-    combined = pd.merge(data, prev_year, on="playerID", suffixes=("", "_prev"))
-
-    combined["PPG_Improvement"] = (combined["points"] / combined["GP"]) - (combined["points_prev"] / combined["GP_prev"])
-    combined["RPG_Improvement"] = (combined["rebounds"] / combined["GP"]) - (combined["rebounds_prev"] / combined["GP_prev"])
-    combined["APG_Improvement"] = (combined["assists"] / combined["GP"]) - (combined["assists_prev"] / combined["GP_prev"])
-    
-    mip_winners = merged_players[merged_players["award"] == "Most Improved Player"][['playerID', 'year']]
-    combined = pd.merge(combined, mip_winners, on=['playerID', 'year'], how='left', indicator=True)
-    combined['won_award'] = (combined['_merge'] == 'both').astype(int)
-    combined = combined.drop('_merge', axis=1)
-
-    metrics = ["PPG_Improvement", "RPG_Improvement", "APG_Improvement"]
-    plot_award_correlation(combined, 'won_award', "Most Improved Player — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Most Improved Player"], plot=True)
 
 
 def mvp_analyze():
-    mvp_years = merged_players[merged_players["award"] == "Most Valuable Player"]['year'].unique()
-    data = players[players['year'].isin(mvp_years)].copy()
-    
-    data["PPG"] = data["points"] / data["GP"]
-    data["RPG"] = data["rebounds"] / data["GP"]
-    data["APG"] = data["assists"] / data["GP"]
-    data["TS%"] = data["points"] / (2 * (data["fgAttempted"] + 0.44 * data["ftAttempted"]).replace(0, pd.NA))
-    
-    mvp_winners = merged_players[merged_players["award"] == "Most Valuable Player"][['playerID', 'year']]
-    data = pd.merge(data, mvp_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
-
-    metrics = ["PPG", "RPG", "APG", "TS%"]
-    plot_award_correlation(data, 'won_award', "Most Valuable Player — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Most Valuable Player"], plot=True)
 
 
 def roty_analyze():
-    roty_years = merged_players[merged_players["award"] == "Rookie of the Year"]['year'].unique()
-    data = players[players['year'].isin(roty_years)].copy()
-    
-    prev_players = players[['playerID', 'year']]
-    data['is_rookie'] = ~data.apply(lambda row: ((prev_players['playerID'] == row['playerID']) & 
-                                                (prev_players['year'] == row['year'] - 1)).any(), axis=1)
-    
-    data = data[data['is_rookie']]
-    
-    data["PPG"] = data["points"] / data["GP"]
-    data["RPG"] = data["rebounds"] / data["GP"]
-    data["APG"] = data["assists"] / data["GP"]
-    data["SPG"] = data["steals"] / data["GP"]
-    data["BPG"] = data["blocks"] / data["GP"]
-    
-    roty_winners = merged_players[merged_players["award"] == "Rookie of the Year"][['playerID', 'year']]
-    data = pd.merge(data, roty_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop(['_merge', 'is_rookie'], axis=1)
-
-    metrics = ["PPG", "RPG", "APG", "SPG", "BPG"]
-    plot_award_correlation(data, 'won_award', "Rookie of the Year — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Rookie of the Year"], plot=True)
 
 def roty_rank_of_team():
     roty_years = merged_players[merged_players["award"] == "Rookie of the Year"]['year'].unique()
     data = players[players['year'].isin(roty_years)].copy()
     
-    prev_players = players[['playerID', 'year']]
-    data['is_rookie'] = ~data.apply(lambda row: ((prev_players['playerID'] == row['playerID']) & 
-                                                 (prev_players['year'] == row['year'] - 1)).any(), axis=1)
+    data['is_rookie'] = ~career.played_in(data['playerID'], data['year'] - 1)
     data = data[data['is_rookie']]
     
     roty_winners = merged_players[merged_players["award"] == "Rookie of the Year"][['playerID', 'year']]
@@ -250,39 +299,11 @@ def roty_rank_of_team():
     display(data[['playerID', 'year', 'tmID', 'prev_year_team_rank']].sort_values(by=['year', 'prev_year_team_rank']))
 
 def smoy_analyze():
-    smoy_years = merged_players[merged_players["award"] == "Sixth Woman of the Year"]['year'].unique()
-    data = players[players['year'].isin(smoy_years)].copy()
-    
-    data["PPG"] = data["points"] / data["GP"]
-    data["RPG"] = data["rebounds"] / data["GP"]
-    data["APG"] = data["assists"] / data["GP"]
-    data["%GamesStarted"] = data["GS"] / data["GP"]
-    
-    smoy_winners = merged_players[merged_players["award"] == "Sixth Woman of the Year"][['playerID', 'year']]
-    data = pd.merge(data, smoy_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
-
-    metrics = ["PPG", "RPG", "APG", "%GamesStarted"]
-    plot_award_correlation(data, 'won_award', "Sixth Woman of the Year — Correlation with Winning Award", metrics)
+    award_correlation_tables(["Sixth Woman of the Year"], plot=True)
 
 
 def fmvp_analyze():
-    fmvp_years = merged_players[merged_players["award"] == "WNBA Finals Most Valuable Player"]['year'].unique()
-    data = players[players['year'].isin(fmvp_years)].copy()
-    
-    data["PostPPG"] = data["PostPoints"] / data["PostGP"].replace(0, pd.NA)
-    data["PostRPG"] = data["PostRebounds"] / data["PostGP"].replace(0, pd.NA)
-    data["PostAPG"] = data["PostAssists"] / data["PostGP"].replace(0, pd.NA)
-    data["PostFG%"] = data["PostfgMade"] / data["PostfgAttempted"].replace(0, pd.NA)
-    
-    fmvp_winners = merged_players[merged_players["award"] == "WNBA Finals Most Valuable Player"][['playerID', 'year']]
-    data = pd.merge(data, fmvp_winners, on=['playerID', 'year'], how='left', indicator=True)
-    data['won_award'] = (data['_merge'] == 'both').astype(int)
-    data = data.drop('_merge', axis=1)
-
-    metrics = ["PostPPG", "PostRPG", "PostAPG", "PostFG%"]
-    plot_award_correlation(data, 'won_award', "Finals MVP — Correlation with Winning Award", metrics)
+    award_correlation_tables(["WNBA Finals Most Valuable Player"], plot=True)
 
 def analyse_all_decade_team_positions():
     players = sd.awards_players_df[
@@ -1,4 +1,5 @@
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -50,9 +51,9 @@ def plot_wins_losses_and_trend():
                         labels={'win_pct': 'Win Percentage'}, opacity=0.7)
     
     # Show plots sequentially
-    fig1.show()
-    fig2.show()
-    fig3.show()
+    fg.show(fig1, data=df)
+    fg.show(fig2, data=df)
+    fg.show(fig3, data=df)
 
 
 def analyze_wnba_coaches():
@@ -84,9 +85,9 @@ def analyze_wnba_coaches():
                      color_discrete_map={0:'skyblue',1:'salmon'})
     
     # Show plots
-    heatmap.show()
-    boxplot.show()
-    barplot.show()
+    fg.show(heatmap, data=df)
+    fg.show(boxplot, data=df)
+    fg.show(barplot, data=df)
 
 def coach_tenure():
     df = sd.coaches_df.sort_values(["coachID", "tmID", "year"])
@@ -98,14 +99,11 @@ def coach_tenure():
     plt.ylabel("Number of Coaches")
     plt.title("Coach Turnover by Team Tenure Year")
     plt.tight_layout()
-    plt.show()
+    fg.show(data=df)
 
 
-def get_turnover_years():
-    """
-    Returns and displays a table of coach turnovers by year.
-    Shows which years had coaching changes and which teams were affected.
-    """
+def turnover_years_table() -> pd.DataFrame:
+    """Coach turnovers by year: how many, which teams and the share of the league's teams."""
     df = sd.coaches_df.copy()
     
     turnovers = df[df['stint'] == 1].copy()
@@ -128,7 +126,16 @@ def get_turnover_years():
     
     # Rename columns for better display
     yearly_summary.columns = ['Year', 'Num Turnovers', 'Teams Affected', 'Turnover Rate']
-    
+    return yearly_summary
+
+
+def get_turnover_years():
+    """
+    Returns and displays a table of coach turnovers by year.
+    Shows which years had coaching changes and which teams were affected.
+    """
+    yearly_summary = turnover_years_table()
+
     # Display as formatted table
     print("\n=== COACH TURNOVERS BY YEAR ===\n")
     from IPython.display import display
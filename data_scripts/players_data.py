@@ -1,4 +1,5 @@
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -30,7 +31,7 @@ def birthDate_check():
           plt.scatter(df.index[invalid_mask], np.zeros(invalid_mask.sum()), color='red', label='Invalid Dates')
           plt.legend()
 
-     plt.show()
+     fg.show(data=df)
 
 
 def normalize_players():
@@ -53,6 +54,7 @@ def normalize_players():
           mean_w = df_pos['weight'].mean()
 
           df['height'] = df['height'].astype(float)
+          df['weight'] = df['weight'].astype(float)
           df.loc[pos_mask & (df['height'] < lower_h), 'height'] = mean_h
           df.loc[pos_mask & (df['height'] > upper_h), 'height'] = mean_h
 
@@ -77,7 +79,7 @@ def college_origin():
      plt.ylabel("Number of Players")
      plt.xticks(rotation=0)
      plt.tight_layout()
-     plt.show()
+     fg.show(data=df)
 
 
 def top_10_colleges_table():
@@ -103,7 +105,7 @@ def players_by_position():
           plt.text(i, count + 1, str(count), ha="center", va="bottom", fontsize=9)
      
      plt.tight_layout()
-     plt.show()
+     fg.show(data=df)
 
 def position_merge():
     order = ['C', 'F', 'G']
@@ -143,4 +145,4 @@ def position_height_weight():
           margin=dict(l=0, r=0, b=0, t=50)
      )
 
-     fig.show()
\ No newline at end of file
+     fg.show(fig, data=df)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from data_scripts import _store_data as sd
+from data_scripts import _perf_scores as ps
+from data_scripts import _figures as fg
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -35,11 +37,9 @@ def overall_performance_per_game(PTS, REB, AST, STL, BLK, TOV, FGM, FGA, GP):
 
 def average_players_perfomance():
     df = sd.players_teams_df.copy()
-    df['Performance'] = df.apply(
-        lambda row: overall_performance_per_game(
-            row['points'], row['rebounds'], row['assists'], row['steals'],
-            row['blocks'], row['turnovers'], row['fgMade'], row['fgAttempted'], row['GP']
-        ), axis=1
+    df['Performance'] = ps.overall_score(
+        df['points'], df['rebounds'], df['assists'], df['steals'],
+        df['blocks'], df['turnovers'], df['fgMade'], df['fgAttempted'], df['GP']
     )
     avg_perf_per_player = df.groupby('playerID')['Performance'].mean().reset_index()
     
@@ -62,22 +62,18 @@ def average_players_perfomance():
     fig3.add_hrect(y0=25, y1=40, fillcolor='#27ae60', opacity=0.2, line_width=0)
     fig3.add_hrect(y0=40, y1=avg_player_year['Performance'].max(), fillcolor='#006ab1', opacity=0.2, line_width=0)
     
-    fig1.show()
-    fig2.show()
-    fig3.show()
+    fg.show(fig1, data=df)
+    fg.show(fig2, data=df)
+    fg.show(fig3, data=df)
 
 
 def off_def_players_perfomance():
     df = sd.players_teams_df.copy()
-    df['OffPerformance'] = df.apply(
-        lambda row: offense_score_per_game(
-            row['points'], row['assists'], row['fgMade'], row['fgAttempted'], row['turnovers'], row['GP']
-        ), axis=1
+    df['OffPerformance'] = ps.offense_score(
+        df['points'], df['assists'], df['fgMade'], df['fgAttempted'], df['turnovers'], df['GP']
     )
-    df['DefPerformance'] = df.apply(
-        lambda row: defense_score_per_game(
-            row['rebounds'], row['steals'], row['blocks'], row['PF'], row['GP']
-        ), axis=1
+    df['DefPerformance'] = ps.defense_score(
+        df['rebounds'], df['steals'], df['blocks'], df['PF'], df['GP']
     )
     
     avg_off_player_year = df.groupby(['playerID','year'])['OffPerformance'].mean().reset_index()
@@ -99,17 +95,50 @@ def off_def_players_perfomance():
     fig_def.add_hrect(y0=10, y1=14, fillcolor='#27ae60', opacity=0.2, line_width=0)
     fig_def.add_hrect(y0=14, y1=avg_def_player_year['DefPerformance'].max(), fillcolor='#006ab1', opacity=0.2, line_width=0)
     
-    fig_off.show()
-    fig_def.show()
-
-
-def player_teammates_corr(min_seasons: int = 3, plot: bool = True, top_n: int = 10):
+    fg.show(fig_off, data=df)
+    fg.show(fig_def, data=df)
+
+
+def grouped_pearson(keys, x, y, return_counts: bool = False) -> pd.DataFrame:
+    """
+    Pearson correlation of x and y within every group of `keys`, in one vectorized pass.
+    Rows where x or y is NaN are dropped pairwise (like Series.corr). The grouped sums of
+    x, y, x², y² and xy are taken around the group means, which keeps them numerically stable.
+    Returns one row per key (sorted) with `corr` and, when `return_counts`, the pair count `n`.
+    """
+    codes, uniques = pd.factorize(np.asarray(keys), sort=True)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_groups = len(uniques)
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    codes, x, y = codes[valid], x[valid], y[valid]
+
+    n = np.bincount(codes, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = x - (np.bincount(codes, x, n_groups) / n)[codes]
+        dy = y - (np.bincount(codes, y, n_groups) / n)[codes]
+        sxx = np.bincount(codes, dx * dx, n_groups)
+        syy = np.bincount(codes, dy * dy, n_groups)
+        sxy = np.bincount(codes, dx * dy, n_groups)
+        corr = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+    corr[n < 2] = np.nan
+
+    result = pd.DataFrame({'key': uniques, 'corr': corr})
+    if return_counts:
+        result['n'] = n
+    return result
+
+
+def player_teammates_corr(min_seasons: int = 3, plot: bool = True, top_n: int = 10, return_counts: bool = False):
+    """
+    Correlation between each player's season performance and her teammates' average, per player.
+    With `return_counts` the result also has `n_seasons`, the number of seasons behind each correlation.
+    """
     df = sd.players_teams_df.copy()
-    df['Performance'] = df.apply(
-        lambda row: overall_performance_per_game(
-            row['points'], row['rebounds'], row['assists'], row['steals'],
-            row['blocks'], row['turnovers'], row['fgMade'], row['fgAttempted'], row['GP']
-        ), axis=1
+    df['Performance'] = ps.overall_score(
+        df['points'], df['rebounds'], df['assists'], df['steals'],
+        df['blocks'], df['turnovers'], df['fgMade'], df['fgAttempted'], df['GP']
     )
     df = df.groupby(['playerID','year','tmID'], as_index=False)['Performance'].mean()
     team_avg = df.groupby(['tmID','year'], as_index=False).agg(team_avg_perf=('Performance','mean'),
@@ -121,30 +150,29 @@ def player_teammates_corr(min_seasons: int = 3, plot: bool = True, top_n: int =
     valid_players = season_counts[season_counts >= min_seasons].index
     df = df[df['playerID'].isin(valid_players)]
     
-    results = []
-    for player, player_data in df.groupby('playerID'):
-        if player_data['Performance'].nunique()<2 or player_data['teammates_avg_perf'].nunique()<2:
-            continue
-        corr = player_data['Performance'].corr(player_data['teammates_avg_perf'])
-        results.append({'playerID':player, 'corr_with_teammates':corr})
-    
-    corr_df = pd.DataFrame(results)
+    # Players whose performance or teammates' average never varies have no defined correlation.
+    distinct = df.groupby('playerID')[['Performance', 'teammates_avg_perf']].nunique()
+    varying = distinct.index[(distinct >= 2).all(axis=1)]
+    df = df[df['playerID'].isin(varying)]
+
+    corr_df = grouped_pearson(df['playerID'], df['Performance'], df['teammates_avg_perf'], return_counts)
+    corr_df = corr_df.rename(columns={'key': 'playerID', 'corr': 'corr_with_teammates', 'n': 'n_seasons'})
     avg_corr = corr_df['corr_with_teammates'].mean()
     print(f"Average correlation with teammates (across seasons): {avg_corr:.4f}")
     
     if plot and not corr_df.empty:
         fig = px.histogram(corr_df, x='corr_with_teammates', nbins=20, title='Distribution of Player–Teammate Correlations',
                            labels={'corr_with_teammates':'Correlation'})
-        fig.show()
+        fg.show(fig, data=corr_df)
+
+    return corr_df
 
 
 def perf_per_min():
     df = sd.players_teams_df.copy()
-    df['Performance'] = df.apply(
-        lambda row: overall_performance_per_game(
-            row['points'], row['rebounds'], row['assists'], row['steals'],
-            row['blocks'], row['turnovers'], row['fgMade'], row['fgAttempted'], row['minutes']
-        ), axis=1
+    df['Performance'] = ps.overall_score(
+        df['points'], df['rebounds'], df['assists'], df['steals'],
+        df['blocks'], df['turnovers'], df['fgMade'], df['fgAttempted'], df['minutes']
     )
     avg_player_year = df.groupby(['playerID','year'])['Performance'].mean().reset_index()
     
@@ -156,7 +184,7 @@ def perf_per_min():
     fig.add_hrect(y0=5, y1=7, fillcolor='#27ae60', opacity=0.15, line_width=0)
     fig.add_hrect(y0=7, y1=avg_player_year['Performance'].max(), fillcolor='#006ab1', opacity=0.15, line_width=0)
     
-    fig.show()
+    fg.show(fig, data=df)
 
 
 def gs_gp():
@@ -168,11 +196,11 @@ def gs_gp():
     ])
     fig.update_layout(title='Average Games Played and Games Started per Year', barmode='group',
                       xaxis_title='Year', yaxis_title='Average Games')
-    fig.show()
+    fg.show(fig, data=df)
 
 
 def avg_mins():
     df = sd.players_teams_df.copy()
     avg_mins = df.groupby('year', as_index=False)['minutes'].mean()
     fig = px.bar(avg_mins, x='year', y='minutes', title='Average Minutes Played per Year', labels={'minutes':'Average Minutes','year':'Year'})
-    fig.show()
+    fg.show(fig, data=df)
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np        
 import matplotlib.pyplot as plt
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
 
 def series_post_bracket_table():
     df_copy = sd.series_post_df.copy()
@@ -64,7 +65,7 @@ def series_post_bracket_table():
 
     # --- Title ---
     plt.title("WNBA Playoff Bracket Table", fontsize=14, pad=20)
-    plt.show()
+    fg.show(fig, data=df_copy)
 
 
 
@@ -102,7 +103,7 @@ def series_wins_losses_count():
         axes[i].grid(axis='y', linestyle='--', alpha=0.6)
     
     plt.tight_layout()
-    plt.show()
+    fg.show(fig, data=df)
 
 
 def playoff_teams():
@@ -115,7 +116,9 @@ def playoff_teams():
 
     all_teams = all_teams.drop_duplicates(subset=['year', 'team'])
 
-    appearances = all_teams['team'].value_counts().reset_index()
+    # Counted on the ids themselves: a shared team dictionary would also list the teams that never
+    # reached the playoffs, and order the ties alphabetically instead of by first appearance.
+    appearances = all_teams['team'].astype(str).value_counts().reset_index()
     appearances.columns = ['team', 'playoff_appearances']
 
     appearances = appearances.sort_values(by='playoff_appearances', ascending=False).reset_index(drop=True)
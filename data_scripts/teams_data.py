@@ -3,40 +3,51 @@ import matplotlib.pyplot as plt
 import matplotlib
 import seaborn as sns
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 
+def build_playoff_index(series_post_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns one row per (year, tmID) that reached the playoffs with the W/L result of every
+    round ('FR', 'CF', 'F') the team played. A team listed as winner of a round wins over a
+    loser entry for the same round.
+    """
+    results = pd.concat([
+        series_post_df[['year', 'round', 'tmIDWinner']].rename(columns={'tmIDWinner': 'tmID'}).assign(result='W'),
+        series_post_df[['year', 'round', 'tmIDLoser']].rename(columns={'tmIDLoser': 'tmID'}).assign(result='L'),
+    ], ignore_index=True)
+    results['tmID'] = results['tmID'].astype(str)
+    results = results.drop_duplicates(subset=['year', 'round', 'tmID'], keep='first')
+    return results.pivot(index=['year', 'tmID'], columns='round', values='result')
+
+
 def fix_missing_values():
     round_order = ['firstRound', 'semis', 'finals']
     round_map = {'FR': 'firstRound', 'CF': 'semis', 'F': 'finals'}
 
-    for this_year in sd.series_post_df['year'].unique():
-        year_results = sd.series_post_df[sd.series_post_df['year'] == this_year]
-
-        for tm in sd.teams_df.loc[sd.teams_df['year'] == this_year, 'tmID']:
-            team_row = sd.teams_df[
-                (sd.teams_df['year'] == this_year) & (sd.teams_df['tmID'] == tm)
-            ]
+    bracket = build_playoff_index(sd.series_post_df)
+    keys = pd.MultiIndex.from_arrays([sd.teams_df['year'], sd.teams_df['tmID'].astype(str)])
+    played = bracket.reindex(keys)
+    played.index = sd.teams_df.index
 
-            for i, r in enumerate(round_order[:-1]):
-                next_r = round_order[i + 1]
+    # Decide every fill from the values before back-filling, so a filled round never cascades into the next one.
+    before = sd.teams_df[round_order].copy()
 
-                if team_row[r].iloc[0] == "W" and (pd.isna(team_row[next_r].iloc[0]) or team_row[next_r].iloc[0] == ""):
-                    next_round_results = year_results[year_results['round'] == list(round_map.keys())[i + 1]]
+    for i, r in enumerate(round_order[:-1]):
+        next_r = round_order[i + 1]
+        next_code = list(round_map.keys())[i + 1]
+        if next_code not in played.columns:
+            continue
 
-                    if tm in next_round_results['tmIDWinner'].values:
-                        result = "W"
-                    elif tm in next_round_results['tmIDLoser'].values:
-                        result = "L"
-                    else:
-                        continue
-
-                    sd.teams_df.loc[
-                        (sd.teams_df['year'] == this_year) & (sd.teams_df['tmID'] == tm),
-                        next_r
-                    ] = result
+        fill = (
+            (before[r] == "W")
+            & (before[next_r].isna() | (before[next_r] == ""))
+            & played[next_code].notna()
+        )
+        sd.teams_df.loc[fill, next_r] = played.loc[fill, next_code]
 
 def teams_series_appearances():
     series_counts = (
@@ -58,7 +69,7 @@ def teams_series_appearances():
     plt.ylabel("Total Series Played")
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    fg.show(data=series_counts)
 
 def teams_regular_season_wins_trend():
     wins_per_team = sd.teams_df.groupby(['year', 'name'])['won'].sum().reset_index()
@@ -86,7 +97,7 @@ def teams_regular_season_wins_trend():
         yaxis=dict(rangemode='tozero')
     )
     
-    fig.show()
+    fg.show(fig, data=wins_per_team)
 
 def teams_regular_season_rank_trend():
     # Aggregate rank by year and team
@@ -139,7 +150,7 @@ def teams_regular_season_rank_trend():
         legend_title="Teams"
     )
 
-    fig.show()
+    fg.show(fig, data=rank_per_team)
 
 def efficiency_scatter():
     df = sd.teams_df.copy()
@@ -168,7 +179,7 @@ def efficiency_scatter():
     fig.update_yaxes(autorange='reversed')
 
     fig.update_traces(marker=dict(size=8, opacity=0.8))
-    fig.show()
+    fg.show(fig, data=df)
 
 
 
@@ -233,7 +244,7 @@ def correlation_heatmap():
         xaxis_title="Metrics",
         yaxis_title="Metrics"
     )
-    heatmap.show()
+    fg.show(heatmap, data=df)
 
 
 def attendance_vs_performance():
@@ -257,7 +268,7 @@ def attendance_vs_performance():
         labels={'Value': 'Performance Metric (Scaled)', 'attend': 'Attendance'}
     )
     fig.update_traces(marker=dict(size=6, opacity=0.8))
-    fig.show()
+    fg.show(fig, data=melted)
 
 
 
@@ -278,7 +289,7 @@ def playoff_comparison():
         xaxis_title='Playoff Status',
         yaxis_title='Average Value'
     )
-    fig.show()
+    fg.show(fig, data=stats)
 
 
 def regular_season_ranks():
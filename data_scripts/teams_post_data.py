@@ -1,6 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from data_scripts import _store_data as sd
+from data_scripts import _figures as fg
 
 def teams_post_wins_percentage():
     team_results = sd.teams_post_df.groupby("tmID")[["W", "L"]].sum().reset_index()
@@ -17,7 +18,7 @@ def teams_post_wins_percentage():
     plt.ylabel("Win Percentage")
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    fg.show(data=team_results)
 
 def max_wins():
     df = sd.teams_post_df.copy()